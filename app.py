@@ -2,27 +2,485 @@
 A task list app written in Flask with levels and experience points (XP).
 """
 
+import atexit
+from bisect import bisect_left, bisect_right
 import calendar
+import cProfile
+import csv
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
 from datetime import datetime, timedelta, date, timezone
+import hashlib
+import io
+import json
 import math
 import os
-from typing import Union
-from flask import Flask, flash, render_template, request, redirect, url_for
+import random
+import sqlite3
+import threading
+import time
+from typing import Iterable, Iterator, NamedTuple, Union
+import click
+from flask import (
+    Flask,
+    flash,
+    g,
+    get_flashed_messages,
+    has_request_context,
+    jsonify,
+    make_response,
+    render_template,
+    request,
+    redirect,
+    session,
+    url_for,
+)
+from flask.cli import AppGroup
 from flask_migrate import Migrate as MigrateClass
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import func, text
+from markupsafe import Markup
+import numpy as np
+from sqlalchemy import and_, event, false, func, insert, or_, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Mapped
+from werkzeug.http import is_resource_modified
+from werkzeug.security import check_password_hash, generate_password_hash
 from werkzeug.wrappers import Response
 
 
+def get_engine_options(
+    environment: dict[str, str],
+) -> dict:  # get database engine options
+    """
+    Get the database connection pool options set in the environment variables.
+    environment - the environment variables.
+    Return the engine options of the options that are set.
+    """
+    return {
+        option: converter(environment[variable])
+        for option, variable, converter in (
+            ("pool_size", "DATABASE_POOL_SIZE", int),
+            ("max_overflow", "DATABASE_MAX_OVERFLOW", int),
+            ("pool_pre_ping", "DATABASE_POOL_PRE_PING", lambda value: value == "1"),
+            ("pool_recycle", "DATABASE_POOL_RECYCLE", int),
+        )
+        if environment.get(variable)
+    }
+
+
 app = Flask(__name__)
-app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///app.db"
+app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get(
+    "DATABASE_URL", "sqlite:///app.db"
+)  # database URI, SQLite by default
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = get_engine_options(
+    dict(os.environ)
+)  # database connection pool options set in environment variables
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+app.config["TASKS_PER_PAGE"] = int(
+    os.environ.get("TASKS_PER_PAGE", "50")
+)  # number of tasks shown on each page
+app.config["IMPORT_BATCH_SIZE"] = int(
+    os.environ.get("IMPORT_BATCH_SIZE", "1000")
+)  # number of tasks inserted at once when importing tasks
+app.config["AGENDA_DAYS"] = int(
+    os.environ.get("AGENDA_DAYS", "30")
+)  # number of days in the agenda when no end date is given
+app.config["AGENDA_MAX_DAYS"] = int(
+    os.environ.get("AGENDA_MAX_DAYS", "366")
+)  # maximum number of days in the agenda
+app.config["COMPLETION_QUEUE"] = (
+    os.environ.get("COMPLETION_QUEUE", "0") == "1"
+)  # queue task completions and score them in a background worker
+app.config["COMPLETION_WORKER_THREAD"] = (
+    os.environ.get("COMPLETION_WORKER_THREAD", "1") == "1"
+)  # run the completion worker in a thread of each app process
+app.config["COMPLETION_BATCH_SIZE"] = int(
+    os.environ.get("COMPLETION_BATCH_SIZE", "100")
+)  # maximum number of queued completions scored at once for each user
+app.config["COMPLETION_POLL_INTERVAL"] = float(
+    os.environ.get("COMPLETION_POLL_INTERVAL", "1")
+)  # seconds between checks for queued completions when the queue is empty
+app.config["STATS_SNAPSHOT_INTERVAL"] = int(
+    os.environ.get("STATS_SNAPSHOT_INTERVAL", "1000")
+)  # number of completions between snapshots of each user's stats
+app.config["INSTRUMENTATION"] = (
+    os.environ.get("INSTRUMENTATION", "0") == "1"
+)  # record request, SQL and span timings and serve them at /metrics
+app.config["PROFILE_SAMPLE_RATE"] = float(
+    os.environ.get("PROFILE_SAMPLE_RATE", "0")
+)  # fraction of requests run under cProfile when instrumentation is on
+app.config["PROFILE_SLOW_REQUEST_MS"] = float(
+    os.environ.get("PROFILE_SLOW_REQUEST_MS", "500")
+)  # profiled requests slower than this many milliseconds are saved
+app.config["PROFILE_DIR"] = os.environ.get(
+    "PROFILE_DIR", os.path.join(app.instance_path, "profiles")
+)  # folder to save request profiles in
+app.config["SQL_STATEMENT_BUDGET"] = int(
+    os.environ.get("SQL_STATEMENT_BUDGET", "25")
+)  # log a warning when an instrumented request runs more SQL statements than this, 0 to disable
+app.config["SQLITE_PRAGMAS"] = {
+    "journal_mode": os.environ.get("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "mmap_size": os.environ.get("SQLITE_MMAP_SIZE", "268435456"),
+    "cache_size": os.environ.get("SQLITE_CACHE_SIZE", "-20000"),
+    "busy_timeout": os.environ.get("SQLITE_BUSY_TIMEOUT", "5000"),
+    "temp_store": os.environ.get("SQLITE_TEMP_STORE", "MEMORY"),
+}  # SQLite pragmas applied to each database connection, empty values are skipped
+app.config["TASK_CACHE_SIZE"] = int(
+    os.environ.get("TASK_CACHE_SIZE", "10000")
+)  # maximum number of rendered tasks to cache
+app.config["PAGE_CACHE_SIZE"] = int(
+    os.environ.get("PAGE_CACHE_SIZE", "64")
+)  # maximum number of rendered task list pages to cache
 app.secret_key = os.environ["SECRET_KEY"]
 db = SQLAlchemy(app)
 migrate_instance = MigrateClass(app, db)
 
 
+@event.listens_for(Engine, "connect")
+def set_sqlite_pragmas(
+    dbapi_connection, connection_record
+) -> None:  # set SQLite pragmas on connect
+    """
+    Apply the SQLite pragma profile to each new database connection.
+    dbapi_connection - the new database connection.
+    connection_record - the connection pool record.
+    """
+    if not isinstance(dbapi_connection, sqlite3.Connection):  # if not SQLite
+        return
+    cursor = dbapi_connection.cursor()
+    for name, value in app.config["SQLITE_PRAGMAS"].items():  # repeat for each pragma
+        if value:  # skip empty pragma values
+            cursor.execute(f"PRAGMA {name} = {value}")  # set pragma value
+    cursor.close()
+
+
+def optimize_database() -> None:  # optimize SQLite database on shutdown
+    """
+    Run PRAGMA optimize to update SQLite query planner statistics when the app shuts down.
+    """
+    with app.app_context():
+        if db.engine.dialect.name == "sqlite":  # if database is SQLite
+            with db.engine.connect() as connection:
+                connection.execute(text("PRAGMA optimize"))  # optimize database
+
+
+atexit.register(optimize_database)  # optimize database on shutdown
+
+
+class Metrics:
+    """
+    Thread-safe request, SQL statement and span timings of this process, exposed in the Prometheus text format.
+    """
+
+    request_buckets: tuple[float, ...] = (
+        0.005,
+        0.01,
+        0.025,
+        0.05,
+        0.1,
+        0.25,
+        0.5,
+        1.0,
+        2.5,
+        5.0,
+        10.0,
+    )  # upper bounds of the request duration histogram buckets in seconds
+
+    def __init__(self) -> None:  # create metrics
+        """
+        Create empty metrics.
+        """
+        self.requests: dict = (
+            {}
+        )  # request count, total seconds and bucket counts by endpoint, method and status
+        self.sql: dict = {}  # statement count and total seconds by endpoint
+        self.spans: dict = {}  # span count and total seconds by span name
+        self.lock = threading.Lock()  # lock to update metrics across threads
+
+    def observe_request(
+        self, endpoint: str, method: str, status: int, seconds: float
+    ) -> None:  # record request duration
+        """
+        Record the duration of a request.
+        endpoint - the endpoint that handled the request.
+        method - the HTTP method of the request.
+        status - the response status code.
+        seconds - the duration of the request in seconds.
+        """
+        bucket: int = bisect_left(
+            self.request_buckets, seconds
+        )  # get the smallest bucket the duration fits in
+        with self.lock:
+            entry: Union[list, None] = self.requests.get((endpoint, method, status))
+            if entry is None:  # if this is the first request of its kind
+                entry = self.requests[(endpoint, method, status)] = [
+                    0,
+                    0.0,
+                    [0] * (len(self.request_buckets) + 1),
+                ]
+            entry[0] += 1  # increase request count by 1
+            entry[1] += seconds  # add request duration
+            entry[2][bucket] += 1  # count request in its bucket
+
+    def observe_sql(self, endpoint: str, seconds: float) -> None:  # record SQL statement
+        """
+        Record the duration of an SQL statement.
+        endpoint - the endpoint that ran the statement, or background outside requests.
+        seconds - the duration of the statement in seconds.
+        """
+        with self.lock:
+            entry: Union[list, None] = self.sql.get(endpoint)
+            if entry is None:  # if this is the first statement of the endpoint
+                entry = self.sql[endpoint] = [0, 0.0]
+            entry[0] += 1  # increase statement count by 1
+            entry[1] += seconds  # add statement duration
+
+    def observe_span(self, name: str, seconds: float) -> None:  # record span
+        """
+        Record the duration of a span of code.
+        name - the name of the span.
+        seconds - the duration of the span in seconds.
+        """
+        with self.lock:
+            entry: Union[list, None] = self.spans.get(name)
+            if entry is None:  # if this is the first time the span ran
+                entry = self.spans[name] = [0, 0.0]
+            entry[0] += 1  # increase span count by 1
+            entry[1] += seconds  # add span duration
+
+    def render(self) -> str:  # get metrics in Prometheus text format
+        """
+        Get the metrics in the Prometheus text exposition format.
+        """
+        lines: list[str] = [
+            "# HELP app_request_duration_seconds Request duration in seconds.",
+            "# TYPE app_request_duration_seconds histogram",
+        ]
+        with self.lock:
+            for (endpoint, method, status), (count, total, buckets) in sorted(
+                self.requests.items()
+            ):  # repeat for each kind of request
+                labels: str = (
+                    f'endpoint="{endpoint}",method="{method}",status="{status}"'
+                )
+                cumulative: int = 0  # number of requests in this bucket or below
+                for upper_bound, bucket_count in zip(
+                    (*self.request_buckets, "+Inf"), buckets
+                ):  # repeat for each bucket
+                    cumulative += bucket_count
+                    lines.append(
+                        f'app_request_duration_seconds_bucket{{{labels},le="{upper_bound}"}} {cumulative}'
+                    )
+                lines.append(f"app_request_duration_seconds_sum{{{labels}}} {total}")
+                lines.append(f"app_request_duration_seconds_count{{{labels}}} {count}")
+            lines.append("# HELP app_sql_statements_total SQL statements run.")
+            lines.append("# TYPE app_sql_statements_total counter")
+            for endpoint, (count, total) in sorted(self.sql.items()):
+                lines.append(f'app_sql_statements_total{{endpoint="{endpoint}"}} {count}')
+            lines.append(
+                "# HELP app_sql_duration_seconds_total Time spent running SQL statements."
+            )
+            lines.append("# TYPE app_sql_duration_seconds_total counter")
+            for endpoint, (count, total) in sorted(self.sql.items()):
+                lines.append(
+                    f'app_sql_duration_seconds_total{{endpoint="{endpoint}"}} {total}'
+                )
+            lines.append("# HELP app_span_duration_seconds Time spent in spans of code.")
+            lines.append("# TYPE app_span_duration_seconds summary")
+            for name, (count, total) in sorted(self.spans.items()):
+                lines.append(f'app_span_duration_seconds_sum{{span="{name}"}} {total}')
+                lines.append(f'app_span_duration_seconds_count{{span="{name}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()  # request, SQL statement and span timings of this process
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:  # time a span of code
+    """
+    Time the code run inside the with block and record it under the span name when instrumentation is on.
+    name - the name of the span.
+    """
+    if not app.config["INSTRUMENTATION"]:  # if instrumentation is off
+        yield
+        return
+    start: float = time.perf_counter()  # get start time
+    try:
+        yield
+    finally:
+        seconds: float = time.perf_counter() - start  # get span duration
+        metrics.observe_span(name, seconds)  # record span duration
+        if has_request_context() and "spans" in g:  # if timing a request
+            g.spans[name] = g.spans.get(name, 0.0) + seconds
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def start_sql_timer(
+    connection, cursor, statement, parameters, context, executemany
+) -> None:  # start timing SQL statement
+    """
+    Save the start time of each SQL statement when instrumentation is on.
+    """
+    if app.config["INSTRUMENTATION"]:  # if instrumentation is on
+        connection.info["statement_start"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def stop_sql_timer(
+    connection, cursor, statement, parameters, context, executemany
+) -> None:  # record SQL statement duration
+    """
+    Record the duration of each SQL statement under the endpoint that ran it, and add it to the current request's totals.
+    """
+    start: Union[float, None] = connection.info.pop(
+        "statement_start", None
+    )  # get statement start time
+    if start is None:  # if instrumentation was off when the statement started
+        return
+    seconds: float = time.perf_counter() - start  # get statement duration
+    endpoint: str = "background"  # statements outside requests are run in background
+    if has_request_context() and "request_start" in g:  # if timing a request
+        endpoint = request.endpoint or "unknown"
+        g.sql_statements += 1  # increase request statement count by 1
+        g.sql_seconds += seconds  # add statement duration to request
+    metrics.observe_sql(endpoint, seconds)  # record statement duration
+
+
+@app.before_request
+def start_request_timer() -> None:  # start timing request
+    """
+    Save the start time of each request when instrumentation is on, and start profiling a sample of requests.
+    """
+    if not app.config["INSTRUMENTATION"]:  # if instrumentation is off
+        return
+    g.request_start = time.perf_counter()  # get request start time
+    g.sql_statements = 0  # number of SQL statements run by the request
+    g.sql_seconds = 0.0  # time spent running SQL statements
+    g.spans = {}  # time spent in each span by the request
+    if random.random() < app.config["PROFILE_SAMPLE_RATE"]:  # if request is sampled
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()  # profile the request
+            g.profiler = profiler
+        except ValueError:  # if another request is being profiled on Python 3.12+
+            pass
+
+
+@app.after_request
+def stop_request_timer(response: Response) -> Response:  # record request duration
+    """
+    Record the duration of each request, add a Server-Timing header and save the profile of slow sampled requests.
+    response - the response to the request.
+    """
+    if "request_start" not in g:  # if request wasn't timed
+        return response
+    seconds: float = time.perf_counter() - g.request_start  # get request duration
+    endpoint: str = request.endpoint or "unknown"  # get endpoint name
+    metrics.observe_request(
+        endpoint, request.method, response.status_code, seconds
+    )  # record request duration
+    if (
+        0 < app.config["SQL_STATEMENT_BUDGET"] < g.sql_statements
+    ):  # if request ran too many statements, such as one query per task
+        app.logger.warning(
+            "%s %s ran %d SQL statements, more than the budget of %d",
+            request.method,
+            request.path,
+            g.sql_statements,
+            app.config["SQL_STATEMENT_BUDGET"],
+        )
+    response.headers["Server-Timing"] = ", ".join(
+        [
+            f"app;dur={seconds * 1000:.1f}",
+            f'sql;dur={g.sql_seconds * 1000:.1f};desc="{g.sql_statements} statements"',
+        ]
+        + [f"{name};dur={total * 1000:.1f}" for name, total in g.spans.items()]
+    )  # show timings in browser developer tools
+    profiler: Union[cProfile.Profile, None] = g.pop("profiler", None)
+    if profiler is not None:  # if request was profiled
+        profiler.disable()  # stop profiling the request
+        if (
+            seconds * 1000 >= app.config["PROFILE_SLOW_REQUEST_MS"]
+        ):  # if request was slow
+            os.makedirs(app.config["PROFILE_DIR"], exist_ok=True)
+            profiler.dump_stats(
+                os.path.join(
+                    app.config["PROFILE_DIR"],
+                    f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{endpoint}-{seconds * 1000:.0f}ms.prof",
+                )
+            )  # save profile for snakeviz or pstats
+    return response
+
+
+@app.teardown_request
+def stop_request_profiler(
+    error: Union[BaseException, None],
+) -> None:  # stop profiling failed request
+    """
+    Stop profiling the request if it failed before the response was made.
+    error - the error that ended the request, if any.
+    """
+    profiler: Union[cProfile.Profile, None] = g.pop("profiler", None)
+    if profiler is not None:  # if request is still being profiled
+        profiler.disable()  # stop profiling the request
+
+
+level_xp_required: list[int] = [
+    0,
+    1,
+]  # XP required to level up at each level (starting at level 1)
+level_total_xp: list[int] = [
+    0,
+    0,
+]  # total XP required to reach each level from level 1
+level_table_lock = threading.Lock()  # lock to extend level table across threads
+
+
+def next_xp_required(
+    xp_required: float, level: int
+) -> float:  # get XP required for the next level
+    """
+    Get the XP required for the next level.
+    xp_required - the XP required for the current level.
+    level - the current level.
+    """
+    return max(
+        1.0,
+        round(xp_required + max(1.0, xp_required * 1.0 / math.sqrt(level))),
+    )  # increase XP required exponentially with slower growth at higher levels
+
+
+def extend_level_table(
+    total_xp: float, level: int = 0
+) -> None:  # extend level table until it covers the total XP and level
+    """
+    Extend the level table until the total XP required for the highest level exceeds the total XP and the table has the level.
+    total_xp - the total XP the level table needs to cover.
+    level - the level the level table needs to have.
+    """
+    if (
+        level_total_xp[-1] > total_xp and len(level_xp_required) > level
+    ):  # if level table already covers total XP and level
+        return
+    with level_table_lock:
+        while (
+            level_total_xp[-1] <= total_xp or len(level_xp_required) <= level
+        ):  # repeat until total XP and level are covered
+            highest_level: int = (
+                len(level_xp_required) - 1
+            )  # highest level in level table
+            level_total_xp.append(
+                level_total_xp[-1] + level_xp_required[-1]
+            )  # add total XP required to reach the next level
+            level_xp_required.append(
+                next_xp_required(level_xp_required[-1], highest_level)
+            )  # add XP required for the next level
+
+
 class User(db.Model):
     """
     A user model with information to store the level and experience points (XP).
@@ -33,6 +491,9 @@ class User(db.Model):
     )  # user ID
     username: str = db.Column(
         db.String(80), unique=True, nullable=False)  # username
+    password_hash: Union[str, None] = db.Column(
+        db.String(256), nullable=True
+    )  # user password hash, none until the user sets a password
     xp: float = db.Column(
         db.Float, default=0, server_default=text("0"), nullable=False
     )  # user XP
@@ -81,6 +542,27 @@ class User(db.Model):
     rating: float = db.Column(
         db.Float, default=0, server_default="0", nullable=False
     )  # user rating score
+    active_tasks: int = db.Column(
+        db.Integer, default=0, server_default=text("0"), nullable=False
+    )  # number of active tasks (tasks that are not completed)
+    data_version: int = db.Column(
+        db.Integer, default=0, server_default=text("0"), nullable=False
+    )  # number of times user tasks or stats have changed
+    data_modified: Union[datetime, None] = db.Column(
+        db.DateTime, nullable=True
+    )  # user tasks or stats last modified time in UTC
+    agenda_until: Union[date, None] = db.Column(
+        db.Date, nullable=True
+    )  # last date of the precomputed task occurrences, none if not precomputed
+
+    def mark_data_changed(self) -> None:  # mark user data as changed
+        """
+        Increase the data version and set the last modified time after the user tasks or stats change.
+        """
+        self.data_version += 1  # increase data version by 1
+        self.data_modified = datetime.now(timezone.utc).replace(
+            microsecond=0, tzinfo=None
+        )  # set last modified time to current time in UTC
 
     def add_xp(self, amount: float) -> None:  # add XP
         """
@@ -89,28 +571,47 @@ class User(db.Model):
         """
         self.xp += amount  # add XP by amount
         self.total_xp += amount  # add total XP by amount
-        flash(
-            "Task completed! You gained " +
-            short_numeric_filter(amount) + " XP!"
-        )  # display message with the amount of XP earned
-        self.check_level_up()  # check if user has leveled up
+        if has_request_context():  # if not completed by the completion worker
+            flash(
+                "Task completed! You gained " +
+                short_numeric_filter(amount) + " XP!"
+            )  # display message with the amount of XP earned
+        with span("level_up"):
+            self.check_level_up()  # check if user has leveled up
 
     def check_level_up(self) -> None:  # check if user has leveled up
         """
         Check if the user has leveled up.
         """
-        while (
-            self.xp >= self.xp_required
-        ):  # if user XP is greater than or equal to XP required
-            self.xp -= self.xp_required
-            self.xp_required = max(
-                1.0,
-                round(
-                    self.xp_required
-                    + max(1.0, self.xp_required * 1.0 / math.sqrt(self.level))
-                ),
-            )  # increase XP required exponentially with slower growth at higher levels
-            self.level += 1  # increase level
+        extend_level_table(
+            0, self.level
+        )  # make sure the level table has the user level, such as after a restart
+        if (
+            self.xp_required != level_xp_required[self.level]
+        ):  # if XP required doesn't match the level table, such as for old users
+            while (
+                self.xp >= self.xp_required
+            ):  # if user XP is greater than or equal to XP required
+                self.xp -= self.xp_required
+                self.xp_required = next_xp_required(
+                    self.xp_required, self.level
+                )  # increase XP required exponentially with slower growth at higher levels
+                self.level += 1  # increase level
+            return
+        level_total_xp_required: int = level_total_xp[
+            self.level
+        ]  # total XP required to reach the current level
+        extend_level_table(
+            level_total_xp_required + self.xp
+        )  # make sure the level table covers the user XP
+        new_level: int = (
+            bisect_right(level_total_xp, level_total_xp_required + self.xp) - 1
+        )  # get the highest level reachable with user XP
+        self.xp -= (
+            level_total_xp[new_level] - level_total_xp_required
+        )  # subtract XP required for each level gained
+        self.xp_required = level_xp_required[new_level]  # set XP required
+        self.level = new_level  # set level
 
 
 class Task(db.Model):
@@ -153,56 +654,259 @@ class Task(db.Model):
         db.Integer, default=0, server_default=text("0"), nullable=False
     )  # task streak
     completed: bool = db.Column(
-        db.Boolean, default=False, server_default=text("0"), nullable=False
+        db.Boolean, default=False, server_default=false(), nullable=False
     )  # is task completed
     user_id: int = db.Column(
         db.Integer, db.ForeignKey(User.__tablename__ + ".id")
     )  # user ID
     user: Mapped["User"] = db.relationship(
-        "User", backref=db.backref("tasks", lazy=True)
-    )  # user relationship
+        "User", lazy="raise_on_sql", backref=db.backref("tasks", lazy="raise")
+    )  # user relationship, load it with selectinload so task lists don't run a query per task
+    __table_args__ = (
+        db.Index(
+            "ix_task_user_id_completed_due_date", "user_id", "completed", "due_date"
+        ),  # index to get active and overdue tasks for each user
+        db.Index(
+            "ix_task_user_id_due_date", "user_id", "due_date"
+        ),  # index to sort each user's tasks by due date
+    )
+
+
+class TaskRow(NamedTuple):
+    """
+    The task columns shown in the task list, loaded without the bookkeeping of Task objects.
+    """
+
+    id: int  # task ID
+    name: str  # task name
+    due_date: date  # task due date
+    priority: int  # task priority
+    difficulty: int  # task difficulty
+    repeat_interval: int  # task repeat interval
+    repeat_often: int  # task repeat often
+    completed: bool  # is task completed
+
+
+task_row_columns: tuple = tuple(
+    Task.__table__.c[field] for field in TaskRow._fields
+)  # task columns to select for task rows
+
+
+class TaskOccurrence(db.Model):
+    """
+    A task occurrence model with the due date of each upcoming event of a task, used to find the tasks due within a date range.
+    """
+
+    id: int = db.Column(
+        db.Integer, primary_key=True, unique=True, nullable=False
+    )  # task occurrence ID
+    task_id: int = db.Column(
+        db.Integer, db.ForeignKey(Task.__tablename__ + ".id"), nullable=False
+    )  # task ID
+    user_id: int = db.Column(
+        db.Integer, db.ForeignKey(User.__tablename__ + ".id")
+    )  # user ID
+    times_completed: int = db.Column(
+        db.Integer, nullable=False
+    )  # number of times the task is completed before this occurrence
+    due_date: date = db.Column(db.Date, nullable=False)  # occurrence due date
+    __table_args__ = (
+        db.Index(
+            "ix_task_occurrence_user_id_due_date", "user_id", "due_date"
+        ),  # index to get the occurrences due within a date range for each user
+        db.UniqueConstraint(
+            "task_id", "times_completed"
+        ),  # each occurrence of a task is stored once
+    )
+
+
+class CompletionEvent(db.Model):
+    """
+    A completion event model with the task and user values used to score a task completion, appended to the completion log when a task is completed.
+    """
+
+    id: int = db.Column(
+        db.Integer, primary_key=True, unique=True, nullable=False
+    )  # completion event ID, in completion order
+    user_id: int = db.Column(
+        db.Integer, db.ForeignKey(User.__tablename__ + ".id"), nullable=False
+    )  # user ID
+    task_id: int = db.Column(db.Integer, nullable=False)  # completed task ID
+    completed_at: datetime = db.Column(
+        db.DateTime, nullable=False
+    )  # time the task was completed in UTC
+    priority: int = db.Column(db.Integer, nullable=False)  # task priority
+    difficulty: int = db.Column(db.Integer, nullable=False)  # task difficulty
+    repeat_interval: int = db.Column(
+        db.Integer, nullable=False
+    )  # task repeat interval
+    repeat_often: int = db.Column(db.Integer, nullable=False)  # task repeat often
+    times_completed: int = db.Column(
+        db.Integer, nullable=False
+    )  # number of times the task has completed, including this completion
+    task_streak: int = db.Column(
+        db.Integer, nullable=False
+    )  # task streak after this completion
+    due_date: date = db.Column(
+        db.Date, nullable=False
+    )  # task due date after this completion
+    active_tasks: int = db.Column(
+        db.Integer, nullable=False
+    )  # number of active tasks after this completion
+    overdue_task_counts: Union[str, None] = db.Column(
+        db.Text, nullable=True
+    )  # JSON list of overdue tasks for each day of inactivity, none if the user wasn't inactive
+    __table_args__ = (
+        db.Index(
+            "ix_completion_event_user_id", "user_id", "id"
+        ),  # index to read each user's completion log in order
+    )
+
+
+class UserSnapshot(db.Model):
+    """
+    A user snapshot model with the user stats after a completion event, used as the starting point to rebuild user stats from the completion log.
+    """
+
+    id: int = db.Column(
+        db.Integer, primary_key=True, unique=True, nullable=False
+    )  # snapshot ID
+    user_id: int = db.Column(
+        db.Integer, db.ForeignKey(User.__tablename__ + ".id"), nullable=False
+    )  # user ID
+    event_id: int = db.Column(
+        db.Integer, nullable=False
+    )  # ID of the last completion event included, 0 if before the first event
+    xp: float = db.Column(db.Float, nullable=False)  # user XP
+    xp_required: float = db.Column(db.Float, nullable=False)  # user XP required
+    total_xp: float = db.Column(db.Float, nullable=False)  # user total XP
+    level: int = db.Column(db.Integer, nullable=False)  # user level
+    tasks_completed: int = db.Column(
+        db.Integer, nullable=False
+    )  # number of times tasks has completed
+    last_completion_date: date = db.Column(
+        db.Date, nullable=False
+    )  # user last task completion date
+    daily_streak: int = db.Column(db.Integer, nullable=False)  # user daily task streak
+    daily_tasks_completed: int = db.Column(
+        db.Integer, nullable=False
+    )  # user number of tasks completed in a day
+    days_completed: int = db.Column(
+        db.Integer, nullable=False
+    )  # user days completed with tasks
+    combo_multiplier: int = db.Column(
+        db.Integer, nullable=False
+    )  # user XP multiplier for combo
+    last_task_completed: int = db.Column(
+        db.Integer, nullable=False
+    )  # user last task completion ID
+    last_time_clicked: datetime = db.Column(
+        db.DateTime, nullable=False
+    )  # user last time clicked
+    time_multiplier: int = db.Column(
+        db.Integer, nullable=False
+    )  # user time multiplier
+    rating: float = db.Column(db.Float, nullable=False)  # user rating score
+    __table_args__ = (
+        db.Index(
+            "ix_user_snapshot_user_id_event_id", "user_id", "event_id"
+        ),  # index to get the first or latest snapshot of each user
+    )
+
+
+user_stats_columns: tuple[str, ...] = (
+    "xp",
+    "xp_required",
+    "total_xp",
+    "level",
+    "tasks_completed",
+    "last_completion_date",
+    "daily_streak",
+    "daily_tasks_completed",
+    "days_completed",
+    "combo_multiplier",
+    "last_task_completed",
+    "last_time_clicked",
+    "time_multiplier",
+    "rating",
+)  # user columns calculated from the completion log and saved in snapshots
+
+
+class QueuedCompletion(db.Model):
+    """
+    A queued completion model with a task completion waiting to be scored by the completion worker.
+    """
+
+    id: int = db.Column(
+        db.Integer, primary_key=True, unique=True, nullable=False
+    )  # queued completion ID, in queue order
+    user_id: int = db.Column(
+        db.Integer, db.ForeignKey(User.__tablename__ + ".id"), nullable=False
+    )  # user ID
+    task_id: int = db.Column(db.Integer, nullable=False)  # completed task ID
+    completed_at: datetime = db.Column(
+        db.DateTime, nullable=False
+    )  # time the task was completed in UTC
+    failed_at: Union[datetime, None] = db.Column(
+        db.DateTime, nullable=True
+    )  # time scoring the completion failed in UTC, none until it fails
+    __table_args__ = (
+        db.Index(
+            "ix_queued_completion_user_id", "user_id", "id"
+        ),  # index to get queued completions for each user in order
+    )
+
+
+short_numeric_units: tuple[str, ...] = (
+    "",
+    "K",
+    "M",
+    "B",
+    "T",
+    "Qa",
+    "Qi",
+    "Sx",
+    "Sp",
+    "O",
+    "N",
+    "D",
+    "UD",
+    "DD",
+    "TD",
+    "QaD",
+    "QiD",
+    "SxD",
+    "SpD",
+    "OD",
+    "ND",
+    "V",
+)  # units with abbreviations for each power of 1000
 
 
 @app.template_filter("short_numeric")  # short numeric format filter
+@lru_cache(maxsize=1024)  # cache recently formatted values
 def short_numeric_filter(
     value: Union[int, float],
 ) -> str:  # get number in short numeric form with abbreviations
     """
-    Get the abbreviated numeric value.
+    Get the abbreviated numeric value, or scientific notation if the value is too large for the units.
     value - the numeric value to convert.
     """
-    units: list[str] = [
-        "",
-        "K",
-        "M",
-        "B",
-        "T",
-        "Qa",
-        "Qi",
-        "Sx",
-        "Sp",
-        "O",
-        "N",
-        "D",
-        "UD",
-        "DD",
-        "TD",
-        "QaD",
-        "QiD",
-        "SxD",
-        "SpD",
-        "OD",
-        "ND",
-        "V",
-    ]  # list of units with abbreviations
-    exponent = 0
-    mantissa: Union[int, float] = value  # mantissa value from 1 to 999
-    while mantissa >= 1000:  # repeat until mantissa is within 1 to 999
-        mantissa /= 1000
+    if not value >= 1000:  # if value doesn't need an abbreviation
+        return f"{value:.0f}"
+    if math.isinf(value):  # if value is infinite
+        return f"{value:.3g}"
+    exponent: int = int(math.log10(value)) // 3  # get power of 1000
+    mantissa: float = value / 1000**exponent  # mantissa value from 1 to 999
+    if mantissa >= 1000:  # correct rounding error of log10
         exponent += 1
-    return (
-        f"{mantissa:.3g}{units[exponent]}" if value >= 1000 else f"{value:.0f}"
-    )  # print abbreviated numeric output
+        mantissa = value / 1000**exponent
+    elif mantissa < 1:  # correct rounding error of log10
+        exponent -= 1
+        mantissa = value / 1000**exponent
+    if exponent >= len(short_numeric_units):  # if value is too large for units
+        return f"{value:.3g}"  # print scientific notation
+    return f"{mantissa:.3g}{short_numeric_units[exponent]}"  # print abbreviated numeric output
 
 
 app.jinja_env.filters["short_numeric"] = (
@@ -223,21 +927,330 @@ app.jinja_env.filters["round_number_with_commas"] = (
 )
 
 
+class LRUCache:
+    """
+    A thread-safe cache that removes the least recently used item when it is full.
+    """
+
+    def __init__(self, max_size: int) -> None:  # create cache
+        """
+        Create an empty cache.
+        max_size - the maximum number of items in the cache.
+        """
+        self.max_size: int = max_size  # maximum number of items
+        self.items: OrderedDict = OrderedDict()  # cached items by key
+        self.lock = threading.Lock()  # lock to update items across threads
+
+    def get(self, key):  # get cached item
+        """
+        Get the cached item and mark it as recently used, or None if the item is not cached.
+        key - the key of the item.
+        """
+        with self.lock:
+            if key not in self.items:  # if item is not cached
+                return None
+            self.items.move_to_end(key)  # mark item as recently used
+            return self.items[key]
+
+    def set(self, key, value) -> None:  # add item to cache
+        """
+        Add the item to the cache, removing the least recently used item if the cache is full.
+        key - the key of the item.
+        value - the item to cache.
+        """
+        with self.lock:
+            self.items[key] = value
+            self.items.move_to_end(key)  # mark item as recently used
+            while len(self.items) > self.max_size:  # if cache is full
+                self.items.popitem(last=False)  # remove least recently used item
+
+
+task_cache = LRUCache(
+    app.config["TASK_CACHE_SIZE"]
+)  # rendered task list items by task ID and row version
+page_cache = LRUCache(
+    app.config["PAGE_CACHE_SIZE"]
+)  # rendered task list pages by user data version and page
+
+
 @app.route("/")
-def index() -> str:  # get index page template
+def index() -> Response:  # get index page template
     """
-    Return the index page with tasks, users and today's date.
+    Return the index page with a page of tasks, users and today's date, or 304 Not Modified if the browser copy is current.
     """
-    tasks: list = Task.query.order_by(
-        Task.due_date
-    ).all()  # get the list of tasks sorted by due date
-    user: Union[User, None] = User.query.first()  # get first user
+    show_completed: bool = (
+        request.args.get("show_completed") == "1"
+    )  # check if completed tasks are shown
+    after_cursor: Union[tuple[date, int], None] = parse_task_cursor(
+        request.args.get("after")
+    )  # get cursor of the task before the page
+    before_cursor: Union[tuple[date, int], None] = parse_task_cursor(
+        request.args.get("before")
+    )  # get cursor of the task after the page
+    user: Union[User, None] = get_current_user()  # get logged in user
+    if user is None:  # if user is not logged in
+        return redirect(url_for("login"))
     today: str = datetime.now().strftime(
         "%Y-%m-%d"
     )  # get today's date in YYYY-MM-DD format
-    return render_template(
-        "index.html", tasks=tasks, user=user, today=today
-    )  # redirect to index page template
+    etag: str = hashlib.sha1(
+        f"{user.id}:{user.data_version}:{today}:{app.config['TASKS_PER_PAGE']}"
+        f":{request.full_path}".encode()
+    ).hexdigest()  # page changes when user data, date or page changes
+    has_flashes: bool = bool(
+        session.get("_flashes")
+    )  # flashed messages are shown once, so the page can't be cached
+    if not has_flashes and not is_resource_modified(
+        request.environ, etag=etag
+    ):  # if browser copy is current and there are no flashed messages, the ETag includes the date so If-Modified-Since alone is ignored
+        response: Response = make_response("", 304)  # not modified
+        response.set_etag(etag)
+        response.cache_control.no_cache = True  # always check for changes
+        return response
+    page_key: tuple = (
+        user.id,
+        user.data_version,
+        app.config["TASKS_PER_PAGE"],
+        show_completed,
+        after_cursor,
+        before_cursor,
+    )  # rendered task list page changes when user data version changes
+    page: Union[tuple[Markup, Union[str, None], Union[str, None]], None] = (
+        page_cache.get(page_key)
+    )  # get rendered task list page from cache
+    if page is None:  # if task list page is not cached
+        tasks, previous_cursor, next_cursor = get_task_page(
+            user.id,
+            app.config["TASKS_PER_PAGE"],
+            show_completed,
+            after_cursor,
+            before_cursor,
+        )  # get the page of the user's tasks sorted by due date
+        with span("render_tasks"):
+            page = (
+                Markup("").join(render_task_html(task) for task in tasks),
+                previous_cursor,
+                next_cursor,
+            )  # render task list page
+        page_cache.set(page_key, page)  # add task list page to cache
+    tasks_html, previous_cursor, next_cursor = page
+    with span("render"):
+        response = make_response(
+            render_template(
+                "index.html",
+                tasks_html=tasks_html,
+                user=user,
+                today=today,
+                show_completed=show_completed,
+                previous_cursor=previous_cursor,
+                next_cursor=next_cursor,
+            )
+        )  # redirect to index page template
+    if has_flashes:  # if the page shows flashed messages
+        response.cache_control.no_store = True  # don't reuse the messages later
+    else:
+        response.set_etag(etag)
+        response.cache_control.no_cache = True  # always check for changes
+    return response
+
+
+def get_current_user() -> Union[User, None]:  # get logged in user
+    """
+    Get the user logged in to the current session, or None if no user is logged in.
+    """
+    if "user" not in g:  # if user isn't loaded in this request yet
+        user_id: Union[int, None] = session.get("user_id")  # get user ID
+        g.user = (
+            db.session.get(User, user_id) if user_id is not None else None
+        )  # get user by primary key
+    return g.user
+
+
+def lock_user(user: User) -> None:  # lock user row until commit
+    """
+    Lock the user's row until the end of the transaction and reload the user, so concurrent changes to the user's tasks and stats are applied one at a time.
+    Use BEGIN IMMEDIATE on SQLite, which locks the whole database, or SELECT ... FOR UPDATE on other databases.
+    user - the user to lock.
+    """
+    with span("lock"):
+        if db.engine.dialect.name == "sqlite":  # if database is SQLite
+            db.session.rollback()  # end the read transaction, nothing is changed yet
+            db.session.execute(
+                text("BEGIN IMMEDIATE")
+            )  # take the write lock, waiting up to the busy timeout
+        db.session.execute(
+            db.select(User)
+            .where(User.id == user.id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )  # lock and reload the user row
+
+
+@app.route("/login", methods=["GET", "POST"])
+def login() -> Union[Response, str]:  # log in or sign up
+    """
+    Show the login page, or log in the user with the username and password, or create a new user if signing up.
+    """
+    if request.method == "GET":  # if showing the login page
+        return render_template("login.html")
+    username: str = request.form.get("username", "").strip()  # get username
+    password: str = request.form.get("password", "")  # get password
+    sign_up: bool = request.form.get("action") == "sign_up"  # is user signing up
+    if not username or len(username) > 80 or not password:  # if form is invalid
+        flash("Enter a username (up to 80 characters) and a password.")
+        return redirect(url_for("login"))
+    user: Union[User, None] = User.query.filter(
+        User.username == username
+    ).first()  # get user by username
+    created: bool = False  # is the user new
+    if sign_up and user is not None:  # if username is taken
+        flash("Username is taken, choose another username.")
+        return redirect(url_for("login"))
+    if sign_up:  # if username is new
+        user = User(
+            username=username,
+            password_hash=generate_password_hash(password),
+            xp=0,
+            xp_required=1,
+            total_xp=0,
+            level=1,
+            tasks_completed=0,
+            last_completion_date=func.current_date(),
+            daily_streak=0,
+            daily_tasks_completed=0,
+            days_completed=0,
+            combo_multiplier=0,
+            last_task_completed=-1,
+            last_time_clicked=func.current_timestamp(),
+            time_multiplier=1,
+            rating=0,
+            active_tasks=0,
+            data_version=0,
+        )  # create new user
+        db.session.add(user)  # add new user to the database
+        created = True  # user stats need a first snapshot
+    elif (
+        user is None
+        or user.password_hash is None
+        or not check_password_hash(user.password_hash, password)
+    ):  # if user doesn't exist, was created before passwords and has no password set yet, or password is wrong
+        flash("Wrong username or password.")
+        return redirect(url_for("login"))
+    try:
+        if created:  # if user is new
+            db.session.flush()  # get the new user ID and stats
+            db.session.execute(
+                insert(UserSnapshot), [get_user_snapshot(user, 0)]
+            )  # save user stats before the first completion
+        db.session.commit()  # commit database changes
+    except IntegrityError:  # if another request created the user first
+        db.session.rollback()
+        flash("Username is taken, choose another username.")
+        return redirect(url_for("login"))
+    session.clear()  # start a new session
+    session["user_id"] = user.id  # log in the user
+    return redirect(url_for("index"))  # redirect to index page template
+
+
+@app.route("/logout")
+def logout() -> Response:  # log out
+    """
+    Log out the user of the current session.
+    """
+    session.clear()  # end the session
+    return redirect(url_for("login"))  # redirect to login page
+
+
+def parse_task_cursor(
+    cursor: Union[str, None],
+) -> Union[tuple[date, int], None]:  # get task due date and ID from cursor
+    """
+    Get the task due date and task ID from the page cursor.
+    cursor - the page cursor in YYYY-MM-DD_ID format.
+    """
+    if not cursor:  # if there is no cursor
+        return None
+    try:
+        due_date, task_id = cursor.split("_")  # split due date and task ID
+        return datetime.strptime(due_date, "%Y-%m-%d").date(), int(task_id)
+    except ValueError:  # if cursor is invalid, show the first page
+        return None
+
+
+def format_task_cursor(
+    task: Union[Task, TaskRow],
+) -> str:  # get page cursor from task
+    """
+    Get the page cursor from the task due date and task ID.
+    task - the task to get the page cursor.
+    """
+    return f"{task.due_date:%Y-%m-%d}_{task.id}"
+
+
+def get_task_page(
+    user_id: int,
+    page_size: int,
+    show_completed: bool,
+    after_cursor: Union[tuple[date, int], None] = None,
+    before_cursor: Union[tuple[date, int], None] = None,
+) -> tuple[list, Union[str, None], Union[str, None]]:  # get page of tasks
+    """
+    Get a page of the user's tasks sorted by due date and task ID using keyset pagination.
+    user_id - the ID of the user that owns the tasks.
+    page_size - the maximum number of tasks in the page.
+    show_completed - whether to include completed tasks.
+    after_cursor - the due date and task ID of the task before the page.
+    before_cursor - the due date and task ID of the task after the page.
+    Return the task rows, the previous page cursor and the next page cursor.
+    """
+    query = db.select(*task_row_columns).where(
+        Task.user_id == user_id
+    )  # get the displayed columns of the user's tasks
+    if not show_completed:  # if completed tasks are hidden
+        query = query.where(Task.completed.is_(False))
+    if before_cursor is not None:  # if getting the previous page
+        due_date, task_id = before_cursor
+        tasks: list[TaskRow] = [
+            TaskRow._make(row)
+            for row in db.session.execute(
+                query.where(
+                    or_(
+                        Task.due_date < due_date,
+                        and_(Task.due_date == due_date, Task.id < task_id),
+                    )
+                )
+                .order_by(Task.due_date.desc(), Task.id.desc())
+                .limit(page_size + 1)
+            )
+        ]  # get tasks before the cursor in reverse order
+        has_previous: bool = len(tasks) > page_size  # check if there are more tasks
+        tasks = tasks[:page_size][::-1]  # sort tasks by due date
+        has_next: bool = True  # the task at the cursor is on the next page
+    else:
+        if after_cursor is not None:  # if getting the next page
+            due_date, task_id = after_cursor
+            query = query.where(
+                or_(
+                    Task.due_date > due_date,
+                    and_(Task.due_date == due_date, Task.id > task_id),
+                )
+            )  # get tasks after the cursor
+        tasks = [
+            TaskRow._make(row)
+            for row in db.session.execute(
+                query.order_by(Task.due_date, Task.id).limit(page_size + 1)
+            )
+        ]  # get tasks after the cursor
+        has_next = len(tasks) > page_size  # check if there are more tasks
+        tasks = tasks[:page_size]
+        has_previous = (
+            after_cursor is not None
+        )  # the task at the cursor is on the previous page
+    return (
+        tasks,
+        format_task_cursor(tasks[0]) if has_previous and tasks else None,
+        format_task_cursor(tasks[-1]) if has_next and tasks else None,
+    )
 
 
 @app.route("/add", methods=["POST"])
@@ -245,271 +1258,1607 @@ def add_task() -> Response:  # add the task to the task list
     """
     Add a new task to the task list.
     """
-    name: str = request.form.get("name")  # get name from request form
-    due_date: str = request.form.get("due_date")  # get due date
-    priority = int(request.form.get("priority"))  # get priority
-    difficulty = int(request.form.get("difficulty"))  # get difficulty
-    repeat_interval = int(
-        request.form.get("repeat_interval")
-    )  # get task repeat interval
-    repeat_often = int(request.form.get("repeat_often")
-                       )  # get task repeat often
-    user: Union[User, None] = User.query.first()  # get first user
-    if user is not None:  # if user exists
-        new_task = Task(
-            name=name,
-            user_id=user.id,
-            priority=priority,
-            difficulty=difficulty,
-            repeat_interval=repeat_interval,
-            repeat_often=repeat_often,
-            original_due_date=datetime.strptime(due_date, "%Y-%m-%d").date(),
-            due_date=datetime.strptime(due_date, "%Y-%m-%d").date(),
-        )  # create the new task with input parameters
-        db.session.add(new_task)  # add the new task to task list
-        db.session.commit()  # commit database changes
+    user: Union[User, None] = get_current_user()  # get logged in user
+    if user is None:  # if user is not logged in
+        return redirect(url_for("login"))
+    try:
+        create_task(request.form, user)  # create the task from request form
+    except ValueError as error:  # if the form is invalid
+        flash(str(error))
     return redirect(url_for("index"))  # redirect to index page template
 
 
+def create_task(form, user: User) -> Task:  # create task from form data
+    """
+    Create a new task from the form data and add it to the user's task list.
+    form - the form data with the task name, due date, priority, difficulty, repeat interval and repeat often.
+    user - the user that owns the task.
+    Raise ValueError if a value is missing or invalid.
+    Return the new task.
+    """
+    for column in (
+        "name",
+        "due_date",
+        "priority",
+        "difficulty",
+        "repeat_interval",
+        "repeat_often",
+    ):  # repeat for each task form field
+        if form.get(column) in (None, ""):  # if value is missing
+            raise ValueError(f"{column} is required")
+    values: dict = validate_task_row(form, user.id)  # get task column values
+    lock_user(user)  # apply concurrent task changes one at a time
+    new_task = Task(**values)  # create the new task with input parameters
+    db.session.add(new_task)  # add the new task to task list
+    if user.agenda_until is not None:  # if task occurrences are precomputed
+        db.session.flush()  # get the new task ID
+        add_task_occurrences(
+            new_task, user.agenda_until
+        )  # precompute the new task occurrences
+    user.active_tasks += 1  # increase the number of active tasks by 1
+    user.mark_data_changed()  # task list has changed
+    db.session.commit()  # commit database changes
+    return new_task
+
+
 @app.route("/complete_task/<int:task_id>")
 def complete_task(task_id) -> Response:  # complete task from task ID
     """
     Complete the task with the given task ID.
     task_id - the ID of the task to complete.
     """
-    task: Union[Task, None] = Task.query.get(task_id)  # get task by task ID
-    if task is not None:  # if task exists
-        due_multiplier: float = 1.0  # set default due multiplier to 1
-        if task.repeat_often == 5:  # if the task is a one-time task
-            task.completed = True  # complete the task
-        else:  # if task is repeatable
-            task.times_completed += 1  # increase times task completed by 1
-            task.due_date = calculate_next_recurring_event(
-                task.original_due_date,
-                task.times_completed,
-                task.repeat_interval,
-                task.repeat_often,
-            )  # calculate the next task due date
-            days_to_due: int = (
-                task.due_date - date.today()
-            ).days  # calculate the number of days until the task is due
-            if days_to_due > 0:  # if task due date is after today
-                due_multiplier: float = 1 + 1 / (
-                    max(1, days_to_due + 1)
-                )  # set due multiplier that increases over time when the task is closer to due date
-            elif (
-                days_to_due < 0
-            ):  # if the task is overdue (current date is after task due date)
-                due_multiplier = -2 / (
-                    min(-1, days_to_due - 1)
-                )  # set due multiplier that decreases over time when the task is overdue
-            elif days_to_due == 0:  # if task due date is today
-                next_midnight: datetime = datetime.combine(
-                    datetime.now().date() + timedelta(days=1), datetime.min.time()
-                )  # time at next midnight from now
-                due_multiplier = 4 / (
-                    1 + (next_midnight - datetime.now()) / timedelta(days=1)
-                )  # set due multiplier to 2 and increases over time to 4 at midnight
-            if (
-                date.today() > task.due_date
-            ):  # check if the task is overdue (current date is after task due date)
-                task.streak = 0  # reset streak to 0
-            else:
-                task.streak += 1  # increase streak by 1
-        if task.repeat_often == 1:  # if the task repetition interval is daily
-            if task.repeat_interval < 7:  # 7 days is 1 week
-                repeat_multiplier: float = 1 + (task.repeat_interval - 1) / (
-                    7 - 1
-                )  # 1x XP multiplier for daily tasks (1 day) to 2x XP multiplier for weekly tasks (7 days)
-            elif task.repeat_interval < 30:  # approximately 30 days is 1 month
-                repeat_multiplier = 2 + (task.repeat_interval - 7) / (
-                    30 - 7
-                )  # 2x XP multiplier for weekly tasks (7 days) to 3x XP multiplier for monthly tasks (approximately 30 days)
-            elif task.repeat_interval < 365:  # approximately 365 days is 1 year
-                repeat_multiplier = 3 + (task.repeat_interval - 30) / (
-                    365 - 30
-                )  # 3x XP multiplier for monthly tasks (approximately 30 days) to 4x XP multiplier for yearly tasks (approximately 365 days)
-            else:
-                repeat_multiplier = (
-                    5 - 365 / task.repeat_interval
-                )  # 4x XP multiplier for yearly tasks (approximately 365 days) to 5x XP multiplier for one-time tasks
-        elif task.repeat_often == 2:  # if the task repetition interval is weekly
-            if task.repeat_interval < 4:  # approximately 4 weeks is 1 month
-                repeat_multiplier = 2 + (task.repeat_interval - 1) / (
-                    4 - 1
-                )  # 2x XP multiplier for weekly tasks (1 week) to 3x XP multiplier for monthly tasks (approximately 4 weeks)
-            elif task.repeat_interval < 52:  # approximately 52 weeks is 1 year
-                repeat_multiplier = 3 + (task.repeat_interval - 4) / (
-                    52 - 4
-                )  # 3x XP multiplier for monthly tasks (approximately 4 weeks) to 4x XP multiplier for yearly tasks (approximately 52 weeks)
-            else:
-                repeat_multiplier = (
-                    5 - 52 / task.repeat_interval
-                )  # 4x XP multiplier for yearly tasks (approximately 52 weeks) to 5x XP multiplier for one-time tasks
-        elif task.repeat_often == 3:  # if the task repetition interval is monthly
-            if task.repeat_interval < 12:  # 12 months is 1 year
-                repeat_multiplier = 3 + (task.repeat_interval - 1) / (
-                    12 - 1
-                )  # 3x XP multiplier for monthly tasks (1 month) to 4x XP multiplier for yearly tasks (12 months)
-            else:
-                repeat_multiplier = (
-                    5 - 12 / task.repeat_interval
-                )  # 4x XP multiplier for yearly tasks (12 months) to 5x XP multiplier for one-time tasks
-        elif task.repeat_often == 4:  # if the task repetition interval is yearly
-            repeat_multiplier = (
-                5 - 1 / task.repeat_interval
-            )  # 4x XP multiplier for yearly tasks (1 year) to 5x XP multiplier for one-time tasks
-        else:  # if the task repetition interval is one-time
-            repeat_multiplier = 5  # get 5x XP multiplier for one-time tasks
-        user: Union[User, None] = User.query.first()  # get first user
-        active_tasks: int = Task.query.filter_by(
-            completed=False
-        ).count()  # get number of active tasks (tasks that are not completed)
-        if user is not None:  # if user exists
-            user.tasks_completed += 1  # increase the number of tasks completed by 1
-            day_difference: timedelta = datetime.now() - datetime(
-                user.last_completion_date.year,
-                user.last_completion_date.month,
-                user.last_completion_date.day,
-            )  # calculate difference in days
-            if day_difference.days == 1:  # if a new day has passed
-                user.daily_streak += 1  # increase the daily streak by 1
-                user.daily_tasks_completed = (
-                    1  # reset the number of tasks completed in a day to 1
-                )
-                user.days_completed += 1  # increase days completed by 1
-            elif day_difference.days > 1:  # if more than a day has passed
-                user.daily_streak = 1  # reset the daily streak to 1
-                user.daily_tasks_completed = (
-                    1  # reset the number of tasks completed in a day to 1
-                )
-                user.days_completed += 1  # increase days completed by 1
-            else:
-                user.daily_tasks_completed += (
-                    1  # increase the number of tasks completed in a day by 1
-                )
-            if (
-                task.id == user.last_task_completed
-            ):  # if the task is the last task completed
-                user.combo_multiplier += 1  # increase combo multipler by 1
-            else:
-                user.combo_multiplier = 0  # reset combo multiplier to 0
-            if day_difference.days >= 1:  # check if at least 1 day of inactivity
-                for i in range(
-                    day_difference.days
-                ):  # repeat for each day of inactivity
-                    inactivity_date: datetime = datetime.combine(
-                        user.last_completion_date, datetime.min.time()
-                    ) + timedelta(days=i)
-                    overdue_tasks: int = Task.query.filter(
-                        Task.due_date < inactivity_date.date()
-                    ).count()  # get number of overdue tasks (due date is before today)
-                    user.rating -= max(
-                        (
-                            math.sqrt(max(user.rating, 0))
-                            * (1 + math.log(max(i + 1, 1)))
-                            * (1 + math.log(max(overdue_tasks + 1, 1)))
-                        ),
-                        0,
-                    )  # decrease the user rating score for each day of inactivity
-                    user.rating = max(
-                        user.rating, 0
-                    )  # make sure the user rating score is not below 0
-            user.last_completion_date = (
-                datetime.now()
-            )  # set user last completion date to today
-            user.last_task_completed = (
-                task.id
-            )  # set user last task completed to task ID
-            current_time: datetime = datetime.now(
-                timezone.utc)  # get current time
-            last_time_clicked_aware: datetime = user.last_time_clicked.replace(
-                tzinfo=timezone.utc
-            )  # set timezone to UTC
-            time_difference: timedelta = (
-                current_time - last_time_clicked_aware
-            )  # get time difference
-            time_difference_seconds: float = (
-                time_difference.total_seconds()
-            )  # get time difference in seconds
-            if (
-                abs(time_difference_seconds) < 5
-            ):  # check if time difference is less than 5 seconds
-                user.time_multiplier += 1  # increase time multiplier
-            else:
-                user.time_multiplier = (
-                    1  # reset time multiplier if time difference is more than 5 seconds
-                )
-            user.last_time_clicked = (
-                current_time  # set last time clicked to current time
-            )
-            user.rating += max(
-                (10 + math.log(max(user.rating + 100, 100)) ** 2)
-                * repeat_multiplier
-                * ((1 - due_multiplier) if due_multiplier < 1 else (due_multiplier - 1))
-                / max(user.daily_tasks_completed, 1),
-                0,
-            )  # increase user rating score based on user rating, task repeat multiplier and number of tasks completed today
-            user.rating = max(
-                user.rating, 0
-            )  # make sure the user rating score is not below 0
-            user.add_xp(
-                round(
-                    (
-                        task.priority
-                        * task.difficulty
-                        * task.repeat_often
-                        * repeat_multiplier
-                        * (1 + math.log(max(task.times_completed, 1)))
-                        * (1 + math.log(max(user.tasks_completed, 1)))
-                        * (1 + math.log(max(active_tasks, 1)))
-                        * (1 + user.daily_streak / 10)
-                        * (1 + user.daily_tasks_completed / 10)
-                        * (1 + math.log(max(user.days_completed, 1)))
-                        * (1 + task.streak / 10)
-                        * due_multiplier
-                        * (1 + user.combo_multiplier / 10)
-                        * user.time_multiplier
-                        * (1 + 5.0 / (abs(time_difference_seconds) + 1.0))
-                        + user.combo_multiplier
-                    )
-                    * (1 + math.log(max(user.rating + 1, 1)))
-                )
-            )  # add XP based on task and user statistics
-            db.session.commit()  # commit database changes
+    user: Union[User, None] = get_current_user()  # get logged in user
+    if user is None:  # if user is not logged in
+        return redirect(url_for("login"))
+    if app.config["COMPLETION_QUEUE"]:  # if completions are scored by the worker
+        try:
+            if queue_task_completion(task_id, user):  # queue the completion
+                flash("Task completion queued.")
+            else:  # if task doesn't exist
+                flash("Task not found")
+        except ValueError as error:  # if task can't be scored
+            flash(str(error))
+    else:
+        try:
+            complete_task_by_id(task_id, user)  # complete the task
+        except ValueError as error:  # if task can't be scored
+            flash(str(error))
     return redirect(url_for("index"))  # redirect to index page template
 
 
-@app.route("/delete_task/<int:task_id>")
-def delete_task(task_id) -> Response:  # delete task from task ID
+def complete_task_by_id(
+    task_id: int, user: User, completed_at: Union[datetime, None] = None
+) -> tuple[Union[Task, None], float]:  # complete task from task ID
     """
-    Delete the task based on the task ID.
-    task_id - the ID of the task to delete.
+    Complete the user's task with the given task ID and add XP to the user, locking the user so concurrent completions don't lose updates.
+    task_id - the ID of the task to complete.
+    user - the user that owns the task.
+    completed_at - the time the task was completed in UTC, now by default.
+    Return the completed task and the XP gained, or None and 0 if the user doesn't have the task.
     """
-    task: Union[Task, None] = Task.query.get(task_id)  # get task by task ID
-    if task is not None:  # if task exists
-        db.session.delete(task)  # delete task from task list
+    lock_user(user)  # apply concurrent completions one at a time
+    task: Union[Task, None] = Task.query.filter(
+        Task.id == task_id, Task.user_id == user.id
+    ).first()  # get the user's task by task ID
+    if task is None:  # if task doesn't exist
+        db.session.rollback()  # release the lock
+        return None, 0.0
+    try:
+        xp_gained: float = apply_task_completion(
+            task, user, completed_at or datetime.now(timezone.utc)
+        )  # complete the task
+    except ValueError:  # if task can't be scored
+        db.session.rollback()  # release the lock
+        raise
+    with span("commit"):
         db.session.commit()  # commit database changes
-    return redirect(url_for("index"))  # redirect to index page template
+    return task, xp_gained
 
 
-def calculate_next_recurring_event(
-    original_date: date, times_completed: int, repeat_interval: int, repeat_often: int
-) -> date:  # calculate the next recurring event date
+def check_task_can_be_scored(
+    repeat_interval: int, repeat_often: int
+) -> None:  # check that task completions can be scored
     """
-    Calculate the next recurring event date based on the original date, times completed, repeat interval, and repeat often.
-    original_date - the original date of the recurring event.
-    times_completed - the number of times the recurring event has been completed.
-    repeat_interval - the interval at which the recurring event repeats.
-    repeat_often - the frequency at which the recurring event repeats.
+    Check that completions of the task can be scored, whether they are scored right away or queued.
+    repeat_interval - the interval at which the task repeats.
+    repeat_often - the frequency at which the task repeats.
+    Raise ValueError if the task repeats with an interval below 1, which can't be scored or moved to its next due date.
     """
-    if repeat_often == 1:  # if task repeat often is daily
-        return original_date + timedelta(
-            days=repeat_interval * times_completed
-        )  # add days to the original date
-    elif repeat_often == 2:  # if task repeat often is weekly
-        return original_date + timedelta(
-            weeks=repeat_interval * times_completed
+    if repeat_often != 5 and repeat_interval < 1:  # if recurring task has no interval
+        raise ValueError("Task repeat interval must be at least 1")
+
+
+def apply_task_completion(
+    task: Task, user: User, completed_at: datetime
+) -> float:  # complete task at the completion time
+    """
+    Complete the task, add the completion to the completion log and add XP to the user as of the completion time, without committing the changes.
+    task - the task to complete.
+    user - the user that owns the task, locked using lock_user.
+    completed_at - the time the task was completed in UTC.
+    Raise ValueError if the task can't be scored, before changing anything.
+    Return the XP gained.
+    """
+    check_task_can_be_scored(
+        task.repeat_interval, task.repeat_often
+    )  # same check as when queuing the completion
+    today: date = (
+        completed_at.astimezone().date()
+    )  # get completion date in local time
+    if task.repeat_often == 5:  # if the task is a one-time task
+        if not task.completed:  # if one-time task is no longer active
+            user.active_tasks -= 1  # decrease the number of active tasks by 1
+        task.completed = True  # complete the task
+    else:  # if task is repeatable
+        task.times_completed += 1  # increase times task completed by 1
+        task.due_date = calculate_next_recurring_event(
+            task.original_due_date,
+            task.times_completed,
+            task.repeat_interval,
+            task.repeat_often,
+        )  # calculate the next task due date
+        if (
+            today > task.due_date
+        ):  # check if the task is overdue (current date is after task due date)
+            task.streak = 0  # reset streak to 0
+        else:
+            task.streak += 1  # increase streak by 1
+    remove_completed_task_occurrences(task)  # the completed occurrence is done
+    inactive_days: int = (
+        today - user.last_completion_date
+    ).days  # number of days since the last completion
+    overdue_task_counts: Union[str, None] = (
+        None  # overdue task counts are needed to decay the rating
+    )
+    if inactive_days >= 1:  # if the rating decays
+        with span("decay"):
+            overdue_task_counts = json.dumps(
+                get_overdue_task_counts(
+                    user.id, user.last_completion_date, inactive_days
+                )
+            )  # count overdue tasks on each inactive day
+    event = CompletionEvent(
+        user_id=user.id,
+        task_id=task.id,
+        completed_at=completed_at.astimezone(timezone.utc).replace(tzinfo=None),
+        priority=task.priority,
+        difficulty=task.difficulty,
+        repeat_interval=task.repeat_interval,
+        repeat_often=task.repeat_often,
+        times_completed=task.times_completed,
+        task_streak=task.streak,
+        due_date=task.due_date,
+        active_tasks=user.active_tasks,
+        overdue_task_counts=overdue_task_counts,
+    )  # completion with the task and user values used to score it
+    db.session.add(event)  # add completion to the completion log
+    user.mark_data_changed()  # task list and user stats have changed
+    with span("score"):
+        xp_gained: float = update_user_stats(user, event)  # score the completion
+    if (
+        user.tasks_completed % app.config["STATS_SNAPSHOT_INTERVAL"] == 0
+    ):  # if a snapshot is due
+        db.session.flush()  # get the completion event ID
+        db.session.execute(
+            insert(UserSnapshot), [get_user_snapshot(user, event.id)]
+        )  # save user stats after the completion
+    return xp_gained
+
+
+def get_user_snapshot(
+    user: User, event_id: int
+) -> dict:  # get user stats to save in a snapshot
+    """
+    Get the user snapshot column values from the user stats.
+    user - the user to save.
+    event_id - the ID of the last completion event included in the user stats.
+    """
+    snapshot: dict = {
+        column: getattr(user, column) for column in user_stats_columns
+    }  # user stats calculated from the completion log
+    snapshot["user_id"] = user.id
+    snapshot["event_id"] = event_id
+    return snapshot
+
+
+def update_user_stats(
+    user: User, event
+) -> float:  # score a completion from the completion log
+    """
+    Update the user stats and add XP for a completion in the completion log, used to score new completions and to rebuild user stats from the log.
+    user - the user, or a user that isn't in the database when rebuilding user stats.
+    event - the completion event, or a row with the completion event columns.
+    Return the XP gained.
+    """
+    completed_at: datetime = event.completed_at.replace(
+        tzinfo=timezone.utc
+    )  # get completion time in UTC
+    now: datetime = completed_at.astimezone().replace(
+        tzinfo=None
+    )  # get completion time in local time
+    total_xp: float = user.total_xp  # get user total XP before completing the task
+    due_multiplier: float = (
+        1.0
+        if event.repeat_often == 5
+        else calculate_due_multiplier((event.due_date - now.date()).days, now)
+    )  # calculate due multiplier from the number of days until the task is due
+    repeat_multiplier: float = calculate_repeat_multiplier(
+        event.repeat_interval, event.repeat_often
+    )  # calculate repeat multiplier from task repetition interval
+    user.tasks_completed += 1  # increase the number of tasks completed by 1
+    day_difference: timedelta = now - datetime(
+        user.last_completion_date.year,
+        user.last_completion_date.month,
+        user.last_completion_date.day,
+    )  # calculate difference in days
+    if day_difference.days == 1:  # if a new day has passed
+        user.daily_streak += 1  # increase the daily streak by 1
+        user.daily_tasks_completed = (
+            1  # reset the number of tasks completed in a day to 1
+        )
+        user.days_completed += 1  # increase days completed by 1
+    elif day_difference.days > 1:  # if more than a day has passed
+        user.daily_streak = 1  # reset the daily streak to 1
+        user.daily_tasks_completed = (
+            1  # reset the number of tasks completed in a day to 1
+        )
+        user.days_completed += 1  # increase days completed by 1
+    else:
+        user.daily_tasks_completed += (
+            1  # increase the number of tasks completed in a day by 1
+        )
+    if (
+        event.task_id == user.last_task_completed
+    ):  # if the task is the last task completed
+        user.combo_multiplier += 1  # increase combo multipler by 1
+    else:
+        user.combo_multiplier = 0  # reset combo multiplier to 0
+    if day_difference.days >= 1:  # check if at least 1 day of inactivity
+        with span("decay"):
+            user.rating = calculate_inactivity_rating_decay(
+                user.rating,
+                json.loads(event.overdue_task_counts or "[]"),
+            )  # decrease the user rating score for each day of inactivity
+    user.last_completion_date = now.date()  # set user last completion date to today
+    user.last_task_completed = (
+        event.task_id
+    )  # set user last task completed to task ID
+    last_time_clicked_aware: datetime = user.last_time_clicked.replace(
+        tzinfo=timezone.utc
+    )  # set timezone to UTC
+    time_difference: timedelta = (
+        completed_at - last_time_clicked_aware
+    )  # get time difference
+    time_difference_seconds: float = (
+        time_difference.total_seconds()
+    )  # get time difference in seconds
+    if (
+        abs(time_difference_seconds) < 5
+    ):  # check if time difference is less than 5 seconds
+        user.time_multiplier += 1  # increase time multiplier
+    else:
+        user.time_multiplier = (
+            1  # reset time multiplier if time difference is more than 5 seconds
+        )
+    user.last_time_clicked = completed_at.replace(
+        tzinfo=None
+    )  # set last time clicked to completion time in UTC
+    user.rating = calculate_completion_rating(
+        user.rating,
+        repeat_multiplier,
+        due_multiplier,
+        user.daily_tasks_completed,
+    )  # increase user rating score based on user rating, task repeat multiplier and number of tasks completed today
+    user.add_xp(
+        calculate_completion_xp(
+            priority=event.priority,
+            difficulty=event.difficulty,
+            repeat_often=event.repeat_often,
+            repeat_multiplier=repeat_multiplier,
+            times_completed=event.times_completed,
+            task_streak=event.task_streak,
+            due_multiplier=due_multiplier,
+            tasks_completed=user.tasks_completed,
+            active_tasks=event.active_tasks,
+            daily_streak=user.daily_streak,
+            daily_tasks_completed=user.daily_tasks_completed,
+            days_completed=user.days_completed,
+            combo_multiplier=user.combo_multiplier,
+            time_multiplier=user.time_multiplier,
+            time_difference_seconds=time_difference_seconds,
+            rating=user.rating,
+        )
+    )  # add XP based on task and user statistics
+    return user.total_xp - total_xp
+
+
+@app.route("/delete_task/<int:task_id>")
+def delete_task(task_id) -> Response:  # delete task from task ID
+    """
+    Delete the task based on the task ID.
+    task_id - the ID of the task to delete.
+    """
+    user: Union[User, None] = get_current_user()  # get logged in user
+    if user is None:  # if user is not logged in
+        return redirect(url_for("login"))
+    delete_task_by_id(task_id, user)  # delete the task
+    return redirect(url_for("index"))  # redirect to index page template
+
+
+def delete_task_by_id(task_id: int, user: User) -> bool:  # delete task from task ID
+    """
+    Delete the user's task based on the task ID.
+    task_id - the ID of the task to delete.
+    user - the user that owns the task.
+    Return True if the task is deleted, or False if the user doesn't have the task.
+    """
+    lock_user(user)  # apply concurrent task changes one at a time
+    task: Union[Task, None] = Task.query.filter(
+        Task.id == task_id, Task.user_id == user.id
+    ).first()  # get the user's task by task ID
+    if task is not None:  # if task exists
+        if not task.completed:  # if task is active
+            user.active_tasks -= 1  # decrease the number of active tasks by 1
+        user.mark_data_changed()  # task list has changed
+        TaskOccurrence.query.filter(TaskOccurrence.task_id == task.id).delete(
+            synchronize_session=False
+        )  # delete task occurrences
+        db.session.delete(task)  # delete task from task list
+        db.session.commit()  # commit database changes
+        return True
+    db.session.rollback()  # release the lock
+    return False
+
+
+@app.route("/api/add", methods=["POST"])
+def api_add_task() -> tuple[Response, int]:  # add the task using JSON API
+    """
+    Add a new task to the task list and return the new task as JSON.
+    """
+    user: Union[User, None] = get_current_user()  # get logged in user
+    if user is None:  # if user is not logged in
+        return jsonify(error="Not logged in"), 401
+    try:
+        task: Task = create_task(
+            request.get_json(silent=True) or request.form, user
+        )  # create the task from JSON or form data
+    except ValueError as error:  # if a value is missing or invalid
+        return jsonify(error=str(error)), 400
+    return (
+        jsonify(task=task_to_dict(task), html=render_task_html(task)),
+        201,
+    )  # return the new task
+
+
+@app.route("/api/complete_task/<int:task_id>", methods=["POST"])
+def api_complete_task(
+    task_id: int,
+) -> tuple[Response, int]:  # complete task using JSON API
+    """
+    Complete the task with the given task ID and return the XP gained, user stats and task as JSON.
+    task_id - the ID of the task to complete.
+    """
+    user: Union[User, None] = get_current_user()  # get logged in user
+    if user is None:  # if user is not logged in
+        return jsonify(error="Not logged in"), 401
+    if app.config["COMPLETION_QUEUE"]:  # if completions are scored by the worker
+        try:
+            if not queue_task_completion(task_id, user):  # if task doesn't exist
+                return jsonify(error="Task not found"), 404
+        except ValueError as error:  # if task can't be scored
+            return jsonify(error=str(error)), 400
+        return (
+            jsonify(queued=task_id, messages=["Task completion queued."]),
+            202,
+        )  # completion is scored by the completion worker
+    try:
+        task, xp_gained = complete_task_by_id(task_id, user)  # complete the task
+    except ValueError as error:  # if task can't be scored
+        return jsonify(error=str(error)), 400
+    if task is None:  # if task doesn't exist
+        return jsonify(error="Task not found"), 404
+    return (
+        jsonify(
+            xp_gained=xp_gained,
+            user=user_to_dict(user),
+            task=task_to_dict(task),
+            html=render_task_html(task),
+            messages=get_flashed_messages(),
+        ),
+        200,
+    )  # return XP gained, user stats and completed task
+
+
+@app.route("/api/delete_task/<int:task_id>", methods=["POST"])
+def api_delete_task(
+    task_id: int,
+) -> tuple[Response, int]:  # delete task using JSON API
+    """
+    Delete the task based on the task ID and return the deleted task ID as JSON.
+    task_id - the ID of the task to delete.
+    """
+    user: Union[User, None] = get_current_user()  # get logged in user
+    if user is None:  # if user is not logged in
+        return jsonify(error="Not logged in"), 401
+    if not delete_task_by_id(task_id, user):  # if task doesn't exist
+        return jsonify(error="Task not found"), 404
+    return jsonify(deleted=task_id), 200  # return deleted task ID
+
+
+def task_to_dict(task: Task) -> dict:  # get task data for JSON API
+    """
+    Get the task data as a dictionary for the JSON API.
+    task - the task to convert.
+    """
+    return {
+        "id": task.id,
+        "name": task.name,
+        "original_due_date": task.original_due_date.isoformat(),
+        "due_date": task.due_date.isoformat(),
+        "priority": task.priority,
+        "difficulty": task.difficulty,
+        "repeat_interval": task.repeat_interval,
+        "repeat_often": task.repeat_often,
+        "times_completed": task.times_completed,
+        "streak": task.streak,
+        "completed": task.completed,
+        "cursor": format_task_cursor(task),
+    }
+
+
+def user_to_dict(user: User) -> dict:  # get user stats for JSON API
+    """
+    Get the user stats as a dictionary for the JSON API, including formatted values to display.
+    user - the user to convert.
+    """
+    return {
+        "username": user.username,
+        "level": user.level,
+        "xp": user.xp,
+        "xp_required": user.xp_required,
+        "total_xp": user.total_xp,
+        "rating": user.rating,
+        "formatted": {
+            "xp": short_numeric_filter(user.xp),
+            "xp_required": short_numeric_filter(user.xp_required),
+            "total_xp": short_numeric_filter(user.total_xp),
+            "rating": round_number_with_commas_filter(user.rating),
+            "progress": short_numeric_filter(user.xp / user.xp_required * 100),
+        },
+    }
+
+
+priority_labels: dict[int, str] = {
+    1: "Low",
+    2: "Medium",
+    3: "High",
+}  # task priority names
+difficulty_labels: dict[int, str] = {
+    1: "Easy",
+    2: "Medium",
+    3: "Hard",
+}  # task difficulty names
+repeat_often_labels: dict[int, tuple[str, str]] = {
+    1: ("Day", "Days"),
+    2: ("Week", "Weeks"),
+    3: ("Month", "Months"),
+    4: ("Year", "Years"),
+}  # task repeat often names for one and more repetitions
+
+
+def format_repeat(
+    repeat_interval: int, repeat_often: int
+) -> str:  # get task repeat text
+    """
+    Get how often the task repeats, such as 2 Weeks, or Once for one-time tasks.
+    repeat_interval - the interval at which the task repeats.
+    repeat_often - the frequency at which the task repeats.
+    """
+    if repeat_often == 5:  # if the task is a one-time task
+        return "Once"
+    one, many = repeat_often_labels.get(repeat_often, ("", ""))  # get unit names
+    return f"{repeat_interval} {many if repeat_interval > 1 else one}"
+
+
+def render_task_html(
+    task: Union[Task, TaskRow],
+) -> Markup:  # render task list item
+    """
+    Render the task list item HTML, reusing the cached HTML if the task hasn't changed.
+    task - the task to render, a Task or a task row.
+    """
+    task_key: tuple = (
+        task.id,
+        task.name,
+        task.due_date,
+        task.priority,
+        task.difficulty,
+        task.repeat_interval,
+        task.repeat_often,
+        task.completed,
+    )  # task ID and row version with the displayed task columns
+    html: Union[Markup, None] = task_cache.get(task_key)  # get cached task HTML
+    if html is None:  # if task HTML is not cached
+        html = Markup(
+            app.jinja_env.get_template("task.html").render(
+                task=task,
+                priority=priority_labels.get(task.priority, ""),
+                difficulty=difficulty_labels.get(task.difficulty, ""),
+                repeat=format_repeat(task.repeat_interval, task.repeat_often),
+            )
+        )  # render task list item with its labels
+        task_cache.set(task_key, html)  # add task HTML to cache
+    return html
+
+
+def queue_task_completion(
+    task_id: int, user: User
+) -> bool:  # queue task completion
+    """
+    Add the task completion to the completion queue, to be scored by the completion worker.
+    task_id - the ID of the task to complete.
+    user - the user that owns the task.
+    Raise ValueError if the task can't be scored, so it isn't added to the queue.
+    Return True if the completion is queued, or False if the user doesn't have the task.
+    """
+    task = db.session.execute(
+        db.select(Task.repeat_interval, Task.repeat_often).where(
+            Task.id == task_id, Task.user_id == user.id
+        )
+    ).first()  # get the user's task by task ID
+    if task is None:  # if the user doesn't have the task
+        return False
+    check_task_can_be_scored(
+        task.repeat_interval, task.repeat_often
+    )  # same check as when scoring the completion
+    db.session.add(
+        QueuedCompletion(
+            user_id=user.id,
+            task_id=task_id,
+            completed_at=datetime.now(timezone.utc).replace(tzinfo=None),
+        )
+    )  # add completion to the queue
+    db.session.commit()  # commit database changes
+    completion_worker_wakeup.set()  # score the completion now
+    return True
+
+
+def process_completion_queue(
+    batch_size: int,
+) -> int:  # score queued task completions
+    """
+    Score the queued completions of each user with queued completions in queue order, in one transaction for each user.
+    batch_size - the maximum number of queued completions to score for each user.
+    Return the number of scored completions.
+    """
+    user_ids: list[int] = (
+        db.session.execute(
+            db.select(QueuedCompletion.user_id)
+            .where(QueuedCompletion.failed_at.is_(None))
+            .group_by(QueuedCompletion.user_id)
+            .order_by(func.min(QueuedCompletion.id))
+        )
+        .scalars()
+        .all()
+    )  # get users with queued completions, oldest first
+    db.session.rollback()  # end the read transaction
+    processed: int = 0  # number of scored completions
+    for user_id in user_ids:  # repeat for each user
+        user: Union[User, None] = db.session.get(User, user_id)  # get user
+        if user is None:  # if user doesn't exist
+            continue
+        lock_user(user)  # other workers and requests wait for this user
+        queued: list[QueuedCompletion] = (
+            QueuedCompletion.query.filter(
+                QueuedCompletion.user_id == user_id,
+                QueuedCompletion.failed_at.is_(None),
+            )
+            .order_by(QueuedCompletion.id)
+            .limit(batch_size)
+            .all()
+        )  # get the user's queued completions after locking, in queue order
+        completion_ids: list[int] = [
+            completion.id for completion in queued
+        ]  # IDs of the queued completions, kept if scoring fails
+        try:
+            score_queued_completions(user, queued)  # score the completions
+            db.session.commit()  # commit database changes and release the lock
+            processed += len(queued)
+        except Exception:  # if any completion can't be scored
+            db.session.rollback()  # undo the scored completions and release the lock
+            app.logger.exception(
+                "Failed to score queued completions of user %s, scoring them one at a time",
+                user_id,
+            )
+            processed += score_queued_completions_one_at_a_time(
+                user_id, completion_ids
+            )  # score the other completions and set aside the failing ones
+    with completion_stats_lock:
+        completion_stats["processed"] += processed
+        if processed:  # if completions were scored
+            completion_stats["last_processed"] = time.time()
+    return processed
+
+
+def score_queued_completions(
+    user: User, queued: list[QueuedCompletion]
+) -> None:  # score queued completions of a user
+    """
+    Score the user's queued completions in queue order and remove them from the queue, without committing the changes.
+    user - the user that owns the completions, locked using lock_user.
+    queued - the queued completions in queue order.
+    """
+    tasks: dict[int, Task] = {
+        task.id: task
+        for task in Task.query.filter(
+            Task.user_id == user.id,
+            Task.id.in_({completion.task_id for completion in queued}),
+        )
+    }  # get the completed tasks
+    for completion in queued:  # repeat for each queued completion
+        task: Union[Task, None] = tasks.get(completion.task_id)
+        if task is not None:  # skip tasks deleted after the completion
+            apply_task_completion(
+                task, user, completion.completed_at.replace(tzinfo=timezone.utc)
+            )  # score the completion
+    QueuedCompletion.query.filter(
+        QueuedCompletion.id.in_([completion.id for completion in queued])
+    ).delete(synchronize_session=False)  # remove scored completions
+
+
+def score_queued_completions_one_at_a_time(
+    user_id: int, completion_ids: list[int]
+) -> int:  # score queued completions in separate transactions
+    """
+    Score each queued completion of the user in its own transaction, and mark the completions that fail as failed so they don't block the queue.
+    user_id - the ID of the user that owns the completions.
+    completion_ids - the IDs of the queued completions in queue order.
+    Return the number of scored completions.
+    """
+    scored: int = 0  # number of scored completions
+    for completion_id in completion_ids:  # repeat for each queued completion
+        user: User = db.session.get(User, user_id)  # get user
+        lock_user(user)  # other workers and requests wait for this user
+        completion: Union[QueuedCompletion, None] = db.session.get(
+            QueuedCompletion, completion_id
+        )  # get queued completion after locking
+        if completion is None or completion.failed_at is not None:
+            db.session.rollback()  # completion was scored by another worker
+            continue
+        try:
+            score_queued_completions(user, [completion])  # score the completion
+            db.session.commit()  # commit database changes and release the lock
+            scored += 1
+        except Exception:  # if the completion can't be scored
+            db.session.rollback()  # undo the completion and release the lock
+            app.logger.exception(
+                "Failed to score queued completion %s, marking it as failed",
+                completion_id,
+            )
+            QueuedCompletion.query.filter(
+                QueuedCompletion.id == completion_id
+            ).update(
+                {
+                    QueuedCompletion.failed_at: datetime.now(timezone.utc).replace(
+                        tzinfo=None
+                    )
+                },
+                synchronize_session=False,
+            )  # set the completion aside
+            db.session.commit()  # commit database changes
+    return scored
+
+
+def get_completion_queue_stats() -> dict:  # get completion queue metrics
+    """
+    Get the completion queue depth, the age of the oldest queued completion in seconds (lag), the number of failed completions and the number of completions scored by this process.
+    """
+    depth, oldest, failed = db.session.execute(
+        db.select(
+            func.count(QueuedCompletion.id).filter(
+                QueuedCompletion.failed_at.is_(None)
+            ),
+            func.min(QueuedCompletion.completed_at).filter(
+                QueuedCompletion.failed_at.is_(None)
+            ),
+            func.count(QueuedCompletion.failed_at),
+        )
+    ).one()  # get queue depth, oldest completion time and failed completions
+    with completion_stats_lock:
+        return {
+            "enabled": app.config["COMPLETION_QUEUE"],
+            "depth": depth,
+            "lag_seconds": (
+                (
+                    datetime.now(timezone.utc).replace(tzinfo=None) - oldest
+                ).total_seconds()
+                if oldest is not None
+                else 0.0
+            ),
+            "failed": failed,
+            "processed": completion_stats["processed"],
+            "last_processed": completion_stats["last_processed"],
+        }
+
+
+completion_stats: dict = {
+    "processed": 0,
+    "last_processed": None,
+}  # completion worker statistics of this process
+completion_stats_lock = threading.Lock()  # lock to update statistics across threads
+completion_worker_wakeup = threading.Event()  # event to wake up the completion worker
+completion_worker_stop = threading.Event()  # event to stop the completion worker
+completion_worker_lock = threading.Lock()  # lock to start one completion worker
+completion_worker: Union[threading.Thread, None] = None  # completion worker thread
+
+
+def run_completion_worker(
+    stop: Union[threading.Event, None] = None,
+) -> None:  # score queued completions until stopped
+    """
+    Score queued completions in a loop, waiting for new completions when the queue is empty.
+    stop - the event to stop the worker, or None to run forever.
+    """
+    while stop is None or not stop.is_set():  # repeat until stopped
+        try:
+            with app.app_context():
+                processed: int = process_completion_queue(
+                    app.config["COMPLETION_BATCH_SIZE"]
+                )  # score queued completions
+        except Exception:  # keep the worker running if scoring fails
+            app.logger.exception("Failed to score queued completions")
+            processed = 0
+        if not processed:  # if the queue is empty
+            completion_worker_wakeup.wait(
+                app.config["COMPLETION_POLL_INTERVAL"]
+            )  # wait for new completions
+            completion_worker_wakeup.clear()
+
+
+def start_completion_worker() -> None:  # start completion worker thread
+    """
+    Start the completion worker thread of this process if it isn't running.
+    """
+    global completion_worker
+    if completion_worker is not None and completion_worker.is_alive():
+        return  # worker is running
+    with completion_worker_lock:
+        if completion_worker is None or not completion_worker.is_alive():
+            completion_worker = threading.Thread(
+                target=run_completion_worker,
+                args=(completion_worker_stop,),
+                name="completion-worker",
+                daemon=True,
+            )  # create worker thread
+            completion_worker.start()
+
+
+def stop_completion_worker() -> None:  # stop completion worker thread
+    """
+    Stop the completion worker thread after it finishes scoring the current batch.
+    """
+    completion_worker_stop.set()  # stop after the current batch
+    completion_worker_wakeup.set()  # stop waiting for new completions
+    if completion_worker is not None:  # if worker was started
+        completion_worker.join()
+
+
+atexit.register(
+    stop_completion_worker
+)  # stop completion worker on shutdown, before the database is optimized
+
+
+@app.before_request
+def ensure_completion_worker() -> None:  # start completion worker on first request
+    """
+    Start the completion worker thread if completions are queued and the worker runs in the app process, after server workers are forked.
+    """
+    if app.config["COMPLETION_QUEUE"] and app.config["COMPLETION_WORKER_THREAD"]:
+        start_completion_worker()  # make sure the worker is running
+
+
+@app.route("/api/completion_queue")
+def api_completion_queue() -> tuple[Response, int]:  # get completion queue metrics
+    """
+    Return the completion queue depth, lag and number of scored completions as JSON.
+    """
+    if get_current_user() is None:  # if user is not logged in
+        return jsonify(error="Not logged in"), 401
+    return jsonify(get_completion_queue_stats()), 200
+
+
+@app.route("/metrics")
+def metrics_endpoint() -> Response:  # get metrics for Prometheus
+    """
+    Return the request, SQL statement, span and completion queue metrics of this process in the Prometheus text format, if instrumentation is on.
+    """
+    if not app.config["INSTRUMENTATION"]:  # if instrumentation is off
+        return Response("Not found\n", 404, mimetype="text/plain")
+    queue: dict = get_completion_queue_stats()  # get completion queue metrics
+    body: str = metrics.render() + "\n".join(
+        [
+            "# HELP app_completion_queue_depth Completions waiting to be scored.",
+            "# TYPE app_completion_queue_depth gauge",
+            f"app_completion_queue_depth {queue['depth']}",
+            "# HELP app_completion_queue_lag_seconds Age of the oldest queued completion.",
+            "# TYPE app_completion_queue_lag_seconds gauge",
+            f"app_completion_queue_lag_seconds {queue['lag_seconds']}",
+            "# HELP app_completion_queue_failed Queued completions that failed to be scored.",
+            "# TYPE app_completion_queue_failed gauge",
+            f"app_completion_queue_failed {queue['failed']}",
+            "# HELP app_completions_processed_total Queued completions scored by this process.",
+            "# TYPE app_completions_processed_total counter",
+            f"app_completions_processed_total {queue['processed']}",
+        ]
+    ) + "\n"  # add completion queue metrics
+    return Response(
+        body, 200, content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+agenda_task_columns: tuple = (
+    Task.id,
+    Task.name,
+    Task.priority,
+    Task.difficulty,
+    Task.repeat_interval,
+    Task.repeat_often,
+)  # task columns shown with each agenda occurrence
+
+
+@app.route("/api/agenda")
+def api_agenda() -> tuple[Response, int]:  # get tasks due within a date range
+    """
+    Return the task occurrences due from the start date to the end date as JSON, including each upcoming occurrence of recurring tasks.
+    """
+    try:
+        start_date: date = (
+            datetime.strptime(request.args["from"], "%Y-%m-%d").date()
+            if request.args.get("from")
+            else date.today()
+        )  # get start date, today by default
+        end_date: date = (
+            datetime.strptime(request.args["to"], "%Y-%m-%d").date()
+            if request.args.get("to")
+            else start_date + timedelta(days=app.config["AGENDA_DAYS"] - 1)
+        )  # get end date
+    except (ValueError, OverflowError):  # if a date is invalid
+        return jsonify(error="Dates must be in YYYY-MM-DD format"), 400
+    if end_date < start_date:  # if date range is empty
+        return jsonify(error="to must not be before from"), 400
+    if (
+        end_date - start_date
+    ).days >= app.config["AGENDA_MAX_DAYS"]:  # if date range is too long
+        return (
+            jsonify(
+                error=f"Date range must be at most {app.config['AGENDA_MAX_DAYS']} days"
+            ),
+            400,
+        )
+    user: Union[User, None] = get_current_user()  # get logged in user
+    if user is None:  # if user is not logged in
+        return jsonify(error="Not logged in"), 401
+    horizon: date = date.today() + timedelta(
+        days=app.config["AGENDA_MAX_DAYS"]
+    )  # last date to precompute occurrences for, so far future dates don't fill the database
+    if start_date <= horizon and (
+        user.agenda_until is None or user.agenda_until < min(end_date, horizon)
+    ):  # if occurrences in the date range are not precomputed yet
+        try:
+            extend_task_occurrences(
+                user, min(end_date, horizon)
+            )  # precompute task occurrences until the end date or horizon
+            db.session.commit()  # commit database changes
+        except IntegrityError:  # if another request precomputed them first
+            db.session.rollback()
+    occurrences: list = []  # task occurrences in the date range
+    if user.agenda_until is not None and start_date <= user.agenda_until:
+        occurrences.extend(
+            db.session.execute(
+                db.select(
+                    TaskOccurrence.due_date,
+                    TaskOccurrence.times_completed,
+                    *agenda_task_columns,
+                )
+                .join(Task, Task.id == TaskOccurrence.task_id)
+                .where(
+                    TaskOccurrence.user_id == user.id,
+                    TaskOccurrence.due_date >= start_date,
+                    TaskOccurrence.due_date <= min(end_date, user.agenda_until),
+                )
+                .order_by(TaskOccurrence.due_date, TaskOccurrence.task_id)
+            ).all()
+        )  # get precomputed task occurrences using the occurrence index
+    if user.agenda_until is None or end_date > user.agenda_until:
+        expand_start: date = (
+            max(start_date, user.agenda_until + timedelta(days=1))
+            if user.agenda_until is not None
+            else start_date
+        )  # first date that isn't precomputed
+        tasks: list = db.session.execute(
+            db.select(
+                *agenda_task_columns,
+                Task.original_due_date,
+                Task.times_completed,
+            ).where(Task.user_id == user.id, Task.completed.is_(False))
+        ).all()  # get active tasks of the user
+        occurrences.extend(
+            sorted(
+                (
+                    (due_date, times_completed, *tasks[index][: len(agenda_task_columns)])
+                    for index, times_completed, due_date in expand_task_rows(
+                        tasks, expand_start, end_date
+                    )
+                ),
+                key=lambda occurrence: (occurrence[0], occurrence[2]),
+            )
+        )  # expand occurrences after the precomputed dates without saving them
+    return (
+        jsonify(
+            {
+                "from": start_date.isoformat(),
+                "to": end_date.isoformat(),
+                "occurrences": [
+                    {
+                        "due_date": due_date.isoformat(),
+                        "times_completed": times_completed,
+                        "task_id": task_id,
+                        "name": name,
+                        "priority": priority,
+                        "difficulty": difficulty,
+                        "repeat_interval": repeat_interval,
+                        "repeat_often": repeat_often,
+                    }
+                    for (
+                        due_date,
+                        times_completed,
+                        task_id,
+                        name,
+                        priority,
+                        difficulty,
+                        repeat_interval,
+                        repeat_often,
+                    ) in occurrences
+                ],
+            }
+        ),
+        200,
+    )  # return task occurrences sorted by due date
+
+
+def add_task_occurrences(
+    task: Task, end_date: date
+) -> None:  # precompute occurrences of a task
+    """
+    Add the occurrences of the task that are not completed yet, up to the end date.
+    task - the task to add occurrences for.
+    end_date - the last date of the precomputed task occurrences.
+    """
+    if task.completed:  # if one-time task is completed
+        return
+    rows: list[dict] = [
+        {
+            "task_id": task.id,
+            "user_id": task.user_id,
+            "times_completed": times_completed,
+            "due_date": due_date,
+        }
+        for times_completed, due_date in iterate_recurring_events(
+            task.original_due_date,
+            task.repeat_interval,
+            task.repeat_often,
+            date.min,
+            end_date,
+            task.times_completed,
+        )
+    ]  # occurrences from the next due date to the end date
+    if rows:  # if the task is due before the end date
+        db.session.execute(insert(TaskOccurrence), rows)  # insert occurrences
+
+
+def remove_completed_task_occurrences(
+    task: Task,
+) -> None:  # delete completed occurrences of a task
+    """
+    Delete the task occurrences that are completed, or all occurrences if a one-time task is completed.
+    task - the task that is completed.
+    """
+    query = TaskOccurrence.query.filter(
+        TaskOccurrence.task_id == task.id
+    )  # get occurrences of the task
+    if not task.completed:  # if task is repeatable
+        query = query.filter(
+            TaskOccurrence.times_completed < task.times_completed
+        )  # get occurrences before the next due date
+    query.delete(synchronize_session=False)  # delete completed occurrences
+
+
+def extend_task_occurrences(
+    user: User, end_date: date
+) -> None:  # precompute occurrences of all user tasks
+    """
+    Add the occurrences of the user's active tasks after the last precomputed date up to the end date, expanding all tasks at once.
+    user - the user that owns the tasks.
+    end_date - the new last date of the precomputed task occurrences.
+    """
+    tasks: list = db.session.execute(
+        db.select(
+            Task.id,
+            Task.original_due_date,
+            Task.repeat_interval,
+            Task.repeat_often,
+            Task.times_completed,
+        ).where(Task.user_id == user.id, Task.completed.is_(False))
+    ).all()  # get active tasks of the user
+    rows: list[dict] = [
+        {
+            "task_id": tasks[index].id,
+            "user_id": user.id,
+            "times_completed": times_completed,
+            "due_date": due_date,
+        }
+        for index, times_completed, due_date in expand_task_rows(
+            tasks,
+            (
+                user.agenda_until + timedelta(days=1)
+                if user.agenda_until is not None
+                else date.min
+            ),
+            end_date,
+        )
+    ]  # occurrences after the last precomputed date
+    if rows:  # if tasks are due before the end date
+        db.session.execute(
+            TaskOccurrence.__table__.insert(), rows
+        )  # insert occurrences without ORM bulk insert overhead
+    user.agenda_until = end_date  # occurrences are precomputed until the end date
+
+
+def expand_task_rows(
+    tasks: list, start_date: date, end_date: date
+) -> list[tuple[int, int, date]]:  # get occurrences of many tasks
+    """
+    Get the occurrences of the tasks from the start date to the end date that are not completed yet, expanding all tasks at once.
+    tasks - the task rows with the original due date, repeat interval, repeat often and times completed.
+    start_date - the first date of the date range.
+    end_date - the last date of the date range.
+    Return the index of the task row, number of times completed and due date of each occurrence, sorted by task row.
+    """
+    if not tasks:  # if there are no tasks
+        return []
+    task_index, times_completed, due_dates = expand_recurring_events_batch(
+        [task.original_due_date for task in tasks],
+        [task.repeat_interval for task in tasks],
+        [task.repeat_often for task in tasks],
+        start_date,
+        end_date,
+        [task.times_completed for task in tasks],
+    )  # get occurrences in the date range
+    return list(
+        zip(task_index.tolist(), times_completed.tolist(), due_dates.tolist())
+    )
+
+
+def clear_task_occurrences(user: User) -> None:  # delete precomputed occurrences
+    """
+    Delete the precomputed occurrences of the user's tasks, so they are precomputed again on the next agenda request.
+    user - the user that owns the tasks.
+    """
+    TaskOccurrence.query.filter(TaskOccurrence.user_id == user.id).delete(
+        synchronize_session=False
+    )  # delete task occurrences
+    user.agenda_until = None  # occurrences are not precomputed
+
+
+@app.route("/api/import", methods=["POST"])
+def api_import_tasks() -> tuple[Response, int]:  # import tasks using JSON API
+    """
+    Import tasks from an uploaded CSV or JSON Lines file and return the import statistics as JSON.
+    """
+    user: Union[User, None] = get_current_user()  # get logged in user
+    if user is None:  # if user is not logged in
+        return jsonify(error="Not logged in"), 401
+    file = request.files.get("file")  # get uploaded file
+    if file is None:  # if there is no uploaded file
+        return jsonify(error="No file uploaded"), 400
+    file_format: str = request.form.get(
+        "format", os.path.splitext(file.filename or "")[1].lstrip(".")
+    )  # get file format from form or file extension
+    try:
+        imported, seconds = import_tasks(
+            io.TextIOWrapper(file.stream, encoding="utf-8"),
+            file_format,
+            request.form.get(
+                "batch_size", app.config["IMPORT_BATCH_SIZE"], type=int
+            ),
+            user,
+        )  # import tasks from file
+    except ValueError as error:  # if the file or a row is invalid
+        return jsonify(error=str(error)), 400
+    return (
+        jsonify(
+            imported=imported,
+            seconds=seconds,
+            rows_per_second=imported / seconds if seconds > 0 else imported,
+        ),
+        201,
+    )  # return number of imported tasks and import speed
+
+
+def read_task_rows(
+    file: Iterable[str], file_format: str
+) -> Iterator[dict]:  # read task rows from file
+    """
+    Read task rows from a CSV or JSON Lines file one row at a time.
+    file - the file to read.
+    file_format - the file format (csv or jsonl).
+    """
+    if file_format == "csv":  # if file is CSV
+        yield from csv.DictReader(file)
+    elif file_format in ("jsonl", "json"):  # if file is JSON Lines
+        for line in file:  # repeat for each line
+            if line.strip():  # skip empty lines
+                yield json.loads(line)
+    else:
+        raise ValueError(f"Unsupported file format: {file_format}")
+
+
+def validate_task_row(
+    row: dict, user_id: int
+) -> dict:  # get task column values from row
+    """
+    Validate the task row and get the task column values to insert.
+    row - the task row with name, due date, priority, difficulty, repeat interval and repeat often.
+    user_id - the ID of the user that owns the task.
+    """
+    name: str = str(row.get("name") or "").strip()  # get task name
+    if not name or len(name) > 80:  # task name is required
+        raise ValueError("name must be 1 to 80 characters")
+    try:
+        due_date: date = (
+            datetime.strptime(row["due_date"], "%Y-%m-%d").date()
+            if row.get("due_date")
+            else date.today()
+        )  # get due date, due today by default
+    except (TypeError, ValueError):  # if due date is not a date
+        raise ValueError("due_date must be in YYYY-MM-DD format") from None
+    values: dict = {
+        "name": name,
+        "user_id": user_id,
+        "original_due_date": due_date,
+        "due_date": due_date,
+    }  # task column values
+    for column, default, minimum, maximum in (
+        ("priority", 1, 1, 3),
+        ("difficulty", 1, 1, 3),
+        ("repeat_interval", 1, 1, None),
+        ("repeat_often", 5, 1, 5),
+    ):  # repeat for each numeric task column
+        try:
+            value = int(
+                default if row.get(column) in (None, "") else row[column]
+            )  # get column value, or the default if it is missing
+        except (TypeError, ValueError):  # if value is not a number
+            raise ValueError(f"{column} must be a whole number") from None
+        if value < minimum:  # if value is too small
+            raise ValueError(f"{column} must be at least {minimum}")
+        if maximum is not None and value > maximum:  # if value is too large
+            raise ValueError(f"{column} must be at most {maximum}")
+        values[column] = value
+    return values
+
+
+def import_tasks(
+    file: Iterable[str], file_format: str, batch_size: int, user: User
+) -> tuple[int, float]:  # import tasks from file
+    """
+    Import tasks from a CSV or JSON Lines file to the user's task list, inserting them in batches in a single transaction.
+    file - the file to read.
+    file_format - the file format (csv or jsonl).
+    batch_size - the number of tasks to insert at once.
+    user - the user that owns the tasks.
+    Return the number of imported tasks and the number of seconds taken.
+    """
+    start_time: float = time.perf_counter()  # get import start time
+    imported: int = 0  # number of imported tasks
+    batch: list[dict] = []  # tasks to insert
+    try:
+        lock_user(user)  # apply concurrent task changes one at a time
+        for row_number, row in enumerate(
+            read_task_rows(file, file_format), start=1
+        ):  # repeat for each row
+            try:
+                batch.append(validate_task_row(row, user.id))
+            except (KeyError, TypeError, ValueError) as error:  # if row is invalid
+                raise ValueError(f"Row {row_number}: {error}") from error
+            if len(batch) >= batch_size:  # if batch is full
+                db.session.execute(insert(Task), batch)  # insert batch of tasks
+                imported += len(batch)
+                batch = []
+        if batch:  # if there are tasks left
+            db.session.execute(insert(Task), batch)  # insert remaining tasks
+            imported += len(batch)
+        user.active_tasks += imported  # increase the number of active tasks
+        if imported and user.agenda_until is not None:  # if occurrences are precomputed
+            clear_task_occurrences(
+                user
+            )  # precompute occurrences again with the imported tasks when needed
+        user.mark_data_changed()  # task list has changed
+        db.session.commit()  # commit database changes
+    except Exception:  # if import fails, don't import any tasks
+        db.session.rollback()
+        raise
+    return imported, time.perf_counter() - start_time
+
+
+tasks_cli = AppGroup("tasks", help="Manage tasks.")  # task commands
+
+
+@tasks_cli.command("import")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--user", "username", required=True, help="Username of the task owner.")
+@click.option(
+    "--format",
+    "file_format",
+    type=click.Choice(["csv", "jsonl"]),
+    help="File format, detected from the file extension by default.",
+)
+@click.option(
+    "--batch-size",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Number of tasks to insert at once.",
+)
+def import_tasks_command(
+    path: str,
+    username: str,
+    file_format: Union[str, None],
+    batch_size: Union[int, None],
+) -> None:  # import tasks from file command
+    """
+    Import tasks from a CSV or JSON Lines file.
+    """
+    user: Union[User, None] = User.query.filter(
+        User.username == username
+    ).first()  # get user by username
+    if user is None:  # if user doesn't exist
+        raise click.ClickException(f"User not found: {username}")
+    with open(path, encoding="utf-8", newline="") as file:  # open the file
+        try:
+            imported, seconds = import_tasks(
+                file,
+                file_format or os.path.splitext(path)[1].lstrip("."),
+                batch_size or app.config["IMPORT_BATCH_SIZE"],
+                user,
+            )  # import tasks from file
+        except ValueError as error:  # if the file or a row is invalid
+            raise click.ClickException(str(error)) from error
+    click.echo(
+        f"Imported {imported:,} tasks in {seconds:.2f} seconds"
+        f" ({imported / seconds if seconds > 0 else imported:,.0f} rows per second)"
+    )  # display import statistics
+
+
+@tasks_cli.command("recount")
+@click.option(
+    "--check",
+    is_flag=True,
+    help="Show the users whose number of active tasks is out of sync and fail if there are any, without fixing them.",
+)
+def recount_active_tasks_command(check: bool) -> None:  # recount active tasks command
+    """
+    Recount the number of active tasks for each user.
+    """
+    if check:  # if only checking the number of active tasks
+        mismatches: list = get_active_task_mismatches()  # get users out of sync
+        for username, active_tasks, counted in mismatches:  # repeat for each user
+            click.echo(f"{username}: {active_tasks:,} active tasks, counted {counted:,}")
+        if mismatches:  # if any user is out of sync
+            raise click.ClickException(
+                f"{len(mismatches):,} users have the wrong number of active tasks"
+            )
+        click.echo("Active tasks are in sync")
+        return
+    recount_active_tasks()  # recount active tasks
+    db.session.commit()  # commit database changes
+    click.echo("Recounted active tasks")
+
+
+def get_active_task_mismatches() -> list[tuple[str, int, int]]:  # check active tasks
+    """
+    Get the users whose number of active tasks is not the number of tasks that are not completed.
+    Return the username, number of active tasks and counted active tasks of each user.
+    """
+    counted = (
+        db.select(func.count(Task.id))
+        .where(Task.user_id == User.id, Task.completed.is_(False))
+        .scalar_subquery()
+    )  # count active tasks of each user
+    return [
+        tuple(row)
+        for row in db.session.execute(
+            db.select(User.username, User.active_tasks, counted)
+            .where(User.active_tasks != counted)
+            .order_by(User.id)
+        )
+    ]
+
+
+def recount_active_tasks() -> None:  # recount active tasks for each user
+    """
+    Set the number of active tasks for each user to the number of tasks that are not completed.
+    """
+    User.query.update(
+        {
+            User.active_tasks: db.select(func.count(Task.id))
+            .where(Task.user_id == User.id, Task.completed.is_(False))
+            .scalar_subquery()
+        },
+        synchronize_session=False,
+    )  # count active tasks for each user in a single query
+
+
+app.cli.add_command(tasks_cli)  # add task commands to Flask CLI
+
+users_cli = AppGroup("users", help="Manage users.")  # user commands
+
+
+@users_cli.command("set-password")
+@click.argument("username")
+@click.password_option(help="New password, prompted for by default.")
+def set_password_command(username: str, password: str) -> None:  # set password command
+    """
+    Set the password of a user, such as a user created before passwords that can't log in yet.
+    """
+    user: Union[User, None] = User.query.filter(
+        User.username == username
+    ).first()  # get user by username
+    if user is None:  # if user doesn't exist
+        raise click.ClickException(f"User not found: {username}")
+    if not password:  # if password is empty
+        raise click.ClickException("Password must not be empty")
+    user.password_hash = generate_password_hash(password)  # set password
+    db.session.commit()  # commit database changes
+    click.echo(f"Set password of {username}")
+
+
+app.cli.add_command(users_cli)  # add user commands to Flask CLI
+
+completions_cli = AppGroup(
+    "completions", help="Score queued task completions."
+)  # completion queue commands
+
+
+@completions_cli.command("work")
+@click.option(
+    "--once", is_flag=True, help="Score the queued completions and exit."
+)
+def completion_worker_command(once: bool) -> None:  # run completion worker command
+    """
+    Run the completion worker, scoring queued completions as they arrive.
+    """
+    if once:  # if scoring the queue once
+        processed: int = 0  # number of scored completions
+        while True:  # repeat until the queue is empty
+            scored: int = process_completion_queue(
+                app.config["COMPLETION_BATCH_SIZE"]
+            )  # score queued completions
+            if not scored:  # if the queue is empty
+                break
+            processed += scored
+        click.echo(f"Scored {processed:,} queued completions")
+        return
+    click.echo("Scoring queued completions, press Ctrl+C to stop")
+    run_completion_worker()  # score queued completions forever
+
+
+@completions_cli.command("stats")
+def completion_stats_command() -> None:  # show completion queue metrics command
+    """
+    Show the completion queue depth, lag and failed completions.
+    """
+    stats: dict = get_completion_queue_stats()  # get queue metrics
+    click.echo(
+        f"Queued completions: {stats['depth']:,}, lag: {stats['lag_seconds']:.1f} seconds,"
+        f" failed: {stats['failed']:,}"
+    )
+
+
+app.cli.add_command(completions_cli)  # add completion queue commands to Flask CLI
+
+stats_cli = AppGroup("stats", help="Manage user stats.")  # user stats commands
+
+
+@stats_cli.command("rebuild")
+@click.option(
+    "--chunk-size",
+    type=click.IntRange(min=1),
+    default=10000,
+    help="Number of completions read at once and users updated at once.",
+)
+@click.option(
+    "--from-latest-snapshot",
+    is_flag=True,
+    help="Replay completions after each user's latest snapshot instead of the whole completion log.",
+)
+@click.option(
+    "--check",
+    is_flag=True,
+    help="Show the stats that differ from the replayed completion log and fail if there are any, without saving the rebuilt stats.",
+)
+def rebuild_stats_command(
+    chunk_size: int, from_latest_snapshot: bool, check: bool
+) -> None:  # rebuild user stats command
+    """
+    Recalculate the stats of every user from the completion log.
+    """
+    mismatches: Union[list, None] = (
+        [] if check else None
+    )  # stats that differ from the replayed completion log
+    users, events, seconds = rebuild_user_stats(
+        chunk_size, from_latest_snapshot, mismatches
+    )  # rebuild user stats
+    if check:  # if only checking the stats
+        for user_id, column, stat, replayed in mismatches:  # repeat for each stat
+            click.echo(f"User {user_id} {column}: {stat!r}, replayed {replayed!r}")
+        if mismatches:  # if any stat differs
+            raise click.ClickException(
+                f"{len(mismatches):,} stats differ from the completion log"
+            )
+        click.echo(
+            f"Stats of {users:,} users match {events:,} replayed completions"
+        )
+        return
+    click.echo(
+        f"Rebuilt stats of {users:,} users from {events:,} completions in {seconds:.2f} seconds"
+        f" ({events / seconds if seconds > 0 else events:,.0f} completions per second)"
+    )  # display rebuild statistics
+
+
+def rebuild_user_stats(
+    chunk_size: int,
+    from_latest_snapshot: bool = False,
+    mismatches: Union[list, None] = None,
+) -> tuple[int, int, float]:  # rebuild user stats from the completion log
+    """
+    Recalculate the stats of every user by replaying the completion log from each user's first snapshot, or latest snapshot, and replace the later snapshots.
+    Users and completions are read in chunks, so memory use doesn't grow with the size of the completion log.
+    chunk_size - the number of completions read at once and the number of users updated at once.
+    from_latest_snapshot - whether to start from each user's latest snapshot instead of the first snapshot.
+    mismatches - a list to add the user ID, column, stat and replayed stat of each stat that differs from the replayed completion log to instead of saving the rebuilt stats, or None to save them.
+    Return the number of users, the number of replayed completions and the number of seconds taken.
+    """
+    start_time: float = time.perf_counter()  # get rebuild start time
+    start_event_ids = (
+        db.select(
+            UserSnapshot.user_id,
+            (func.max if from_latest_snapshot else func.min)(
+                UserSnapshot.event_id
+            ).label("event_id"),
+        )
+        .group_by(UserSnapshot.user_id)
+        .subquery()
+    )  # ID of the last completion event included in the starting snapshot of each user
+    users: int = 0  # number of rebuilt users
+    events: int = 0  # number of replayed completions
+    last_user_id: int = 0  # ID of the last rebuilt user
+    while True:  # repeat for each chunk of users
+        start_snapshots: list = db.session.execute(
+            db.select(
+                UserSnapshot.id,
+                UserSnapshot.user_id,
+                UserSnapshot.event_id,
+                *(UserSnapshot.__table__.c[column] for column in user_stats_columns),
+            )
+            .join(
+                start_event_ids,
+                and_(
+                    UserSnapshot.user_id == start_event_ids.c.user_id,
+                    UserSnapshot.event_id == start_event_ids.c.event_id,
+                ),
+            )
+            .where(UserSnapshot.user_id > last_user_id)
+            .order_by(UserSnapshot.user_id)
+            .limit(chunk_size)
+        ).all()  # get the starting snapshot of the next chunk of users
+        if not start_snapshots:  # if all users are rebuilt
+            break
+        user_stats: dict[int, User] = {
+            snapshot.user_id: User(
+                id=snapshot.user_id,
+                **{column: getattr(snapshot, column) for column in user_stats_columns},
+            )
+            for snapshot in start_snapshots
+        }  # user stats, not added to the database
+        if mismatches is None:  # if saving the rebuilt stats
+            UserSnapshot.query.filter(
+                UserSnapshot.user_id.in_(user_stats),
+                UserSnapshot.id.notin_([snapshot.id for snapshot in start_snapshots]),
+            ).delete(synchronize_session=False)  # delete snapshots after the start
+        snapshots: list[dict] = []  # new snapshots to insert
+        for event in db.session.execute(
+            db.select(*CompletionEvent.__table__.c)
+            .join(
+                start_event_ids, CompletionEvent.user_id == start_event_ids.c.user_id
+            )
+            .where(
+                CompletionEvent.user_id.in_(user_stats),
+                CompletionEvent.id > start_event_ids.c.event_id,
+            )
+            .order_by(CompletionEvent.user_id, CompletionEvent.id)
+            .execution_options(yield_per=chunk_size)
+        ):  # repeat for each completion after the starting snapshots, in chunks
+            user: User = user_stats[event.user_id]
+            update_user_stats(user, event)  # score the completion
+            events += 1
+            if (
+                user.tasks_completed % app.config["STATS_SNAPSHOT_INTERVAL"] == 0
+            ):  # if a snapshot is due
+                snapshots.append(get_user_snapshot(user, event.id))
+        users += len(user_stats)
+        last_user_id = start_snapshots[-1].user_id
+        if mismatches is not None:  # if checking the stats instead of saving them
+            for row in db.session.execute(
+                db.select(
+                    User.id, *(User.__table__.c[column] for column in user_stats_columns)
+                ).where(User.id.in_(user_stats))
+            ):  # repeat for the stats of each user
+                for column in user_stats_columns:  # repeat for each stat
+                    replayed = getattr(user_stats[row.id], column)  # replayed stat
+                    if getattr(row, column) != replayed:  # if stat differs
+                        mismatches.append(
+                            (row.id, column, getattr(row, column), replayed)
+                        )
+            db.session.rollback()  # end the read transaction
+            continue
+        if snapshots:  # if there are new snapshots
+            db.session.execute(
+                UserSnapshot.__table__.insert(), snapshots
+            )  # save user stats after the snapshot completions
+        db.session.execute(
+            db.update(User),
+            [
+                {
+                    "id": user_id,
+                    **{column: getattr(user, column) for column in user_stats_columns},
+                }
+                for user_id, user in user_stats.items()
+            ],
+        )  # update stats of the chunk of users by user ID
+        db.session.execute(
+            db.update(User)
+            .where(User.id.in_(user_stats))
+            .values(
+                data_version=User.data_version + 1,
+                data_modified=datetime.now(timezone.utc).replace(
+                    microsecond=0, tzinfo=None
+                ),
+            )
+        )  # user stats have changed
+        db.session.commit()  # commit database changes
+    return users, events, time.perf_counter() - start_time
+
+
+app.cli.add_command(stats_cli)  # add user stats commands to Flask CLI
+
+
+def calculate_next_recurring_event(
+    original_date: date, times_completed: int, repeat_interval: int, repeat_often: int
+) -> date:  # calculate the next recurring event date
+    """
+    Calculate the next recurring event date based on the original date, times completed, repeat interval, and repeat often.
+    original_date - the original date of the recurring event.
+    times_completed - the number of times the recurring event has been completed.
+    repeat_interval - the interval at which the recurring event repeats.
+    repeat_often - the frequency at which the recurring event repeats.
+    """
+    if repeat_often == 1:  # if task repeat often is daily
+        return original_date + timedelta(
+            days=repeat_interval * times_completed
+        )  # add days to the original date
+    elif repeat_often == 2:  # if task repeat often is weekly
+        return original_date + timedelta(
+            weeks=repeat_interval * times_completed
         )  # add weeks to the original date
     elif repeat_often == 3:  # if task repeat often is monthly
         new_month: int = (
@@ -520,17 +2869,17 @@ def calculate_next_recurring_event(
         new_month = (
             new_month - 1
         ) % 12 + 1  # clamp month from 1 (January) to 12 (December)
-        max_days_in_month = calendar.monthrange(new_year, new_month)[
-            1
-        ]  # get number of days in month
+        max_days_in_month = days_in_month(
+            new_year, new_month
+        )  # get number of days in month
         return date(
             new_year, new_month, min(original_date.day, max_days_in_month)
         )  # add months to the original date
     elif repeat_often == 4:  # if task repeat often is yearly
         new_year = original_date.year + repeat_interval * times_completed
-        max_days_in_month: int = calendar.monthrange(new_year, original_date.month)[
-            1
-        ]  # get number of days in month
+        max_days_in_month: int = days_in_month(
+            new_year, original_date.month
+        )  # get number of days in month
         return date(
             new_year, original_date.month, min(
                 original_date.day, max_days_in_month)
@@ -541,188 +2890,864 @@ def calculate_next_recurring_event(
         )  # return original task due date
 
 
+@lru_cache(maxsize=None)  # cache number of days for each month
+def days_in_month(year: int, month: int) -> int:  # get number of days in month
+    """
+    Get the number of days in the month.
+    year - the year of the month.
+    month - the month from 1 (January) to 12 (December).
+    """
+    return calendar.monthrange(year, month)[1]
+
+
+def iterate_recurring_events(
+    original_date: date,
+    repeat_interval: int,
+    repeat_often: int,
+    start_date: date,
+    end_date: date,
+    min_times_completed: int = 0,
+) -> Iterator[tuple[int, date]]:  # get recurring event dates within a date range
+    """
+    Get the recurring event dates from the start date to the end date, matching calculate_next_recurring_event, without calculating the dates before the start date.
+    original_date - the original date of the recurring event.
+    repeat_interval - the interval at which the recurring event repeats.
+    repeat_often - the frequency at which the recurring event repeats.
+    start_date - the first date of the date range.
+    end_date - the last date of the date range.
+    min_times_completed - the smallest number of times completed to include.
+    Yield the number of times completed and the date of each recurring event.
+    """
+    if repeat_often not in (1, 2, 3, 4):  # if the event doesn't repeat
+        if min_times_completed == 0 and start_date <= original_date <= end_date:
+            yield 0, original_date
+        return
+    if repeat_often in (1, 2):  # if event repeats daily or weekly
+        step_days: int = repeat_interval * (
+            1 if repeat_often == 1 else 7
+        )  # number of days between events
+        times_completed: int = max(
+            min_times_completed, -(-(start_date - original_date).days // step_days)
+        )  # skip events before the start date
+        event_date: date = original_date + timedelta(
+            days=step_days * times_completed
+        )  # first event date in range
+        while event_date <= end_date:  # repeat until the end date
+            yield times_completed, event_date
+            times_completed += 1
+            if date.max - event_date < timedelta(days=step_days):  # if past year 9999
+                return
+            event_date += timedelta(days=step_days)
+        return
+    step_months: int = repeat_interval * (
+        1 if repeat_often == 3 else 12
+    )  # number of months between events
+    original_month: int = (
+        original_date.year * 12 + original_date.month - 1
+    )  # month index of the original date
+    times_completed = max(
+        min_times_completed,
+        -(
+            -(start_date.year * 12 + start_date.month - 1 - original_month)
+            // step_months
+        ),
+    )  # skip events in the months before the start date
+    while True:
+        month: int = original_month + step_months * times_completed  # month index
+        if month // 12 > date.max.year:  # if past year 9999
+            return
+        event_date = date(
+            month // 12,
+            month % 12 + 1,
+            min(original_date.day, days_in_month(month // 12, month % 12 + 1)),
+        )  # add months to the original date
+        if event_date > end_date:  # if past the end date
+            return
+        if event_date >= start_date:  # if event is within the date range
+            yield times_completed, event_date
+        times_completed += 1
+
+
+def recurring_event_dates_batch(
+    original, original_month, original_day, step, by_months, times_completed
+):  # get recurring event dates for arrays of tasks
+    """
+    Get the recurring event dates for NumPy arrays of tasks, matching calculate_next_recurring_event.
+    original - the original dates (datetime64 values).
+    original_month - the month indexes of the original dates.
+    original_day - the days of the month of the original dates.
+    step - the number of days or months between events.
+    by_months - whether each task repeats monthly or yearly.
+    times_completed - the number of times each task has been completed.
+    """
+    month_start = (original_month + step * times_completed).astype("datetime64[M]")
+    first_day = month_start.astype("datetime64[D]")  # first day of each month
+    month_days = (
+        (month_start + 1).astype("datetime64[D]") - first_day
+    ).astype(np.int64)  # number of days in each month
+    return np.where(
+        by_months,
+        first_day + np.minimum(original_day, month_days) - 1,
+        original + step * times_completed,
+    )
+
+
+def expand_recurring_events_batch(
+    original_dates,
+    repeat_intervals,
+    repeat_oftens,
+    start_date: date,
+    end_date: date,
+    min_times_completed=0,
+):  # get recurring event dates of many tasks within a date range
+    """
+    Get the recurring event dates of NumPy arrays of tasks from the start date to the end date, matching iterate_recurring_events.
+    original_dates - the original dates of the tasks.
+    repeat_intervals - the intervals at which the tasks repeat.
+    repeat_oftens - the frequencies at which the tasks repeat.
+    start_date - the first date of the date range.
+    end_date - the last date of the date range.
+    min_times_completed - the smallest number of times completed to include for each task.
+    Return arrays of the task index, number of times completed and date (datetime64) of each event.
+    """
+    original = np.asarray(original_dates, dtype="datetime64[D]")
+    often = np.asarray(repeat_oftens, dtype=np.int64)
+    minimum = np.broadcast_to(
+        np.asarray(min_times_completed, dtype=np.int64), original.shape
+    )  # smallest number of times completed for each task
+    start = np.datetime64(start_date, "D")
+    end = np.datetime64(end_date, "D")
+    by_months = (often == 3) | (often == 4)  # tasks repeating monthly or yearly
+    once = ~by_months & (often != 1) & (often != 2)  # tasks that don't repeat
+    step = np.where(often == 2, 7, np.where(often == 4, 12, 1)) * np.maximum(
+        np.asarray(repeat_intervals, dtype=np.int64), 1
+    )  # number of days or months between events
+    original_month = original.astype("datetime64[M]").astype(np.int64)
+    original_day = (
+        original - original.astype("datetime64[M]").astype("datetime64[D]")
+    ).astype(np.int64) + 1  # days of the month of the original dates
+    start_offset = np.where(
+        by_months,
+        start.astype("datetime64[M]").astype(np.int64) - original_month,
+        (start - original).astype(np.int64),
+    )  # number of days or months from original date to start date
+    end_offset = np.where(
+        by_months,
+        end.astype("datetime64[M]").astype(np.int64) - original_month,
+        (end - original).astype(np.int64),
+    )  # number of days or months from original date to end date
+    first = np.maximum(minimum, -(-start_offset // step))  # first event in range
+    first = np.where(
+        by_months
+        & (
+            recurring_event_dates_batch(
+                original, original_month, original_day, step, by_months, first
+            )
+            < start
+        ),
+        first + 1,
+        first,
+    )  # skip event in the start month before the start date
+    last = end_offset // step  # last event in range
+    last = np.where(
+        by_months
+        & (
+            recurring_event_dates_batch(
+                original, original_month, original_day, step, by_months, last
+            )
+            > end
+        ),
+        last - 1,
+        last,
+    )  # skip event in the end month after the end date
+    in_range = (minimum == 0) & (original >= start) & (original <= end)
+    first = np.where(once, 0, first)
+    last = np.where(once, np.where(in_range, 0, -1), last)
+    counts = np.maximum(last - first + 1, 0)  # number of events for each task
+    task_index = np.repeat(np.arange(len(original)), counts)  # task of each event
+    times_completed = np.repeat(first, counts) + (
+        np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    )  # number of times completed of each event
+    return (
+        task_index,
+        times_completed,
+        recurring_event_dates_batch(
+            original[task_index],
+            original_month[task_index],
+            original_day[task_index],
+            step[task_index],
+            by_months[task_index],
+            times_completed,
+        ),
+    )
+
+
+def calculate_due_multiplier(
+    days_to_due: int, now: datetime
+) -> float:  # calculate due multiplier
+    """
+    Calculate the XP multiplier based on the number of days until the task is due.
+    days_to_due - the number of days until the task is due (negative if the task is overdue).
+    now - the current local time.
+    """
+    if days_to_due > 0:  # if task due date is after today
+        return 1 + 1 / (
+            max(1, days_to_due + 1)
+        )  # set due multiplier that increases over time when the task is closer to due date
+    elif days_to_due < 0:  # if the task is overdue (current date is after task due date)
+        return -2 / (
+            min(-1, days_to_due - 1)
+        )  # set due multiplier that decreases over time when the task is overdue
+    next_midnight: datetime = datetime.combine(
+        now.date() + timedelta(days=1), datetime.min.time()
+    )  # time at next midnight from now
+    return 4 / (
+        1 + (next_midnight - now) / timedelta(days=1)
+    )  # set due multiplier to 2 and increases over time to 4 at midnight
+
+
+def calculate_repeat_multiplier(
+    repeat_interval: int, repeat_often: int
+) -> float:  # calculate repeat multiplier
+    """
+    Calculate the XP multiplier based on how often the task repeats, from 1x for daily tasks to 5x for one-time tasks.
+    repeat_interval - the interval at which the task repeats.
+    repeat_often - the frequency at which the task repeats.
+    """
+    if repeat_often == 1:  # if the task repetition interval is daily
+        if repeat_interval < 7:  # 7 days is 1 week
+            return 1 + (repeat_interval - 1) / (
+                7 - 1
+            )  # 1x XP multiplier for daily tasks (1 day) to 2x XP multiplier for weekly tasks (7 days)
+        elif repeat_interval < 30:  # approximately 30 days is 1 month
+            return 2 + (repeat_interval - 7) / (
+                30 - 7
+            )  # 2x XP multiplier for weekly tasks (7 days) to 3x XP multiplier for monthly tasks (approximately 30 days)
+        elif repeat_interval < 365:  # approximately 365 days is 1 year
+            return 3 + (repeat_interval - 30) / (
+                365 - 30
+            )  # 3x XP multiplier for monthly tasks (approximately 30 days) to 4x XP multiplier for yearly tasks (approximately 365 days)
+        return (
+            5 - 365 / repeat_interval
+        )  # 4x XP multiplier for yearly tasks (approximately 365 days) to 5x XP multiplier for one-time tasks
+    elif repeat_often == 2:  # if the task repetition interval is weekly
+        if repeat_interval < 4:  # approximately 4 weeks is 1 month
+            return 2 + (repeat_interval - 1) / (
+                4 - 1
+            )  # 2x XP multiplier for weekly tasks (1 week) to 3x XP multiplier for monthly tasks (approximately 4 weeks)
+        elif repeat_interval < 52:  # approximately 52 weeks is 1 year
+            return 3 + (repeat_interval - 4) / (
+                52 - 4
+            )  # 3x XP multiplier for monthly tasks (approximately 4 weeks) to 4x XP multiplier for yearly tasks (approximately 52 weeks)
+        return (
+            5 - 52 / repeat_interval
+        )  # 4x XP multiplier for yearly tasks (approximately 52 weeks) to 5x XP multiplier for one-time tasks
+    elif repeat_often == 3:  # if the task repetition interval is monthly
+        if repeat_interval < 12:  # 12 months is 1 year
+            return 3 + (repeat_interval - 1) / (
+                12 - 1
+            )  # 3x XP multiplier for monthly tasks (1 month) to 4x XP multiplier for yearly tasks (12 months)
+        return (
+            5 - 12 / repeat_interval
+        )  # 4x XP multiplier for yearly tasks (12 months) to 5x XP multiplier for one-time tasks
+    elif repeat_often == 4:  # if the task repetition interval is yearly
+        return (
+            5 - 1 / repeat_interval
+        )  # 4x XP multiplier for yearly tasks (1 year) to 5x XP multiplier for one-time tasks
+    return 5  # get 5x XP multiplier for one-time tasks
+
+
+def calculate_completion_rating(
+    rating: float,
+    repeat_multiplier: float,
+    due_multiplier: float,
+    daily_tasks_completed: int,
+) -> float:  # calculate user rating score after completing a task
+    """
+    Calculate the user rating score after completing a task.
+    rating - the user rating score before completing the task.
+    repeat_multiplier - the task repeat multiplier.
+    due_multiplier - the task due multiplier.
+    daily_tasks_completed - the number of tasks completed today.
+    """
+    rating += max(
+        (10 + math.log(max(rating + 100, 100)) ** 2)
+        * repeat_multiplier
+        * ((1 - due_multiplier) if due_multiplier < 1 else (due_multiplier - 1))
+        / max(daily_tasks_completed, 1),
+        0,
+    )  # increase user rating score based on user rating, task repeat multiplier and number of tasks completed today
+    return max(rating, 0)  # make sure the user rating score is not below 0
+
+
+def calculate_completion_xp(
+    priority: int,
+    difficulty: int,
+    repeat_often: int,
+    repeat_multiplier: float,
+    times_completed: int,
+    task_streak: int,
+    due_multiplier: float,
+    tasks_completed: int,
+    active_tasks: int,
+    daily_streak: int,
+    daily_tasks_completed: int,
+    days_completed: int,
+    combo_multiplier: int,
+    time_multiplier: int,
+    time_difference_seconds: float,
+    rating: float,
+) -> int:  # calculate XP for completing a task
+    """
+    Calculate the XP earned for completing a task based on task and user statistics after the completion.
+    priority, difficulty, repeat_often, times_completed and task_streak - the task statistics.
+    repeat_multiplier and due_multiplier - the task repeat and due multipliers.
+    tasks_completed, active_tasks, daily_streak, daily_tasks_completed, days_completed, combo_multiplier, time_multiplier and rating - the user statistics.
+    time_difference_seconds - the number of seconds since the user last completed a task.
+    """
+    return round(
+        (
+            priority
+            * difficulty
+            * repeat_often
+            * repeat_multiplier
+            * (1 + math.log(max(times_completed, 1)))
+            * (1 + math.log(max(tasks_completed, 1)))
+            * (1 + math.log(max(active_tasks, 1)))
+            * (1 + daily_streak / 10)
+            * (1 + daily_tasks_completed / 10)
+            * (1 + math.log(max(days_completed, 1)))
+            * (1 + task_streak / 10)
+            * due_multiplier
+            * (1 + combo_multiplier / 10)
+            * time_multiplier
+            * (1 + 5.0 / (abs(time_difference_seconds) + 1.0))
+            + combo_multiplier
+        )
+        * (1 + math.log(max(rating + 1, 1)))
+    )  # XP based on task and user statistics
+
+
+def calculate_due_multiplier_batch(
+    days_to_due, day_fraction_left
+):  # calculate due multipliers for arrays of tasks
+    """
+    Calculate the XP multipliers for NumPy arrays of tasks, matching calculate_due_multiplier.
+    days_to_due - the number of days until each task is due.
+    day_fraction_left - the fraction of the day left until midnight when each task is completed.
+    """
+    days_to_due = np.asarray(days_to_due, dtype=float)
+    return np.where(
+        days_to_due > 0,
+        1 + 1 / np.maximum(1, days_to_due + 1),
+        np.where(
+            days_to_due < 0,
+            -2 / np.minimum(-1, days_to_due - 1),
+            4 / (1 + np.asarray(day_fraction_left, dtype=float)),
+        ),
+    )
+
+
+def calculate_repeat_multiplier_batch(
+    repeat_interval, repeat_often
+):  # calculate repeat multipliers for arrays of tasks
+    """
+    Calculate the XP multipliers for NumPy arrays of tasks, matching calculate_repeat_multiplier.
+    repeat_interval - the interval at which each task repeats.
+    repeat_often - the frequency at which each task repeats.
+    """
+    interval = np.asarray(repeat_interval, dtype=float)
+    often = np.asarray(repeat_often)
+    with np.errstate(divide="ignore"):
+        return np.select(
+            [
+                (often == 1) & (interval < 7),
+                (often == 1) & (interval < 30),
+                (often == 1) & (interval < 365),
+                often == 1,
+                (often == 2) & (interval < 4),
+                (often == 2) & (interval < 52),
+                often == 2,
+                (often == 3) & (interval < 12),
+                often == 3,
+                often == 4,
+            ],
+            [
+                1 + (interval - 1) / (7 - 1),
+                2 + (interval - 7) / (30 - 7),
+                3 + (interval - 30) / (365 - 30),
+                5 - 365 / interval,
+                2 + (interval - 1) / (4 - 1),
+                3 + (interval - 4) / (52 - 4),
+                5 - 52 / interval,
+                3 + (interval - 1) / (12 - 1),
+                5 - 12 / interval,
+                5 - 1 / interval,
+            ],
+            default=5.0,
+        )
+
+
+def calculate_completion_rating_batch(
+    rating, repeat_multiplier, due_multiplier, daily_tasks_completed
+):  # calculate user rating scores for arrays of completions
+    """
+    Calculate the user rating scores for NumPy arrays of completions, matching calculate_completion_rating.
+    rating - the user rating scores before completing the tasks.
+    repeat_multiplier - the task repeat multipliers.
+    due_multiplier - the task due multipliers.
+    daily_tasks_completed - the number of tasks completed today by each user.
+    """
+    rating = np.asarray(rating, dtype=float)
+    due_multiplier = np.asarray(due_multiplier, dtype=float)
+    rating = rating + np.maximum(
+        (10 + np.log(np.maximum(rating + 100, 100)) ** 2)
+        * repeat_multiplier
+        * np.where(due_multiplier < 1, 1 - due_multiplier, due_multiplier - 1)
+        / np.maximum(daily_tasks_completed, 1),
+        0,
+    )  # increase user rating scores
+    return np.maximum(rating, 0)  # make sure the user rating scores are not below 0
+
+
+def calculate_completion_xp_batch(
+    priority,
+    difficulty,
+    repeat_often,
+    repeat_multiplier,
+    times_completed,
+    task_streak,
+    due_multiplier,
+    tasks_completed,
+    active_tasks,
+    daily_streak,
+    daily_tasks_completed,
+    days_completed,
+    combo_multiplier,
+    time_multiplier,
+    time_difference_seconds,
+    rating,
+):  # calculate XP for arrays of completions
+    """
+    Calculate the XP earned for NumPy arrays of completions, matching calculate_completion_xp.
+    Each argument is an array with one value for each completion.
+    """
+    return np.round(
+        (
+            priority
+            * difficulty
+            * repeat_often
+            * repeat_multiplier
+            * (1 + np.log(np.maximum(times_completed, 1)))
+            * (1 + np.log(np.maximum(tasks_completed, 1)))
+            * (1 + np.log(np.maximum(active_tasks, 1)))
+            * (1 + daily_streak / 10)
+            * (1 + daily_tasks_completed / 10)
+            * (1 + np.log(np.maximum(days_completed, 1)))
+            * (1 + task_streak / 10)
+            * due_multiplier
+            * (1 + combo_multiplier / 10)
+            * time_multiplier
+            * (1 + 5.0 / (np.abs(time_difference_seconds) + 1.0))
+            + combo_multiplier
+        )
+        * (1 + np.log(np.maximum(np.asarray(rating, dtype=float) + 1, 1)))
+    )  # XP based on task and user statistics
+
+
+def simulate_completions(
+    users: int, tasks: int, days: int, completions: int, seed: int
+) -> dict:  # simulate a period of task completions
+    """
+    Simulate task completions for many users at once using the batch scoring functions.
+    Monthly and yearly tasks are approximated as repeating every 30 and 365 days.
+    users - the number of users.
+    tasks - the number of tasks for each user.
+    days - the number of days to simulate.
+    completions - the maximum number of tasks each user completes in a day.
+    seed - the random number generator seed.
+    Return the total XP, level and rating score of each user and the number of completions.
+    """
+    rng = np.random.default_rng(seed)  # random number generator
+    priority = rng.integers(1, 4, (users, tasks))  # task priorities
+    difficulty = rng.integers(1, 4, (users, tasks))  # task difficulties
+    repeat_often = rng.integers(1, 6, (users, tasks))  # task repeat often
+    repeat_interval = rng.integers(1, 8, (users, tasks))  # task repeat intervals
+    repeat_multiplier = calculate_repeat_multiplier_batch(
+        repeat_interval, repeat_often
+    )  # task repeat multipliers
+    repeat_days = (
+        np.array([0, 1, 7, 30, 365, 0])[repeat_often] * repeat_interval
+    )  # approximate number of days between task repetitions
+    original_due_day = rng.integers(0, 30, (users, tasks))  # task original due days
+    due_day = original_due_day.copy()  # task due days
+    times_completed = np.zeros((users, tasks), dtype=int)  # task times completed
+    task_streak = np.zeros((users, tasks), dtype=int)  # task streaks
+    completed = np.zeros((users, tasks), dtype=bool)  # is task completed
+    active_tasks = np.full(users, tasks)  # user number of active tasks
+    tasks_completed = np.zeros(users, dtype=int)  # user number of tasks completed
+    daily_streak = np.zeros(users, dtype=int)  # user daily task streaks
+    daily_tasks_completed = np.zeros(users, dtype=int)  # user tasks completed in a day
+    days_completed = np.zeros(users, dtype=int)  # user days completed with tasks
+    combo_multiplier = np.zeros(users, dtype=int)  # user combo multipliers
+    last_task_completed = np.full(users, -1)  # user last task completed
+    time_multiplier = np.ones(users, dtype=int)  # user time multipliers
+    last_completion_day = np.zeros(users, dtype=int)  # user last completion days
+    rating = np.zeros(users)  # user rating scores
+    total_xp = np.zeros(users)  # user total XP
+    total_completions: int = 0  # number of simulated completions
+    for day in range(days):  # repeat for each day
+        daily_completions = rng.integers(
+            0, completions + 1, users
+        )  # number of tasks each user completes today
+        for step in range(completions):  # repeat for each completion in a day
+            task_index = rng.integers(0, tasks, users)  # task completed by each user
+            rows = np.nonzero(
+                (daily_completions > step)
+                & ~completed[np.arange(users), task_index]
+            )[0]  # users completing an active task
+            if len(rows) == 0:  # if no users complete a task
+                continue
+            total_completions += len(rows)
+            columns = task_index[rows]  # completed tasks
+            one_time = repeat_often[rows, columns] == 5  # is task a one-time task
+            completed[rows, columns] |= one_time  # complete one-time tasks
+            active_tasks[rows] -= one_time  # one-time tasks are no longer active
+            times_completed[rows, columns] += ~one_time  # repeat recurring tasks
+            due_day[rows, columns] = (
+                original_due_day[rows, columns]
+                + repeat_days[rows, columns] * times_completed[rows, columns]
+            )  # calculate next due days
+            due_multiplier = np.where(
+                one_time,
+                1.0,
+                calculate_due_multiplier_batch(
+                    due_day[rows, columns] - day, rng.random(len(rows))
+                ),
+            )  # calculate due multipliers
+            task_streak[rows, columns] = np.where(
+                one_time,
+                task_streak[rows, columns],
+                np.where(
+                    day > due_day[rows, columns], 0, task_streak[rows, columns] + 1
+                ),
+            )  # reset streaks of overdue tasks, increase others by 1
+            tasks_completed[rows] += 1
+            day_difference = day - last_completion_day[rows]  # days since last completion
+            daily_streak[rows] = np.where(
+                day_difference == 1,
+                daily_streak[rows] + 1,
+                np.where(day_difference > 1, 1, daily_streak[rows]),
+            )  # increase or reset daily streaks
+            daily_tasks_completed[rows] = np.where(
+                day_difference >= 1, 1, daily_tasks_completed[rows] + 1
+            )  # reset or increase tasks completed in a day
+            days_completed[rows] += day_difference >= 1  # count new days completed
+            combo_multiplier[rows] = np.where(
+                columns == last_task_completed[rows], combo_multiplier[rows] + 1, 0
+            )  # increase or reset combo multipliers
+            for i in range(int(day_difference.max())):  # repeat for each idle day
+                idle = rows[day_difference > i]  # users idle on this day
+                overdue_tasks = (
+                    due_day[idle] < (last_completion_day[idle] + i)[:, None]
+                ).sum(axis=1)  # number of overdue tasks on this day
+                rating[idle] = np.maximum(
+                    rating[idle]
+                    - np.maximum(
+                        np.sqrt(np.maximum(rating[idle], 0))
+                        * (1 + np.log(i + 1))
+                        * (1 + np.log(overdue_tasks + 1)),
+                        0,
+                    ),
+                    0,
+                )  # decrease user rating scores for each day of inactivity
+            last_completion_day[rows] = day
+            last_task_completed[rows] = columns
+            time_difference_seconds = rng.exponential(
+                900, len(rows)
+            )  # seconds since last completion
+            time_multiplier[rows] = np.where(
+                time_difference_seconds < 5, time_multiplier[rows] + 1, 1
+            )  # increase or reset time multipliers
+            rating[rows] = calculate_completion_rating_batch(
+                rating[rows],
+                repeat_multiplier[rows, columns],
+                due_multiplier,
+                daily_tasks_completed[rows],
+            )  # increase user rating scores
+            total_xp[rows] += calculate_completion_xp_batch(
+                priority[rows, columns],
+                difficulty[rows, columns],
+                repeat_often[rows, columns],
+                repeat_multiplier[rows, columns],
+                times_completed[rows, columns],
+                task_streak[rows, columns],
+                due_multiplier,
+                tasks_completed[rows],
+                active_tasks[rows],
+                daily_streak[rows],
+                daily_tasks_completed[rows],
+                days_completed[rows],
+                combo_multiplier[rows],
+                time_multiplier[rows],
+                time_difference_seconds,
+                rating[rows],
+            )  # add XP for each completion
+    extend_level_table(float(total_xp.max()))  # make sure level table covers total XP
+    level = (
+        np.searchsorted(
+            np.array(level_total_xp, dtype=float), total_xp, side="right"
+        )
+        - 1
+    )  # get the level reached with total XP
+    return {
+        "total_xp": total_xp,
+        "level": level,
+        "rating": rating,
+        "completions": total_completions,
+    }
+
+
+@app.cli.command("sim")
+@click.option(
+    "--users", type=click.IntRange(min=1), default=1000, help="Number of users."
+)
+@click.option(
+    "--tasks",
+    type=click.IntRange(min=1),
+    default=20,
+    help="Number of tasks for each user.",
+)
+@click.option("--days", type=click.IntRange(min=1), default=365, help="Number of days.")
+@click.option(
+    "--completions",
+    type=click.IntRange(min=1),
+    default=5,
+    help="Maximum number of tasks each user completes in a day.",
+)
+@click.option("--seed", type=int, default=0, help="Random number generator seed.")
+def simulate_command(
+    users: int, tasks: int, days: int, completions: int, seed: int
+) -> None:  # simulate task completions command
+    """
+    Simulate task completions for many users to tune the XP and rating score formulas.
+    """
+    start_time: float = time.perf_counter()  # get simulation start time
+    results: dict = simulate_completions(
+        users, tasks, days, completions, seed
+    )  # simulate task completions
+    seconds: float = time.perf_counter() - start_time  # simulation time
+    click.echo(
+        f"Simulated {results['completions']:,} completions for {users:,} users"
+        f" over {days:,} days in {seconds:.2f} seconds"
+    )
+    for name in ("total_xp", "level", "rating"):  # repeat for each statistic
+        values = results[name]
+        click.echo(
+            f"{name}: min {short_numeric_filter(float(values.min()))},"
+            f" median {short_numeric_filter(float(np.median(values)))},"
+            f" max {short_numeric_filter(float(values.max()))}"
+        )  # display statistic distribution
+
+
+def get_overdue_task_counts(
+    user_id: int, start_date: date, days: int
+) -> list[int]:  # get number of overdue tasks for each day of inactivity
+    """
+    Get the number of the user's overdue tasks for each day of inactivity using a single grouped query.
+    user_id - the ID of the user that owns the tasks.
+    start_date - the first day of inactivity.
+    days - the number of days of inactivity.
+    """
+    end_date: date = start_date + timedelta(
+        days=max(days - 1, 0)
+    )  # get the last day of inactivity
+    due_date_counts: list = (
+        db.session.query(Task.due_date, func.count(Task.id))
+        .filter(Task.user_id == user_id, Task.due_date < end_date)
+        .group_by(Task.due_date)
+        .order_by(Task.due_date)
+        .all()
+    )  # get number of tasks for each due date before the last day of inactivity
+    due_dates: list[date] = [
+        due_date for due_date, _ in due_date_counts
+    ]  # get sorted list of due dates
+    cumulative_counts: list[int] = [0]  # number of tasks due before each due date
+    for _, count in due_date_counts:  # repeat for each due date
+        cumulative_counts.append(cumulative_counts[-1] + count)
+    return [
+        cumulative_counts[bisect_left(due_dates, start_date + timedelta(days=i))]
+        for i in range(days)
+    ]  # get number of overdue tasks (due date is before each day of inactivity)
+
+
+def calculate_inactivity_rating_decay(
+    rating: float, overdue_task_counts: list[int]
+) -> float:  # calculate user rating score after days of inactivity
+    """
+    Calculate the user rating score after decreasing it for each day of inactivity.
+    rating - the user rating score before inactivity.
+    overdue_task_counts - the number of overdue tasks for each day of inactivity.
+    """
+    for i, overdue_tasks in enumerate(
+        overdue_task_counts
+    ):  # repeat for each day of inactivity
+        if rating <= 0:  # rating score can't decrease below 0
+            break
+        rating -= max(
+            (
+                math.sqrt(max(rating, 0))
+                * (1 + math.log(max(i + 1, 1)))
+                * (1 + math.log(max(overdue_tasks + 1, 1)))
+            ),
+            0,
+        )  # decrease the user rating score for each day of inactivity
+        rating = max(rating, 0)  # make sure the user rating score is not below 0
+    return rating
+
+
+user_column_definitions: dict[str, str] = {
+    "tasks_completed": "INT NOT NULL DEFAULT 0",
+    "last_completion_date": "DATE NOT NULL DEFAULT CURRENT_DATE",
+    "daily_streak": "INT NOT NULL DEFAULT 1",
+    "daily_tasks_completed": "INT NOT NULL DEFAULT 0",
+    "days_completed": "INT NOT NULL DEFAULT 1",
+    "combo_multiplier": "INT NOT NULL DEFAULT 0",
+    "last_task_completed": "INT NOT NULL DEFAULT -1",
+    "last_time_clicked": "TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP",
+    "time_multiplier": "INT NOT NULL DEFAULT 1",
+    "rating": "FLOAT NOT NULL DEFAULT 0",
+    "active_tasks": "INT NOT NULL DEFAULT 0",
+    "data_version": "INT NOT NULL DEFAULT 0",
+    "data_modified": "TIMESTAMP",
+    "agenda_until": "DATE",
+    "password_hash": "VARCHAR(256)",
+}  # user columns added after the user table was created
+task_column_definitions: dict[str, str] = {
+    "original_due_date": "DATE NOT NULL DEFAULT CURRENT_DATE",
+    "due_date": "DATE NOT NULL DEFAULT CURRENT_DATE",
+    "priority": "INT NOT NULL DEFAULT 1",
+    "difficulty": "INT NOT NULL DEFAULT 1",
+    "repeat_interval": "INT NOT NULL DEFAULT 1",
+    "repeat_often": "INT NOT NULL DEFAULT 5",
+    "times_completed": "INT NOT NULL DEFAULT 0",
+    "streak": "INT NOT NULL DEFAULT 0",
+}  # task columns added after the task table was created
+queued_completion_column_definitions: dict[str, str] = {
+    "failed_at": "TIMESTAMP",
+}  # queued completion columns added after the queued completion table was created
+
+
+def get_add_column_sql(
+    table_name: str, column_name: str, column_definition: str, dialect
+) -> str:  # get SQL to add a column
+    """
+    Get the ALTER TABLE statement that adds the column, quoting the table name for the database, such as "user" on PostgreSQL.
+    table_name - the name of the table.
+    column_name - the name of the column.
+    column_definition - the column type and constraints.
+    dialect - the SQLAlchemy dialect of the database.
+    """
+    return (
+        f"ALTER TABLE {dialect.identifier_preparer.quote(table_name)}"
+        f" ADD COLUMN {column_name} {column_definition}"
+    )
+
+
+def add_missing_columns(
+    table_name: str, existing_columns: set[str], column_definitions: dict[str, str]
+) -> list[str]:  # add missing columns to the table
+    """
+    Add the columns that are not in the table yet.
+    table_name - the name of the table.
+    existing_columns - the names of the columns already in the table.
+    column_definitions - the column definitions for each column name.
+    Return the names of the added columns.
+    """
+    added_columns: list[str] = []  # names of the added columns
+    for (
+        column_name,
+        column_definition,
+    ) in column_definitions.items():  # repeat for each column
+        if column_name not in existing_columns:  # if column is not in the table
+            db.session.execute(
+                text(
+                    get_add_column_sql(
+                        table_name, column_name, column_definition, db.engine.dialect
+                    )
+                )
+            )  # create column
+            added_columns.append(column_name)
+    return added_columns
+
+
 def init_db() -> None:  # initialize database
     """
     Initialize the user and task database.
     """
     with app.app_context():
         db.create_all()  # create tables if they don't exist
-        if "tasks_completed" not in [
-            column["name"] for column in db.inspect(db.engine).get_columns("user")
-        ]:  # check if tasks completed column is not in the user table
-            db.session.execute(
-                text(
-                    "ALTER TABLE user ADD COLUMN tasks_completed INT NOT NULL DEFAULT 0"
-                )
-            )  # create tasks completed column
-        if "last_completion_date" not in [
-            column["name"] for column in db.inspect(db.engine).get_columns("user")
-        ]:  # check if the last completion date column is not in the user table
-            db.session.execute(
-                text(
-                    "ALTER TABLE user ADD COLUMN last_completion_date DATE NOT NULL DEFAULT CURRENT_DATE"
-                )
-            )  # create last completion date column
-            db.session.commit()  # commit database changes
-        if "daily_streak" not in [
-            column["name"] for column in db.inspect(db.engine).get_columns("user")
-        ]:  # check if tasks completed column is not in the user table
-            db.session.execute(
-                text("ALTER TABLE user ADD COLUMN daily_streak INT NOT NULL DEFAULT 1")
-            )  # create tasks completed column
-        if "daily_tasks_completed" not in [
-            column["name"] for column in db.inspect(db.engine).get_columns("user")
-        ]:  # check if daily tasks completed column is not in the user table
-            db.session.execute(
-                text(
-                    "ALTER TABLE user ADD COLUMN daily_tasks_completed INT NOT NULL DEFAULT 0"
-                )
-            )  # create daily tasks completed column
-        if "days_completed" not in [
-            column["name"] for column in db.inspect(db.engine).get_columns("user")
-        ]:  # check if days completed column is not in the user table
-            db.session.execute(
-                text(
-                    "ALTER TABLE user ADD COLUMN days_completed INT NOT NULL DEFAULT 1"
-                )
-            )  # create days completed column
-        if "combo_multiplier" not in [
-            column["name"] for column in db.inspect(db.engine).get_columns("user")
-        ]:  # check if combo multiplier column is not in the user table
-            db.session.execute(
-                text(
-                    "ALTER TABLE user ADD COLUMN combo_multiplier INT NOT NULL DEFAULT 0"
-                )
-            )  # create combo multiplier column
-        if "last_task_completed" not in [
-            column["name"] for column in db.inspect(db.engine).get_columns("user")
-        ]:  # check if last task completed column is not in the user table
-            db.session.execute(
-                text(
-                    "ALTER TABLE user ADD COLUMN last_task_completed INT NOT NULL DEFAULT -1"
-                )
-            )  # create last task completed column
-        if "last_time_clicked" not in [
-            column["name"] for column in db.inspect(db.engine).get_columns("user")
-        ]:  # check if last time clicked column is not in the user table
-            db.session.execute(
-                text(
-                    "ALTER TABLE user ADD COLUMN last_time_clicked TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP"
-                )
-            )  # create last time clicked column
-        if "time_multiplier" not in [
-            column["name"] for column in db.inspect(db.engine).get_columns("user")
-        ]:  # check if time multiplier column is not in the user table
-            db.session.execute(
-                text(
-                    "ALTER TABLE user ADD COLUMN time_multiplier INT NOT NULL DEFAULT 1"
-                )
-            )  # create time multipler column
-        if "rating" not in [
-            column["name"] for column in db.inspect(db.engine).get_columns("user")
-        ]:  # check if rating score column is not in the user table
-            db.session.execute(
-                text("ALTER TABLE user ADD COLUMN rating FLOAT NOT NULL DEFAULT 0")
-            )  # create rating score column
-        if User.query.count() == 0:  # if there are no users
-            new_user = User(
-                username="Player",
-                xp=0,
-                xp_required=1,
-                total_xp=0,
-                level=1,
-                tasks_completed=0,
-                last_completion_date=func.current_date(),
-                daily_streak=0,
-                daily_tasks_completed=0,
-                days_completed=0,
-                combo_multiplier=0,
-                last_task_completed=-1,
-                last_time_clicked=func.current_timestamp(),
-                time_multiplier=1,
-                rating=0,
-            )  # create new user
-            db.session.add(new_user)  # add new user to the database
-            db.session.commit()  # commit database changes
-        if "original_due_date" not in [
-            column["name"] for column in db.inspect(db.engine).get_columns("task")
-        ]:  # check if the original due date column is not in the task table
-            db.session.execute(
-                text(
-                    "ALTER TABLE task ADD COLUMN original_due_date DATE NOT NULL DEFAULT CURRENT_DATE"
-                )
-            )  # create original due date column
-            db.session.commit()  # commit database changes
-        if "due_date" not in [
-            column["name"] for column in db.inspect(db.engine).get_columns("task")
-        ]:  # check if due date column is not in the task table
-            db.session.execute(
-                text(
-                    "ALTER TABLE task ADD COLUMN due_date DATE NOT NULL DEFAULT CURRENT_DATE"
-                )
-            )  # create due date column
-            db.session.commit()  # commit database changes
-        if "priority" not in [
-            column["name"] for column in db.inspect(db.engine).get_columns("task")
-        ]:  # check if priority column is not in the task table
-            db.session.execute(
-                text("ALTER TABLE task ADD COLUMN priority INT NOT NULL DEFAULT 1")
-            )  # create priority column
-        if "difficulty" not in [
-            column["name"] for column in db.inspect(db.engine).get_columns("task")
-        ]:  # check if difficulty column is not in the task table
-            db.session.execute(
-                text("ALTER TABLE task ADD COLUMN difficulty INT NOT NULL DEFAULT 1")
-            )  # create difficulty column
-        if "repeat_interval" not in [
-            column["name"] for column in db.inspect(db.engine).get_columns("task")
-        ]:  # check if repeat interval column is not in the task table
-            db.session.execute(
-                text(
-                    "ALTER TABLE task ADD COLUMN repeat_interval INT NOT NULL DEFAULT 1"
-                )
-            )  # create repeat interval column
-        if "repeat_often" not in [
-            column["name"] for column in db.inspect(db.engine).get_columns("task")
-        ]:  # check if repeat often column is not in the task table
-            db.session.execute(
-                text("ALTER TABLE task ADD COLUMN repeat_often INT NOT NULL DEFAULT 5")
-            )  # create repeat often column
-        if "times_completed" not in [
-            column["name"] for column in db.inspect(db.engine).get_columns("task")
-        ]:  # check if times completed column is not in the task table
-            db.session.execute(
-                text(
-                    "ALTER TABLE task ADD COLUMN times_completed INT NOT NULL DEFAULT 0"
-                )
-            )  # create times completed column
-        if "streak" not in [
-            column["name"] for column in db.inspect(db.engine).get_columns("task")
-        ]:  # check if streak column is not in the task table
-            db.session.execute(
-                text("ALTER TABLE task ADD COLUMN streak INT NOT NULL DEFAULT 0")
-            )  # create streak column
-        tasks: list = Task.query.all()  # get the list of tasks
-        for task in tasks:  # repeat for each task
-            if (
-                task.original_due_date is None
-            ):  # check if task original due date is none
-                task.original_due_date = (
-                    date.today()
-                )  # set task original due date to today's date
-            if task.due_date is None:  # check if task due date is none
-                task.due_date = date.today()  # set task due date to today's date
-            if task.priority is None:  # check if task priority is none
-                task.priority = 1  # set task priority to low
-            if task.difficulty is None:  # check if task difficulty is none
-                task.difficulty = 1  # set task difficulty to low
-            if task.repeat_interval is None:  # check if the repeat interval is none
-                task.repeat_interval = 1  # set repeat interval to 1
-            if task.repeat_often is None:  # check if repeat often is none
-                task.repeat_often = 1  # set repeat often to once
+        inspector = db.inspect(
+            db.session.connection()
+        )  # inspect the database once for all tables
+        added_user_columns: list[str] = add_missing_columns(
+            "user",
+            {column["name"] for column in inspector.get_columns("user")},
+            user_column_definitions,
+        )  # create missing user columns
+        add_missing_columns(
+            "task",
+            {column["name"] for column in inspector.get_columns("task")},
+            task_column_definitions,
+        )  # create missing task columns
+        add_missing_columns(
+            "queued_completion",
+            {column["name"] for column in inspector.get_columns("queued_completion")},
+            queued_completion_column_definitions,
+        )  # create missing queued completion columns
+        for index in Task.__table__.indexes:  # repeat for each task index
+            index.create(
+                db.session.connection(), checkfirst=True
+            )  # create task index if it doesn't exist
+        for column, value in (
+            (Task.original_due_date, date.today()),  # set to today's date
+            (Task.due_date, date.today()),  # set to today's date
+            (Task.priority, 1),  # set task priority to low
+            (Task.difficulty, 1),  # set task difficulty to low
+            (Task.repeat_interval, 1),  # set repeat interval to 1
+            (Task.repeat_often, 1),  # set repeat often to once
+        ):  # repeat for each task column that can't be none
+            Task.query.filter(column.is_(None)).update(
+                {column: value}, synchronize_session=False
+            )  # set task column to default value where it is none
+        if "active_tasks" in added_user_columns:  # if active tasks column is new
+            recount_active_tasks()  # count active tasks for each user
+        db.session.execute(
+            UserSnapshot.__table__.insert().from_select(
+                ["user_id", "event_id", *user_stats_columns],
+                db.select(
+                    User.id,
+                    func.coalesce(
+                        db.select(func.max(CompletionEvent.id))
+                        .where(CompletionEvent.user_id == User.id)
+                        .scalar_subquery(),
+                        0,
+                    ),
+                    *(getattr(User, column) for column in user_stats_columns),
+                ).where(
+                    ~db.select(UserSnapshot.id)
+                    .where(UserSnapshot.user_id == User.id)
+                    .exists()
+                ),
+            )
+        )  # save the stats of users without snapshots as their first snapshot
         db.session.commit()  # commit database changes
+        db.engine.dispose()  # close connections so forked server workers open their own
 
 
 if __name__ == "__main__" or __name__ == "app":
     init_db()  # initialize database
-    app.run(debug=True, port=8081)  # run the server at port 8081
+    if __name__ == "__main__" or getattr(
+        click.get_current_context(silent=True), "info_name", None
+    ) == "run":  # don't run the server for other Flask CLI commands or WSGI servers
+        app.run(debug=True, port=8081)  # run the server at port 8081
@@ -0,0 +1,3 @@
+"""
+Benchmarks for the task list app, run with python -m benchmarks.run.
+"""
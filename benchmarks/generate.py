@@ -0,0 +1,204 @@
+"""
+Fill the app database with users and tasks for benchmarks, using a seeded random number generator so each run gets the same data.
+"""
+
+from datetime import date, timedelta
+import os
+import random
+import time
+import click
+from sqlalchemy import func, insert
+from sqlalchemy.exc import IntegrityError
+from werkzeug.security import generate_password_hash
+
+os.environ.setdefault(
+    "SECRET_KEY", "benchmark"
+)  # the app needs a secret key to be imported
+from app import (  # noqa: E402
+    Task,
+    User,
+    UserSnapshot,
+    app,
+    calculate_next_recurring_event,
+    db,
+    get_user_snapshot,
+    init_db,
+)
+
+
+repeat_often_weights: dict[int, int] = {
+    1: 30,  # daily
+    2: 25,  # weekly
+    3: 15,  # monthly
+    4: 5,  # yearly
+    5: 25,  # once
+}  # share of tasks with each repeat often
+repeat_interval_weights: dict[int, int] = {
+    1: 70,
+    2: 15,
+    3: 10,
+    7: 5,
+}  # share of recurring tasks with each repeat interval
+repeat_days: dict[int, int] = {
+    1: 1,
+    2: 7,
+    3: 30,
+    4: 365,
+}  # approximate number of days between repetitions of each repeat often
+password: str = "benchmark"  # password of each generated user
+
+
+def generate_task(
+    rng: random.Random, user_id: int, today: date
+) -> tuple[dict, bool]:  # generate a random task
+    """
+    Generate a random task with a realistic due date: recurring tasks started up to two years ago and some have fallen behind, one-time tasks are due within a few weeks of today and some are completed.
+    rng - the random number generator.
+    user_id - the ID of the user that owns the task.
+    today - the date the data is generated for.
+    Return the task column values and whether the task is active.
+    """
+    repeat_often: int = rng.choices(
+        list(repeat_often_weights), list(repeat_often_weights.values())
+    )[0]  # get task repeat often
+    priority: int = rng.randint(1, 3)  # get task priority
+    difficulty: int = rng.randint(1, 3)  # get task difficulty
+    if repeat_often == 5:  # if task is a one-time task
+        due_date: date = today + timedelta(
+            days=round(rng.gauss(7, 30))
+        )  # due within a few weeks of today
+        completed: bool = rng.random() < 0.3  # complete some one-time tasks
+        return {
+            "user_id": user_id,
+            "name": f"Task {rng.randrange(1_000_000)}",
+            "original_due_date": due_date,
+            "due_date": due_date,
+            "priority": priority,
+            "difficulty": difficulty,
+            "repeat_interval": 1,
+            "repeat_often": 5,
+            "times_completed": 0,
+            "streak": 0,
+            "completed": completed,
+        }, not completed
+    repeat_interval: int = rng.choices(
+        list(repeat_interval_weights), list(repeat_interval_weights.values())
+    )[0]  # get task repeat interval
+    days_ago: int = min(
+        int(rng.expovariate(1 / 90)), 730
+    )  # started up to two years ago, most of them recently
+    original_due_date: date = today - timedelta(days=days_ago)  # first due date
+    repetitions: int = days_ago // (
+        repeat_days[repeat_often] * repeat_interval
+    )  # number of repetitions until today
+    times_completed: int = (
+        repetitions if rng.random() < 0.7 else rng.randint(0, repetitions)
+    )  # most tasks are up to date, the rest have fallen behind
+    return {
+        "user_id": user_id,
+        "name": f"Task {rng.randrange(1_000_000)}",
+        "original_due_date": original_due_date,
+        "due_date": calculate_next_recurring_event(
+            original_due_date, times_completed, repeat_interval, repeat_often
+        ),
+        "priority": priority,
+        "difficulty": difficulty,
+        "repeat_interval": repeat_interval,
+        "repeat_often": repeat_often,
+        "times_completed": times_completed,
+        "streak": rng.randint(0, times_completed),
+        "completed": False,
+    }, True
+
+
+def generate_data(
+    users: int, tasks: int, seed: int, batch_size: int = 10000
+) -> list[int]:  # fill database with users and tasks
+    """
+    Add users and their tasks to the app database, named bench-0, bench-1 and so on with the password "benchmark".
+    users - the number of users.
+    tasks - the number of tasks for each user.
+    seed - the random number generator seed.
+    batch_size - the number of tasks to insert at once.
+    Return the IDs of the new users.
+    """
+    init_db()  # create tables if they don't exist
+    rng = random.Random(seed)  # random number generator
+    today: date = date.today()  # generate tasks due around today
+    password_hash: str = generate_password_hash(
+        password
+    )  # hash the password once, it is slow on purpose
+    user_ids: list[int] = []  # IDs of the new users
+    with app.app_context():
+        for index in range(users):  # repeat for each user
+            user = User(
+                username=f"bench-{index}",
+                password_hash=password_hash,
+                xp=0,
+                xp_required=1,
+                total_xp=0,
+                level=1,
+                tasks_completed=0,
+                last_completion_date=func.current_date(),
+                daily_streak=0,
+                daily_tasks_completed=0,
+                days_completed=0,
+                combo_multiplier=0,
+                last_task_completed=-1,
+                last_time_clicked=func.current_timestamp(),
+                time_multiplier=1,
+                rating=0,
+                active_tasks=0,
+                data_version=0,
+            )  # create new user the same way as signing up
+            db.session.add(user)
+            db.session.flush()  # get the new user ID and stats
+            db.session.execute(
+                insert(UserSnapshot), [get_user_snapshot(user, 0)]
+            )  # save user stats before the first completion
+            batch: list[dict] = []  # tasks to insert
+            for _ in range(tasks):  # repeat for each task
+                task, active = generate_task(rng, user.id, today)
+                batch.append(task)
+                user.active_tasks += active  # count active tasks
+                if len(batch) >= batch_size:  # if batch is full
+                    db.session.execute(insert(Task), batch)  # insert batch of tasks
+                    batch = []
+            if batch:  # if any tasks are left
+                db.session.execute(insert(Task), batch)  # insert remaining tasks
+            user.mark_data_changed()  # task list has changed
+            user_ids.append(user.id)
+        db.session.commit()  # commit database changes
+    return user_ids
+
+
+@click.command()
+@click.option(
+    "--users", type=click.IntRange(min=1), default=10, help="Number of users."
+)
+@click.option(
+    "--tasks",
+    type=click.IntRange(min=0),
+    default=1000,
+    help="Number of tasks for each user.",
+)
+@click.option("--seed", type=int, default=0, help="Random number generator seed.")
+def generate_command(users: int, tasks: int, seed: int) -> None:  # generate data command
+    """
+    Fill the database set in DATABASE_URL, or instance/app.db, with users and tasks for benchmarks.
+    """
+    start_time: float = time.perf_counter()  # get generation start time
+    try:
+        generate_data(users, tasks, seed)  # fill database
+    except IntegrityError:  # if the database already has generated users
+        raise click.ClickException(
+            "The database already has benchmark users, use an empty database."
+        )
+    click.echo(
+        f"Generated {users:,} users with {tasks:,} tasks each"
+        f" in {time.perf_counter() - start_time:.2f} seconds"
+    )
+
+
+if __name__ == "__main__":
+    generate_command()
@@ -0,0 +1,145 @@
+"""
+Time and measure the memory of loading and rendering a large task list page, comparing full Task objects with the task rows used by the index page.
+"""
+
+import json
+import tracemalloc
+from typing import Callable, Union
+import click
+from markupsafe import Markup
+
+from benchmarks.run import clear_caches, measure  # sets up a new database
+from app import Task, app, get_task_page, render_task_html
+from benchmarks.generate import generate_data, password
+
+
+def load_task_objects(user_id: int, tasks: int) -> list:  # load full task objects
+    """
+    Load the user's active tasks sorted by due date as full Task objects, the way the index page loaded them before task rows.
+    user_id - the ID of the user that owns the tasks.
+    tasks - the maximum number of tasks.
+    """
+    return (
+        Task.query.filter(Task.user_id == user_id, Task.completed.is_(False))
+        .order_by(Task.due_date, Task.id)
+        .limit(tasks)
+        .all()
+    )
+
+
+def load_task_rows(user_id: int, tasks: int) -> list:  # load task rows
+    """
+    Load the user's active tasks sorted by due date the way the index page does.
+    user_id - the ID of the user that owns the tasks.
+    tasks - the maximum number of tasks.
+    """
+    return get_task_page(user_id, tasks, False)[0]
+
+
+def measure_memory(
+    load: Callable[[int, int], list], user_id: int, tasks: int
+) -> tuple[int, int]:  # measure memory of loading and rendering tasks
+    """
+    Measure the memory allocated while loading and rendering the tasks, with empty caches.
+    load - the function to load the tasks.
+    user_id - the ID of the user that owns the tasks.
+    tasks - the maximum number of tasks.
+    Return the memory in bytes held by the loaded tasks and the peak memory in bytes while loading and rendering them.
+    """
+    clear_caches()  # render each task again
+    with app.test_request_context():  # task HTML has URLs
+        tracemalloc.start()
+        loaded: list = load(user_id, tasks)  # load tasks
+        held: int = tracemalloc.get_traced_memory()[0]  # memory held by the tasks
+        Markup("").join(render_task_html(task) for task in loaded)  # render tasks
+        peak: int = tracemalloc.get_traced_memory()[1]  # peak memory
+        tracemalloc.stop()
+    return held, peak
+
+
+@click.command()
+@click.option(
+    "--tasks",
+    type=click.IntRange(min=1),
+    default=50000,
+    help="Number of tasks on the page.",
+)
+@click.option(
+    "--rounds",
+    type=click.IntRange(min=2),
+    default=5,
+    help="Number of timed runs of each benchmark.",
+)
+@click.option("--seed", type=int, default=0, help="Random number generator seed.")
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, writable=True),
+    help="File to save the results in as JSON, or standard output by default.",
+)
+def index_page_command(
+    tasks: int, rounds: int, seed: int, output: Union[str, None]
+) -> None:  # run index page benchmarks command
+    """
+    Time loading and rendering a page of all of a user's tasks, and measure its memory, against a new database.
+    """
+    user_id: int = generate_data(1, tasks, seed)[0]  # fill database
+    app.config["TASKS_PER_PAGE"] = tasks  # show all tasks on one page
+    results: list[dict] = []  # results of each benchmark
+    memory: dict = {}  # memory held and peak memory of each way to load tasks
+    for name, load in (
+        ("task_objects", load_task_objects),
+        ("task_rows", load_task_rows),
+    ):  # repeat for each way to load tasks
+
+        def load_tasks() -> None:  # load tasks in an app context
+            """
+            Load the tasks, without rendering them.
+            """
+            with app.test_request_context():  # task HTML has URLs
+                load(user_id, tasks)
+
+        def render_tasks() -> None:  # load and render tasks in an app context
+            """
+            Load and render the tasks, with empty caches.
+            """
+            with app.test_request_context():  # task HTML has URLs
+                Markup("").join(
+                    render_task_html(task) for task in load(user_id, tasks)
+                )
+
+        results.append(measure(f"load_{name}", load_tasks, rounds))
+        results.append(
+            measure(f"render_{name}", render_tasks, rounds, setup=clear_caches)
+        )
+        held, peak = measure_memory(load, user_id, tasks)
+        memory[name] = {"held_bytes": held, "peak_bytes": peak}
+    client = app.test_client()  # client logged in as the generated user
+    client.post("/login", data={"username": "bench-0", "password": password})
+    results.append(
+        measure("index_render", lambda: client.get("/"), rounds, setup=clear_caches)
+    )  # render the whole index page
+    for result in results:  # repeat for each benchmark
+        click.echo(
+            f"{result['name']:25} median {result['stats']['median'] * 1000:10.1f} ms",
+            err=True,
+        )
+    for name, usage in memory.items():  # repeat for each way to load tasks
+        click.echo(
+            f"{name:25} held {usage['held_bytes'] / 2**20:8.1f} MiB,"
+            f" peak {usage['peak_bytes'] / 2**20:8.1f} MiB",
+            err=True,
+        )
+    report: dict = {
+        "params": {"tasks": tasks, "rounds": rounds, "seed": seed},
+        "benchmarks": results,
+        "memory": memory,
+    }  # results with the run settings
+    if output:  # if saving results to a file
+        with open(output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        click.echo(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    index_page_command()
@@ -0,0 +1,142 @@
+"""
+Time init_db on its own against a populated database as the task table grows, to check that startup takes the same time however many tasks there are.
+"""
+
+from datetime import date
+import json
+import random
+import sys
+from typing import Union
+import click
+from sqlalchemy import event, insert
+
+from benchmarks.run import measure  # sets up a new database
+from app import Task, app, db, init_db, recount_active_tasks
+from benchmarks.generate import generate_data, generate_task
+
+
+def add_tasks(user_id: int, tasks: int, rng: random.Random) -> None:  # add tasks
+    """
+    Add generated tasks to the user's task list and recount the active tasks.
+    user_id - the ID of the user that owns the tasks.
+    tasks - the number of tasks to add.
+    rng - the random number generator.
+    """
+    today: date = date.today()  # generate tasks due around today
+    with app.app_context():
+        for start in range(0, tasks, 10000):  # repeat for each batch of tasks
+            db.session.execute(
+                insert(Task),
+                [
+                    generate_task(rng, user_id, today)[0]
+                    for _ in range(min(10000, tasks - start))
+                ],
+            )  # insert batch of tasks
+        recount_active_tasks()  # count the added tasks
+        db.session.commit()  # commit database changes
+
+
+def count_statements() -> int:  # count SQL statements of init_db
+    """
+    Run init_db and count the SQL statements it executes, including the schema reflection.
+    Return the number of statements.
+    """
+    statements: list[int] = [0]  # number of statements
+
+    def count_statement(
+        conn, cursor, statement, parameters, context, executemany
+    ) -> None:  # count statement
+        """
+        Count the statement.
+        """
+        statements[0] += 1
+
+    with app.app_context():
+        engine = db.engine  # engine used by init_db
+    event.listen(engine, "before_cursor_execute", count_statement)
+    try:
+        init_db()
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
+    return statements[0]
+
+
+@click.command()
+@click.option(
+    "--sizes",
+    default="1000,10000,100000",
+    help="Comma separated numbers of tasks in the database to time init_db at.",
+)
+@click.option(
+    "--rounds",
+    type=click.IntRange(min=2),
+    default=10,
+    help="Number of timed runs at each size.",
+)
+@click.option("--seed", type=int, default=0, help="Random number generator seed.")
+@click.option(
+    "--threshold",
+    type=click.FloatRange(min=1),
+    default=2.0,
+    help="Ratio of the median times at the largest and smallest sizes above which the benchmark fails.",
+)
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, writable=True),
+    help="File to save the results in as JSON, or standard output by default.",
+)
+def init_db_command(
+    sizes: str, rounds: int, seed: int, threshold: float, output: Union[str, None]
+) -> None:  # run init_db benchmark command
+    """
+    Time init_db against a new database with more and more tasks, and count the SQL statements it runs at each size.
+    """
+    try:
+        task_counts: list[int] = sorted(
+            {int(size) for size in sizes.split(",")}
+        )  # numbers of tasks to time init_db at
+    except ValueError:  # if a size isn't a number
+        raise click.BadParameter("sizes must be whole numbers", param_hint="--sizes")
+    if not task_counts or task_counts[0] < 0:  # if there are no valid sizes
+        raise click.BadParameter("sizes can't be negative", param_hint="--sizes")
+    rng = random.Random(seed)  # random number generator
+    user_id: int = generate_data(1, 0, seed)[0]  # user that owns the tasks
+    results: list[dict] = []  # results at each size
+    total: int = 0  # number of tasks in the database
+    for count in task_counts:  # repeat for each size
+        add_tasks(user_id, count - total, rng)
+        total = count
+        result: dict = measure(f"init_db_{count}_tasks", init_db, rounds)
+        result["tasks"] = count
+        result["statements"] = count_statements()
+        results.append(result)
+        click.echo(
+            f"{count:>10,} tasks: median {result['stats']['median'] * 1000:8.3f} ms,"
+            f" {result['statements']} statements",
+            err=True,
+        )
+    ratio: float = (
+        results[-1]["stats"]["median"] / results[0]["stats"]["median"]
+    )  # growth of the startup time with the table size
+    click.echo(
+        f"x{ratio:.2f} from {task_counts[0]:,} to {task_counts[-1]:,} tasks", err=True
+    )
+    report: dict = {
+        "params": {"sizes": task_counts, "rounds": rounds, "seed": seed},
+        "benchmarks": results,
+        "ratio": ratio,
+    }  # results with the run settings
+    if output:  # if saving results to a file
+        with open(output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        click.echo(json.dumps(report, indent=2))
+    if (
+        len({result["statements"] for result in results}) > 1 or ratio > threshold
+    ):  # if init_db does more work with more tasks
+        click.echo("init_db grows with the number of tasks", err=True)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    init_db_command()
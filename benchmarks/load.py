@@ -0,0 +1,445 @@
+"""
+Load test the app with many concurrent clients that view the task list, add tasks and complete tasks, and report the latency percentiles, throughput and errors.
+"""
+
+import atexit
+from datetime import date, datetime, timezone
+from http.client import HTTPConnection
+from http.cookies import SimpleCookie
+import json
+import logging
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from typing import Union
+from urllib.parse import urlencode, urlsplit
+import click
+
+
+operations: tuple[str, ...] = (
+    "index",
+    "add",
+    "complete",
+)  # operations run by the load test clients
+
+
+class LoadClient:
+    """
+    A client that sends requests to the app as one user over a persistent connection.
+    """
+
+    def __init__(self, host: str, port: int) -> None:  # create client
+        """
+        Create a client that isn't logged in yet.
+        host - the host name of the server.
+        port - the port of the server.
+        """
+        self.connection = HTTPConnection(
+            host, port, timeout=60
+        )  # reconnects when the server closes the connection
+        self.cookie: str = ""  # session cookie sent with each request
+
+    def request(
+        self, method: str, path: str, body: Union[bytes, None] = None, content_type: str = ""
+    ) -> tuple[int, bytes]:  # send request
+        """
+        Send a request and read the response.
+        method - the HTTP method.
+        path - the path of the request.
+        body - the request body, or None.
+        content_type - the content type of the request body.
+        Return the response status code and body.
+        """
+        headers: dict[str, str] = {"Cookie": self.cookie} if self.cookie else {}
+        if content_type:  # if request has a body
+            headers["Content-Type"] = content_type
+        try:
+            self.connection.request(method, path, body, headers)
+            response = self.connection.getresponse()
+            return response.status, response.read()
+        except OSError:  # if the connection failed, reconnect for the next request
+            self.connection.close()
+            raise
+
+    def login(self, username: str, password: str) -> None:  # log in
+        """
+        Log in as the user and keep the session cookie.
+        Later session changes, such as flashed messages, aren't kept so the cookie doesn't grow.
+        username - the username.
+        password - the password.
+        """
+        self.connection.request(
+            "POST",
+            "/login",
+            urlencode({"username": username, "password": password}),
+            {"Content-Type": "application/x-www-form-urlencoded"},
+        )
+        response = self.connection.getresponse()
+        response.read()
+        cookie = SimpleCookie(response.getheader("Set-Cookie", ""))  # get cookie
+        if "session" not in cookie:  # if login failed
+            raise click.ClickException(f"Could not log in as {username}.")
+        self.cookie = "session=" + cookie["session"].value
+
+
+def percentile(values: list[float], fraction: float) -> float:  # get percentile
+    """
+    Get the value below which the fraction of the sorted values fall, using the nearest rank.
+    values - the sorted values.
+    fraction - the fraction of values, from 0 to 1.
+    """
+    if not values:  # if there are no values
+        return 0.0
+    return values[max(math.ceil(fraction * len(values)) - 1, 0)]
+
+
+def run_client(
+    host: str,
+    port: int,
+    username: str,
+    password: str,
+    mix: dict[str, int],
+    tasks: int,
+    seed: int,
+    start: threading.Barrier,
+    end_time: list[float],
+    results: list[tuple[str, float, int]],
+) -> None:  # run one load test client
+    """
+    Log in, add tasks to complete, then send requests picked at random from the mix until the end time.
+    host - the host name of the server.
+    port - the port of the server.
+    username - the user to log in as.
+    password - the password of the user.
+    mix - the relative number of requests of each operation.
+    tasks - the number of recurring tasks the client adds to complete.
+    seed - the random number generator seed.
+    start - the barrier all clients wait at before starting the load test.
+    end_time - the time the load test ends, set when all clients are ready.
+    results - the list to add the operation, latency and status code of each request to, or status 0 for connection errors.
+    """
+    rng = random.Random(seed)  # random number generator
+    client = LoadClient(host, port)
+    task_form: dict[str, str] = {
+        "name": "Load test task",
+        "due_date": date.today().isoformat(),
+        "priority": "2",
+        "difficulty": "2",
+        "repeat_interval": "1",
+        "repeat_often": "1",
+    }  # daily task that can be completed again and again
+    task_ids: list[int] = []  # tasks to complete
+    try:
+        client.login(username, password)
+        for _ in range(tasks):  # repeat for each task to add
+            status, body = client.request(
+                "POST", "/api/add", json.dumps(task_form).encode(), "application/json"
+            )  # add task
+            if status == 201:  # if task was added
+                task_ids.append(json.loads(body)["task"]["id"])
+    except BaseException:  # if the client can't start, stop the other clients
+        start.abort()
+        raise
+    names: list[str] = list(mix)  # operations to pick from
+    weights: list[int] = list(mix.values())  # relative number of each operation
+    client_results: list[tuple[str, float, int]] = []  # results of this client
+    start.wait()  # start all clients at once
+    while time.perf_counter() < end_time[0]:  # repeat until the load test ends
+        operation: str = rng.choices(names, weights)[0]  # pick an operation
+        if operation == "complete" and not task_ids:  # if no tasks can be completed
+            operation = "index"
+        start_time: float = time.perf_counter()  # get request start time
+        try:
+            if operation == "index":  # if viewing the task list
+                status, _ = client.request("GET", "/")
+            elif operation == "add":  # if adding a task
+                status, _ = client.request(
+                    "POST",
+                    "/add",
+                    urlencode(task_form).encode(),
+                    "application/x-www-form-urlencoded",
+                )
+            else:  # if completing a task
+                status, _ = client.request(
+                    "GET", f"/complete_task/{rng.choice(task_ids)}"
+                )
+        except OSError:  # if the connection failed
+            status = 0
+        client_results.append((operation, time.perf_counter() - start_time, status))
+    results.extend(client_results)  # add results once to avoid contention
+
+
+def summarize(
+    results: list[tuple[str, float, int]], seconds: float
+) -> dict:  # get load test statistics
+    """
+    Get the number of requests, errors, throughput and latency percentiles in seconds of each operation and of all requests.
+    results - the operation, latency and status code of each request.
+    seconds - the duration of the load test in seconds.
+    """
+    summary: dict = {}  # statistics of each operation
+    for operation in (*operations, "all"):  # repeat for each operation and in total
+        operation_results = [
+            (latency, status)
+            for name, latency, status in results
+            if operation in ("all", name)
+        ]  # results of the operation
+        latencies: list[float] = sorted(
+            latency for latency, _ in operation_results
+        )  # sorted request latencies
+        if not latencies:  # if operation wasn't run
+            continue
+        summary[operation] = {
+            "requests": len(latencies),
+            "errors": sum(
+                1 for _, status in operation_results if status == 0 or status >= 400
+            ),
+            "throughput": len(latencies) / seconds,
+            "mean": sum(latencies) / len(latencies),
+            "p50": percentile(latencies, 0.5),
+            "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99),
+            "max": latencies[-1],
+        }
+    return summary
+
+
+def parse_mix(
+    context: click.Context, parameter: click.Parameter, value: str
+) -> dict[str, int]:  # parse operation mix option
+    """
+    Parse the relative number of requests of each operation, such as index=60,add=10,complete=30.
+    """
+    mix: dict[str, int] = {}  # relative number of requests of each operation
+    for item in value.split(","):  # repeat for each operation
+        name, _, weight = item.partition("=")
+        if name.strip() not in operations or not weight.strip().isdigit():
+            raise click.BadParameter(
+                "use operation=weight pairs, such as index=60,add=10,complete=30,"
+                f" with operations {', '.join(operations)}"
+            )
+        mix[name.strip()] = int(weight)
+    if not any(mix.values()):  # if no requests would be sent
+        raise click.BadParameter("at least one weight must be more than 0")
+    return mix
+
+
+@click.command()
+@click.option(
+    "--clients",
+    type=click.IntRange(min=1),
+    default=8,
+    help="Number of concurrent clients.",
+)
+@click.option(
+    "--duration",
+    type=click.FloatRange(min=0, min_open=True),
+    default=10,
+    help="Seconds to run the load test for.",
+)
+@click.option(
+    "--mix",
+    default="index=60,add=10,complete=30",
+    callback=parse_mix,
+    help="Relative number of requests of each operation.",
+)
+@click.option(
+    "--users",
+    type=click.IntRange(min=1),
+    default=4,
+    help="Number of users the clients log in as, so clients of the same user wait for each other.",
+)
+@click.option(
+    "--tasks",
+    type=click.IntRange(min=0),
+    default=1000,
+    help="Number of generated tasks for each user of a new database.",
+)
+@click.option(
+    "--client-tasks",
+    type=click.IntRange(min=1),
+    default=20,
+    help="Number of tasks each client adds to complete.",
+)
+@click.option("--seed", type=int, default=0, help="Random number generator seed.")
+@click.option(
+    "--url",
+    help="URL of a running server to test, such as http://127.0.0.1:8000,"
+    " instead of a new database and server in this process.",
+)
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, writable=True),
+    help="File to save the results in as JSON.",
+)
+def load_command(
+    clients: int,
+    duration: float,
+    mix: dict[str, int],
+    users: int,
+    tasks: int,
+    client_tasks: int,
+    seed: int,
+    url: Union[str, None],
+    output: Union[str, None],
+) -> None:  # run load test command
+    """
+    Load test the app with concurrent clients. By default the app runs in a threaded WSGI server in this process against a new database of generated users and tasks.
+    """
+    lock_errors: list[int] = [0]  # number of requests that failed to get the database lock
+    lock_errors_lock = threading.Lock()  # lock to count lock errors across threads
+    server = None  # WSGI server in this process
+    if url is None:  # if testing the app in this process
+        database_dir: str = tempfile.mkdtemp(prefix="load-")  # new database folder
+        os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(
+            database_dir, "app.db"
+        )
+        os.environ.setdefault(
+            "SECRET_KEY", "benchmark"
+        )  # the app needs a secret key to be imported
+        os.environ.setdefault(
+            "INSTRUMENTATION", "1"
+        )  # measure the time spent waiting for locks
+        from flask import got_request_exception
+        from sqlalchemy.exc import OperationalError
+        from werkzeug.serving import make_server
+        from app import app
+        from benchmarks.generate import generate_data, password
+
+        atexit.register(
+            shutil.rmtree, database_dir, True
+        )  # delete database after the app optimizes it on shutdown
+        generate_data(users, tasks, seed)  # fill database
+
+        def count_lock_error(
+            sender, exception: Exception, **extra
+        ) -> None:  # count database lock errors
+            """
+            Count requests that failed because the database was locked for longer than the busy timeout.
+            """
+            if isinstance(exception, OperationalError) and "locked" in str(exception):
+                with lock_errors_lock:
+                    lock_errors[0] += 1  # increase lock error count by 1
+
+        got_request_exception.connect(count_lock_error, app)
+        logging.getLogger("werkzeug").setLevel(
+            logging.ERROR
+        )  # don't log each request
+        server = make_server("127.0.0.1", 0, app, threaded=True)  # start server
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = "127.0.0.1", server.server_port
+    else:  # if testing a running server
+        parts = urlsplit(url)
+        host, port = parts.hostname or "127.0.0.1", parts.port or 80
+        password = "benchmark"  # password of generated users, without importing benchmarks.generate, which imports the app and creates a database
+
+    results: list[tuple[str, float, int]] = []  # results of each request
+    end_time: list[float] = [0.0]  # time the load test ends
+    setup_locks: list = [0, 0.0]  # locks taken while the clients added their tasks
+
+    def start_load_test() -> None:  # start load test when all clients are ready
+        """
+        Set the end time of the load test, and save the locks taken so far so only locks taken during the load test are counted.
+        """
+        end_time[0] = time.perf_counter() + duration
+        if server is not None:  # if the app runs in this process
+            from app import metrics
+
+            with metrics.lock:
+                setup_locks[:] = metrics.spans.get("lock", [0, 0.0])
+
+    start = threading.Barrier(
+        clients + 1, action=start_load_test
+    )  # start all clients at once when they are ready
+    threads: list[threading.Thread] = [
+        threading.Thread(
+            target=run_client,
+            args=(
+                host,
+                port,
+                f"bench-{index % users}",
+                password,
+                mix,
+                client_tasks,
+                seed + index,
+                start,
+                end_time,
+                results,
+            ),
+        )
+        for index in range(clients)
+    ]  # load test clients
+    for thread in threads:
+        thread.start()
+    try:
+        start.wait()  # wait for all clients to be ready
+    except threading.BrokenBarrierError:  # if a client couldn't start
+        raise click.ClickException("A client failed to start.")
+    start_time: float = time.perf_counter()  # get load test start time
+    for thread in threads:
+        thread.join()
+    seconds: float = time.perf_counter() - start_time  # load test duration
+    summary: dict = summarize(results, seconds)  # get load test statistics
+    lock_wait: Union[dict, None] = None  # time spent waiting for locks
+    if server is not None:  # if the app ran in this process
+        server.shutdown()  # stop server
+        from app import metrics
+
+        with metrics.lock:
+            count, total = metrics.spans.get("lock", [0, 0.0])
+        count -= setup_locks[0]  # count locks taken during the load test
+        total -= setup_locks[1]
+        lock_wait = {"count": count, "mean": total / count if count else 0.0}
+    report: dict = {
+        "datetime": datetime.now(timezone.utc).isoformat(),
+        "params": {
+            "clients": clients,
+            "duration": duration,
+            "mix": mix,
+            "users": users,
+            "tasks": tasks,
+            "client_tasks": client_tasks,
+            "seed": seed,
+            "url": url,
+        },
+        "seconds": seconds,
+        "operations": summary,
+        "lock_errors": lock_errors[0] if server is not None else None,
+        "lock_wait": lock_wait,
+    }  # load test results with the settings
+    click.echo(
+        f"{'operation':10} {'requests':>9} {'errors':>7} {'req/s':>9}"
+        f" {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}",
+        err=True,
+    )
+    for operation, stats in summary.items():  # repeat for each operation
+        click.echo(
+            f"{operation:10} {stats['requests']:9,} {stats['errors']:7,}"
+            f" {stats['throughput']:9.1f} {stats['p50'] * 1000:9.2f}"
+            f" {stats['p95'] * 1000:9.2f} {stats['p99'] * 1000:9.2f}",
+            err=True,
+        )
+    if server is not None:  # if lock errors and waits were counted
+        click.echo(
+            f"Database lock errors: {lock_errors[0]:,}, mean lock wait"
+            f" {lock_wait['mean'] * 1000:.2f} ms over {lock_wait['count']:,} locks",
+            err=True,
+        )
+    if output:  # if saving results to a file
+        with open(output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        click.echo(json.dumps(report, indent=2))
+    if any(
+        stats["errors"] for stats in summary.values()
+    ):  # if any request failed
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    load_command()
@@ -0,0 +1,139 @@
+"""
+Compare the concurrent read and write throughput of the app with SQLite's default settings and with the SQLite pragma profile, by running the load test once with each.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Union
+import click
+
+pragma_variables: tuple[str, ...] = (
+    "SQLITE_JOURNAL_MODE",
+    "SQLITE_SYNCHRONOUS",
+    "SQLITE_MMAP_SIZE",
+    "SQLITE_CACHE_SIZE",
+    "SQLITE_BUSY_TIMEOUT",
+    "SQLITE_TEMP_STORE",
+)  # environment variables of the SQLite pragma profile
+profiles: dict[str, dict[str, str]] = {
+    "defaults": {
+        name: "" for name in pragma_variables
+    },  # set no pragmas, so SQLite uses its rollback journal, full sync and no mmap
+    "profile": {},  # use the default pragma profile of the app
+}  # environment variables of each pragma profile
+
+
+def run_load_test(
+    profile: dict[str, str], arguments: list[str]
+) -> dict:  # run load test with pragma profile
+    """
+    Run the load test in a new process against a new database with the pragma profile.
+    profile - the environment variables of the pragma profile.
+    arguments - the load test options.
+    Return the load test results.
+    """
+    environment: dict[str, str] = {
+        name: value
+        for name, value in os.environ.items()
+        if name not in pragma_variables
+    }  # environment without pragma settings
+    environment.update(profile)
+    with tempfile.TemporaryDirectory(prefix="pragmas-") as results_dir:
+        output: str = os.path.join(results_dir, "results.json")  # results file
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.load", *arguments, "--output", output],
+            env=environment,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        )  # failed requests are part of the results, so don't check the exit code
+        if not os.path.exists(output):  # if the load test didn't finish
+            raise click.ClickException("The load test failed.")
+        with open(output) as file:
+            return json.load(file)
+
+
+@click.command()
+@click.option(
+    "--clients",
+    type=click.IntRange(min=1),
+    default=8,
+    help="Number of concurrent clients.",
+)
+@click.option(
+    "--duration",
+    type=click.FloatRange(min=0, min_open=True),
+    default=10,
+    help="Seconds to run each load test for.",
+)
+@click.option(
+    "--mix",
+    default="index=60,add=10,complete=30",
+    help="Relative number of requests of each operation.",
+)
+@click.option(
+    "--users",
+    type=click.IntRange(min=1),
+    default=4,
+    help="Number of users the clients log in as.",
+)
+@click.option(
+    "--tasks",
+    type=click.IntRange(min=0),
+    default=1000,
+    help="Number of generated tasks for each user.",
+)
+@click.option("--seed", type=int, default=0, help="Random number generator seed.")
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, writable=True),
+    help="File to save the results in as JSON, or standard output by default.",
+)
+def pragmas_command(
+    clients: int,
+    duration: float,
+    mix: str,
+    users: int,
+    tasks: int,
+    seed: int,
+    output: Union[str, None],
+) -> None:  # run pragma profile benchmark command
+    """
+    Load test the app with SQLite's default settings and then with the pragma profile, and compare the throughput and latency of reading the task list and adding and completing tasks.
+    """
+    arguments: list[str] = [
+        f"--clients={clients}",
+        f"--duration={duration}",
+        f"--mix={mix}",
+        f"--users={users}",
+        f"--tasks={tasks}",
+        f"--seed={seed}",
+    ]  # load test options
+    results: dict[str, dict] = {}  # load test results of each profile
+    for name, profile in profiles.items():  # repeat for each pragma profile
+        click.echo(f"Load testing with {name}", err=True)
+        results[name] = run_load_test(profile, arguments)
+    click.echo(
+        f"{'operation':10} {'req/s':>19} {'p95 ms':>21} {'errors':>15}", err=True
+    )
+    for operation in results["profile"]["operations"]:  # repeat for each operation
+        before: dict = results["defaults"]["operations"].get(
+            operation, {"throughput": 0.0, "p95": 0.0, "errors": 0}
+        )  # statistics with SQLite defaults
+        after: dict = results["profile"]["operations"][operation]
+        click.echo(
+            f"{operation:10} {before['throughput']:9.1f} -> {after['throughput']:6.1f}"
+            f" {before['p95'] * 1000:9.2f} -> {after['p95'] * 1000:8.2f}"
+            f" {before['errors']:6,} -> {after['errors']:5,}",
+            err=True,
+        )
+    if output:  # if saving results to a file
+        with open(output, "w") as file:
+            json.dump(results, file, indent=2)
+    else:
+        click.echo(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    pragmas_command()
@@ -0,0 +1,196 @@
+"""
+Show the SQLite query plans and times of the task queries with and without the task indexes, to check that they search the indexes instead of scanning the task table.
+"""
+
+from datetime import date, timedelta
+import json
+import re
+import sys
+from typing import Callable, Union
+import click
+from sqlalchemy import event
+
+from benchmarks.run import measure  # sets up a new database
+from app import (
+    Task,
+    app,
+    db,
+    get_overdue_task_counts,
+    get_task_page,
+    recount_active_tasks,
+)
+from benchmarks.generate import generate_data
+
+task_scan = re.compile(
+    r"\bSCAN task\b"
+)  # query plan step that reads the whole task table
+
+
+def get_queries(user_id: int) -> dict[str, Callable[[], object]]:  # get task queries
+    """
+    Get the functions that run the task queries of the task list, rating decay and active task recount.
+    user_id - the ID of the user that owns the tasks.
+    """
+    today: date = date.today()  # get current date
+    return {
+        "task_page": lambda: get_task_page(
+            user_id, app.config["TASKS_PER_PAGE"], False
+        ),  # first page of active tasks sorted by due date
+        "overdue_task_counts": lambda: get_overdue_task_counts(
+            user_id, today - timedelta(days=365), 365
+        ),  # overdue tasks for each day of a year of inactivity
+        "recount_active_tasks": recount_active_tasks,  # active tasks of each user
+    }
+
+
+def get_statements(function: Callable[[], object]) -> list[tuple]:  # record SQL
+    """
+    Run the function and record the SQL statements it executes.
+    function - the function to run.
+    Return the SQL and parameters of each statement.
+    """
+    statements: list[tuple] = []  # SQL and parameters of each statement
+
+    def record_statement(
+        conn, cursor, statement, parameters, context, executemany
+    ) -> None:  # record statement
+        """
+        Record the SQL and parameters of the statement.
+        """
+        statements.append((statement, parameters))
+
+    event.listen(db.engine, "before_cursor_execute", record_statement)
+    try:
+        function()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record_statement)
+        db.session.rollback()  # undo changes, such as recounted active tasks
+    return statements
+
+
+def get_query_plan(statement: str, parameters) -> list[str]:  # explain query
+    """
+    Get the SQLite query plan of the statement.
+    statement - the SQL of the statement.
+    parameters - the parameters of the statement.
+    Return each step of the query plan, indented under its parent step.
+    """
+    depths: dict[int, int] = {0: -1}  # depth of each step in the query plan
+    plan: list[str] = []  # steps of the query plan
+    for step_id, parent_id, _, detail in (
+        db.session.connection()
+        .exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)
+        .all()
+    ):  # repeat for each step
+        depths[step_id] = depths.get(parent_id, -1) + 1  # one deeper than its parent
+        plan.append("  " * depths[step_id] + detail)
+    return plan
+
+
+def explain_queries(
+    queries: dict[str, Callable[[], object]], rounds: int
+) -> dict[str, dict]:  # get query plans and times
+    """
+    Get the query plans of the statements each query runs, and time each query.
+    queries - the function to run each query.
+    rounds - the number of timed runs of each query.
+    Return the query plans and timing statistics of each query.
+    """
+    results: dict[str, dict] = {}  # query plans and timing statistics of each query
+    with app.app_context():
+        for name, function in queries.items():  # repeat for each query
+            results[name] = {
+                "plans": [
+                    get_query_plan(statement, parameters)
+                    for statement, parameters in get_statements(function)
+                    if statement.lstrip().upper().startswith(("SELECT", "UPDATE"))
+                ],  # plan of each query statement
+                "stats": measure(
+                    name, function, rounds, setup=db.session.rollback
+                )["stats"],
+            }
+        db.session.rollback()  # undo changes
+    return results
+
+
+@click.command()
+@click.option(
+    "--users", type=click.IntRange(min=1), default=10, help="Number of users."
+)
+@click.option(
+    "--tasks",
+    type=click.IntRange(min=1),
+    default=10000,
+    help="Number of tasks for each user.",
+)
+@click.option(
+    "--rounds",
+    type=click.IntRange(min=2),
+    default=10,
+    help="Number of timed runs of each query.",
+)
+@click.option("--seed", type=int, default=0, help="Random number generator seed.")
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, writable=True),
+    help="File to save the results in as JSON, or standard output by default.",
+)
+def query_plans_command(
+    users: int, tasks: int, rounds: int, seed: int, output: Union[str, None]
+) -> None:  # run query plan benchmarks command
+    """
+    Compare the query plans and times of the task queries without and with the task indexes, against a new database.
+    """
+    user_id: int = generate_data(users, tasks, seed)[0]  # fill database
+    queries: dict[str, Callable[[], object]] = get_queries(user_id)
+    with app.app_context():
+        for index in Task.__table__.indexes:  # repeat for each task index
+            index.drop(db.engine)  # drop index
+    without_indexes: dict[str, dict] = explain_queries(queries, rounds)
+    with app.app_context():
+        for index in Task.__table__.indexes:  # repeat for each task index
+            index.create(db.engine)  # create index again
+        db.session.execute(db.text("ANALYZE"))  # update index statistics
+        db.session.commit()
+    with_indexes: dict[str, dict] = explain_queries(queries, rounds)
+    scans: list[str] = []  # queries that scan the task table with the indexes
+    for name in queries:  # repeat for each query
+        for label, results in (
+            ("without indexes", without_indexes),
+            ("with indexes", with_indexes),
+        ):  # repeat without and with indexes
+            click.echo(
+                f"{name} {label}: median"
+                f" {results[name]['stats']['median'] * 1000:.3f} ms",
+                err=True,
+            )
+            for plan in results[name]["plans"]:  # repeat for each statement
+                click.echo("\n".join("    " + step for step in plan), err=True)
+        if any(
+            task_scan.search(step)
+            for plan in with_indexes[name]["plans"]
+            for step in plan
+        ):  # if query still scans the task table
+            scans.append(name)
+    report: dict = {
+        "params": {"users": users, "tasks": tasks, "rounds": rounds, "seed": seed},
+        "queries": {
+            name: {
+                "without_indexes": without_indexes[name],
+                "with_indexes": with_indexes[name],
+            }
+            for name in queries
+        },
+    }  # results with the run settings
+    if output:  # if saving results to a file
+        with open(output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        click.echo(json.dumps(report, indent=2))
+    if scans:  # if any query scans the task table with the indexes
+        click.echo("Task table scans with indexes: " + ", ".join(scans), err=True)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    query_plans_command()
@@ -0,0 +1,357 @@
+"""
+Time the main requests and functions of the app against a generated database and save the results as JSON, so runs of different versions can be compared.
+"""
+
+import atexit
+from datetime import date, datetime, timedelta, timezone
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Union
+import click
+
+database_dir: str = tempfile.mkdtemp(
+    prefix="benchmark-"
+)  # benchmarks always run against a new database
+atexit.register(
+    shutil.rmtree, database_dir, True
+)  # delete database after the app optimizes it on shutdown
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(database_dir, "app.db")
+os.environ.setdefault(
+    "SECRET_KEY", "benchmark"
+)  # the app needs a secret key to be imported
+from app import (  # noqa: E402
+    Task,
+    User,
+    app,
+    calculate_next_recurring_event,
+    db,
+    init_db,
+    page_cache,
+    task_cache,
+)
+from benchmarks.generate import generate_data, password  # noqa: E402
+
+
+def measure(
+    name: str,
+    function: Callable[[], object],
+    rounds: int,
+    setup: Union[Callable[[], object], None] = None,
+    operations: int = 1,
+) -> dict:  # time a function
+    """
+    Time the function, running it once to warm up and then once for each round, and get the timing statistics in seconds for each operation.
+    name - the name of the benchmark.
+    function - the function to time.
+    rounds - the number of timed runs.
+    setup - a function to run before each run that isn't timed, or None.
+    operations - the number of operations in each run.
+    Return the benchmark name and timing statistics.
+    """
+    times: list[float] = []  # time of each operation in each round
+    for round_number in range(rounds + 1):  # repeat for warm up and each round
+        if setup is not None:  # if the run needs to be set up
+            setup()
+        start_time: float = time.perf_counter()  # get run start time
+        function()
+        seconds: float = time.perf_counter() - start_time  # run time
+        if round_number > 0:  # skip warm up run
+            times.append(seconds / operations)
+    mean: float = statistics.fmean(times)  # mean time of each operation
+    return {
+        "name": name,
+        "stats": {
+            "min": min(times),
+            "max": max(times),
+            "mean": mean,
+            "median": statistics.median(times),
+            "stddev": statistics.stdev(times) if len(times) > 1 else 0.0,
+            "rounds": rounds,
+            "operations": operations,
+            "ops": 1 / mean if mean else 0.0,
+        },
+    }
+
+
+def clear_caches() -> None:  # clear rendered page caches
+    """
+    Clear the rendered task and task list page caches, so the next index request renders the task list again.
+    """
+    for cache in (task_cache, page_cache):  # repeat for each cache
+        with cache.lock:
+            cache.items.clear()
+
+
+def run_benchmarks(
+    users: int, tasks: int, rounds: int, seed: int, gap_days: int
+) -> list[dict]:  # run all benchmarks
+    """
+    Fill a new database with generated users and tasks, and time the app against it.
+    users - the number of users.
+    tasks - the number of tasks for each user.
+    rounds - the number of timed runs of each benchmark.
+    seed - the random number generator seed.
+    gap_days - the number of days of inactivity before completing a task after a gap.
+    Return the results of each benchmark.
+    """
+    results: list[dict] = []  # results of each benchmark
+    start_time: float = time.perf_counter()  # get generation start time
+    user_ids: list[int] = generate_data(users, tasks, seed)  # fill database
+    click.echo(
+        f"Generated {users:,} users with {tasks:,} tasks each"
+        f" in {time.perf_counter() - start_time:.2f} seconds",
+        err=True,
+    )
+    rng = random.Random(seed)  # random number generator
+    arguments: list[tuple[date, int, int, int]] = [
+        (
+            date(2020, 1, 1) + timedelta(days=rng.randrange(3650)),
+            rng.randrange(1000),
+            rng.randint(1, 7),
+            rng.randint(1, 4),
+        )
+        for _ in range(10000)
+    ]  # original dates, times completed, repeat intervals and repeat often
+    results.append(
+        measure(
+            "calculate_next_recurring_event",
+            lambda: [
+                calculate_next_recurring_event(*task_arguments)
+                for task_arguments in arguments
+            ],
+            rounds,
+            operations=len(arguments),
+        )
+    )
+    client = app.test_client()  # client logged in as the first user
+    client.post("/login", data={"username": "bench-0", "password": password})
+    results.append(
+        measure(
+            "index_render", lambda: client.get("/"), rounds, setup=clear_caches
+        )
+    )  # render the task list from the database
+    results.append(
+        measure("index_cached_page", lambda: client.get("/"), rounds)
+    )  # render the page around the cached task list
+    etag: str = client.get("/").headers["ETag"]  # get the task list version
+    results.append(
+        measure(
+            "index_not_modified",
+            lambda: client.get("/", headers={"If-None-Match": etag}),
+            rounds,
+        )
+    )  # check that the task list hasn't changed
+    due_date: str = date.today().isoformat()  # due date of added tasks
+    results.append(
+        measure(
+            "add_task",
+            lambda: client.post(
+                "/add",
+                data={
+                    "name": "Benchmark task",
+                    "due_date": due_date,
+                    "priority": "2",
+                    "difficulty": "2",
+                    "repeat_interval": "1",
+                    "repeat_often": "1",
+                },
+            ),
+            rounds,
+        )
+    )
+    with app.app_context():
+        recurring_task_ids: list[int] = list(
+            db.session.execute(
+                db.select(Task.id)
+                .where(Task.user_id == user_ids[0], Task.repeat_often != 5)
+                .order_by(Task.id)
+                .limit(rounds + 1)
+            ).scalars()
+        )  # tasks that can be completed again and again
+    task_ids = iter(recurring_task_ids * 2)  # task to complete in each run
+    results.append(
+        measure(
+            "complete_task",
+            lambda: client.get(f"/complete_task/{next(task_ids)}"),
+            rounds,
+        )
+    )
+
+    def start_gap() -> None:  # make the user inactive for a while
+        """
+        Set the user's last completion to before the inactivity gap, so the next completion decays the rating.
+        """
+        with app.app_context():
+            user: User = db.session.get(User, user_ids[0])
+            user.last_completion_date = date.today() - timedelta(days=gap_days)
+            user.last_time_clicked = datetime.now(timezone.utc).replace(
+                tzinfo=None
+            ) - timedelta(days=gap_days)
+            db.session.commit()  # commit database changes
+
+    results.append(
+        measure(
+            f"complete_task_after_{gap_days}_day_gap",
+            lambda: client.get(f"/complete_task/{next(task_ids)}"),
+            rounds,
+            setup=start_gap,
+        )
+    )
+    results.append(measure("init_db", init_db, rounds))  # check an existing database
+    results.append(
+        measure(
+            "init_db_cold_start",
+            lambda: subprocess.run(
+                [
+                    sys.executable,
+                    "-c",
+                    "import app",
+                ],
+                check=True,
+                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            ),
+            min(rounds, 5),
+        )
+    )  # start a new process and import the app, which checks the database once
+    return results
+
+
+def compare_results(
+    baseline: dict, results: list[dict], threshold: float
+) -> bool:  # compare results with a baseline
+    """
+    Show the median time of each benchmark compared with a baseline run.
+    baseline - the results of the baseline run.
+    results - the results of each benchmark in this run.
+    threshold - the ratio of median times above which a benchmark is a regression.
+    Return whether any benchmark is a regression.
+    """
+    baseline_medians: dict[str, float] = {
+        benchmark["name"]: benchmark["stats"]["median"]
+        for benchmark in baseline["benchmarks"]
+    }  # baseline median time of each benchmark
+    regression: bool = False  # is any benchmark slower than the threshold
+    for benchmark in results:  # repeat for each benchmark
+        median: float = benchmark["stats"]["median"]
+        baseline_median: Union[float, None] = baseline_medians.get(benchmark["name"])
+        if not baseline_median:  # if benchmark is new
+            click.echo(
+                f"{benchmark['name']:40} {median * 1000:10.3f} ms      (new)", err=True
+            )
+            continue
+        ratio: float = median / baseline_median  # time compared with the baseline
+        slower: bool = ratio > threshold  # is benchmark a regression
+        regression = regression or slower
+        click.echo(
+            f"{benchmark['name']:40} {baseline_median * 1000:10.3f} ms"
+            f" -> {median * 1000:10.3f} ms  x{ratio:.2f}"
+            + ("  REGRESSION" if slower else ""),
+            err=True,
+        )
+    return regression
+
+
+@click.command()
+@click.option(
+    "--users", type=click.IntRange(min=1), default=3, help="Number of users."
+)
+@click.option(
+    "--tasks",
+    type=click.IntRange(min=1),
+    default=1000,
+    help="Number of tasks for each user.",
+)
+@click.option(
+    "--rounds",
+    type=click.IntRange(min=2),
+    default=20,
+    help="Number of timed runs of each benchmark.",
+)
+@click.option("--seed", type=int, default=0, help="Random number generator seed.")
+@click.option(
+    "--gap-days",
+    type=click.IntRange(min=1),
+    default=365,
+    help="Days of inactivity before completing a task after a gap.",
+)
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, writable=True),
+    help="File to save the results in as JSON, or standard output by default.",
+)
+@click.option(
+    "--compare",
+    "baseline_file",
+    type=click.File("r"),
+    help="Results of a previous run to compare with.",
+)
+@click.option(
+    "--threshold",
+    type=click.FloatRange(min=1),
+    default=1.2,
+    help="Ratio of median times above which --compare fails.",
+)
+def run_command(
+    users: int,
+    tasks: int,
+    rounds: int,
+    seed: int,
+    gap_days: int,
+    output: Union[str, None],
+    baseline_file,
+    threshold: float,
+) -> None:  # run benchmarks command
+    """
+    Run the benchmarks against a new database filled with generated users and tasks.
+    """
+    results: list[dict] = run_benchmarks(
+        users, tasks, rounds, seed, gap_days
+    )  # run all benchmarks
+    commit: Union[str, None] = None  # version of the app
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()  # get current commit
+    except (OSError, subprocess.CalledProcessError):  # if not in a git repository
+        pass
+    report: dict = {
+        "datetime": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "machine_info": {
+            "python_version": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+        },
+        "params": {
+            "users": users,
+            "tasks": tasks,
+            "rounds": rounds,
+            "seed": seed,
+            "gap_days": gap_days,
+        },
+        "benchmarks": results,
+    }  # results with the run settings
+    if output:  # if saving results to a file
+        with open(output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        click.echo(json.dumps(report, indent=2))
+    if baseline_file is not None:  # if comparing with a previous run
+        if compare_results(json.load(baseline_file), results, threshold):
+            sys.exit(1)  # fail if any benchmark is slower
+
+
+if __name__ == "__main__":
+    run_command()
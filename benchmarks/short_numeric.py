@@ -0,0 +1,145 @@
+"""
+Time the short_numeric template filter against the original filter that rebuilt its units list and divided by 1000 in a loop on every call.
+"""
+
+import json
+import random
+import sys
+from typing import Union
+import click
+
+from benchmarks.run import measure  # sets up a new database
+from app import short_numeric_filter
+
+
+def short_numeric_by_loop(value: Union[int, float]) -> str:  # original filter
+    """
+    Get the abbreviated numeric value the way short_numeric did before the log10 exponent and cache.
+    value - the numeric value to convert.
+    """
+    units: list[str] = [
+        "",
+        "K",
+        "M",
+        "B",
+        "T",
+        "Qa",
+        "Qi",
+        "Sx",
+        "Sp",
+        "O",
+        "N",
+        "D",
+        "UD",
+        "DD",
+        "TD",
+        "QaD",
+        "QiD",
+        "SxD",
+        "SpD",
+        "OD",
+        "ND",
+        "V",
+    ]  # list of units with abbreviations
+    exponent = 0
+    mantissa: Union[int, float] = value  # mantissa value from 1 to 999
+    while mantissa >= 1000:  # repeat until mantissa is within 1 to 999
+        mantissa /= 1000
+        exponent += 1
+    return (
+        f"{mantissa:.3g}{units[exponent]}" if value >= 1000 else f"{value:.0f}"
+    )  # print abbreviated numeric output
+
+
+@click.command()
+@click.option(
+    "--values",
+    type=click.IntRange(min=1),
+    default=10000,
+    help="Number of values formatted in each run.",
+)
+@click.option(
+    "--rounds",
+    type=click.IntRange(min=2),
+    default=20,
+    help="Number of timed runs of each benchmark.",
+)
+@click.option("--seed", type=int, default=0, help="Random number generator seed.")
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, writable=True),
+    help="File to save the results in as JSON, or standard output by default.",
+)
+def short_numeric_command(
+    values: int, rounds: int, seed: int, output: Union[str, None]
+) -> None:  # run short numeric benchmarks command
+    """
+    Time formatting new values and repeated values, such as the XP of the same user on each page, with the original and the current short_numeric filter.
+    """
+    rng = random.Random(seed)  # random number generator
+    new_values: list[float] = [
+        10 ** rng.uniform(0, 66) for _ in range(values)
+    ]  # values up to the V unit, so the original filter can format them
+    repeated_values: list[float] = [
+        rng.choice(new_values[:20]) for _ in range(values)
+    ]  # a few values formatted again and again
+    mismatches: list[float] = [
+        value
+        for value in new_values
+        if short_numeric_filter.__wrapped__(value) != short_numeric_by_loop(value)
+    ]  # values formatted differently by the current filter
+    uncached_filter = short_numeric_filter.__wrapped__  # filter without the cache
+    results: list[dict] = [
+        measure(
+            "original_new_values",
+            lambda: [short_numeric_by_loop(value) for value in new_values],
+            rounds,
+            operations=values,
+        ),
+        measure(
+            "current_new_values",
+            lambda: [uncached_filter(value) for value in new_values],
+            rounds,
+            operations=values,
+        ),
+        measure(
+            "original_repeated_values",
+            lambda: [short_numeric_by_loop(value) for value in repeated_values],
+            rounds,
+            operations=values,
+        ),
+        measure(
+            "current_repeated_values",
+            lambda: [short_numeric_filter(value) for value in repeated_values],
+            rounds,
+            operations=values,
+        ),
+    ]  # results of each benchmark
+    medians: dict[str, float] = {
+        result["name"]: result["stats"]["median"] for result in results
+    }  # median time of each benchmark
+    for values_name in ("new_values", "repeated_values"):  # repeat for each benchmark
+        original: float = medians["original_" + values_name]
+        current: float = medians["current_" + values_name]
+        click.echo(
+            f"{values_name:16} {original * 1e9:8.0f} ns -> {current * 1e9:8.0f} ns"
+            f"  x{original / current:.1f} faster",
+            err=True,
+        )
+    report: dict = {
+        "params": {"values": values, "rounds": rounds, "seed": seed},
+        "benchmarks": results,
+        "mismatches": mismatches,
+    }  # results with the run settings
+    if output:  # if saving results to a file
+        with open(output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        click.echo(json.dumps(report, indent=2))
+    if mismatches:  # if the current filter formats any value differently
+        click.echo(f"{len(mismatches):,} values are formatted differently", err=True)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    short_numeric_command()
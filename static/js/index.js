@@ -0,0 +1,143 @@
+/*update tasks and user stats in place using the JSON API, links and forms still work without JavaScript*/
+function compareCursors(first, second) {
+    /*compare task page cursors (due date and task ID)*/
+    const [firstDate, firstId] = first.split("_");
+    const [secondDate, secondId] = second.split("_");
+    if (firstDate !== secondDate) {
+        return firstDate < secondDate ? -1 : 1; /*YYYY-MM-DD dates sort as strings*/
+    }
+    return Number(firstId) - Number(secondId);
+}
+
+function placeTask(taskList, element) {
+    /*insert the task element sorted by due date if it belongs to the current page*/
+    const existing = document.getElementById(element.id);
+    if (existing) {
+        existing.remove(); /*remove the old task element*/
+    }
+    if (
+        element.dataset.completed === "1" &&
+        taskList.dataset.showCompleted !== "1"
+    ) {
+        return; /*completed tasks are hidden*/
+    }
+    const tasks = Array.from(taskList.querySelectorAll(".task"));
+    const next = tasks.find(
+        (task) => compareCursors(task.dataset.cursor, element.dataset.cursor) > 0,
+    );
+    if (next === undefined) {
+        if (taskList.dataset.hasNext !== "1" || tasks.length === 0) {
+            taskList.appendChild(element); /*task is at the end of the list*/
+        }
+    } else if (next !== tasks[0] || taskList.dataset.hasPrevious !== "1") {
+        taskList.insertBefore(element, next); /*task is within the page*/
+    }
+}
+
+function createTaskElement(html) {
+    /*create task element from rendered task HTML*/
+    const template = document.createElement("template");
+    template.innerHTML = html.trim();
+    return template.content.firstElementChild;
+}
+
+function showMessages(messages) {
+    /*show messages in the popup message*/
+    if (!messages || messages.length === 0) {
+        return;
+    }
+    let popup = document.querySelector(".popup-message");
+    if (!popup) {
+        popup = document.createElement("div");
+        popup.className = "popup-message";
+        document.body.appendChild(popup);
+    }
+    popup.replaceChildren(
+        ...messages.map((message) => {
+            const paragraph = document.createElement("p");
+            paragraph.textContent = message;
+            return paragraph;
+        }),
+    );
+}
+
+function updateUser(user) {
+    /*update user level, XP, rating and level progress*/
+    if (!user) {
+        return;
+    }
+    document.getElementById("user-level").textContent = user.level;
+    document.getElementById("user-total-xp").textContent =
+        user.formatted.total_xp;
+    document.getElementById("user-xp").textContent = user.formatted.xp;
+    document.getElementById("user-xp-required").textContent =
+        user.formatted.xp_required;
+    document.getElementById("user-rating").textContent = user.formatted.rating;
+    document.getElementById("user-progress-text").textContent =
+        user.formatted.progress;
+    const progress = document.getElementById("user-progress");
+    progress.max = user.xp_required;
+    progress.value = user.xp;
+}
+
+async function postJson(url, body) {
+    /*send POST request to the JSON API and return the response data*/
+    const response = await fetch(url, { method: "POST", body: body });
+    if (!response.ok) {
+        const data = await response.json().catch(() => ({}));
+        const error = new Error(data.error || response.statusText);
+        error.response = response; /*the server answered with an error*/
+        throw error;
+    }
+    return response.json();
+}
+
+document.addEventListener("click", async (event) => {
+    /*complete or delete tasks without reloading the page*/
+    const link = event.target.closest(".complete-link, .delete-link");
+    if (!link || event.defaultPrevented) {
+        return; /*not a task link or task deletion is cancelled*/
+    }
+    event.preventDefault();
+    const taskList = document.getElementById("task-list");
+    try {
+        const data = await postJson(link.dataset.api);
+        if (link.classList.contains("delete-link")) {
+            document.getElementById("task-" + data.deleted).remove();
+        } else if (data.queued) {
+            showMessages(data.messages); /*completion is scored in the background*/
+        } else {
+            placeTask(taskList, createTaskElement(data.html));
+            updateUser(data.user);
+            showMessages(data.messages);
+        }
+    } catch (error) {
+        if (error.response) {
+            showMessages([error.message]); /*show why the request failed*/
+        } else {
+            window.location.href = link.href; /*fall back to reloading the page*/
+        }
+    }
+});
+
+document.addEventListener("DOMContentLoaded", () => {
+    const form = document.getElementById("add-task-form");
+    form.addEventListener("submit", async (event) => {
+        /*add task without reloading the page*/
+        event.preventDefault();
+        try {
+            const data = await postJson(form.dataset.api, new FormData(form));
+            placeTask(
+                document.getElementById("task-list"),
+                createTaskElement(data.html),
+            );
+            form.elements["name"].value = ""; /*clear task name*/
+        } catch (error) {
+            if (error.response) {
+                showMessages([error.message]); /*show why the task is invalid*/
+            } else {
+                form.submit(); /*fall back to submitting the form*/
+            }
+        }
+    });
+});
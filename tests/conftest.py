@@ -0,0 +1,96 @@
+"""
+Test fixtures: the app runs against a temporary SQLite database that is emptied before each test.
+"""
+
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+import pytest
+
+database_dir: str = tempfile.mkdtemp(prefix="tests-")  # tests use a new database
+atexit.register(
+    shutil.rmtree, database_dir, True
+)  # delete database after the app optimizes it on shutdown
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(database_dir, "app.db")
+os.environ.setdefault("SECRET_KEY", "test")  # the app needs a secret key
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)  # import the app from the repository root
+import app as task_app  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def database():  # empty database for each test
+    """
+    Recreate the tables and clear the rendered page caches before each test.
+    """
+    with task_app.app.app_context():
+        task_app.db.session.remove()
+        task_app.db.drop_all()  # delete tables and data
+    task_app.init_db()  # create tables
+    for cache in (task_app.task_cache, task_app.page_cache):  # repeat for each cache
+        with cache.lock:
+            cache.items.clear()
+    yield
+    with task_app.app.app_context():
+        task_app.db.session.remove()
+
+
+@pytest.fixture
+def client():  # test client logged in as a new user
+    """
+    Get a test client logged in as the user Player.
+    """
+    test_client = task_app.app.test_client()
+    login(test_client, "Player", action="sign_up")
+    return test_client
+
+
+def login(
+    test_client, username: str, password: str = "password", action: str = "log_in"
+):  # log in or sign up
+    """
+    Log in the test client, or sign up to create a new user.
+    test_client - the test client.
+    username - the username.
+    password - the password.
+    action - log_in or sign_up.
+    Return the login response.
+    """
+    return test_client.post(
+        "/login", data={"username": username, "password": password, "action": action}
+    )
+
+
+def get_user(username: str = "Player") -> "task_app.User":  # get user by username
+    """
+    Get the user with the username, detached from the database session.
+    username - the username.
+    """
+    with task_app.app.app_context():
+        user = task_app.User.query.filter(task_app.User.username == username).one()
+        task_app.db.session.expunge(user)
+        return user
+
+
+def add_task(test_client, **fields) -> int:  # add task using the JSON API
+    """
+    Add a task using the JSON API.
+    test_client - the logged in test client.
+    fields - task fields to change from a daily task due today.
+    Return the new task ID.
+    """
+    task: dict = {
+        "name": "Task",
+        "due_date": task_app.date.today().isoformat(),
+        "priority": 1,
+        "difficulty": 1,
+        "repeat_interval": 1,
+        "repeat_often": 1,
+        **fields,
+    }  # task form data
+    response = test_client.post("/api/add", json=task)
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()["task"]["id"]
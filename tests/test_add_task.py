@@ -0,0 +1,59 @@
+"""
+Tests for adding tasks with the form and the JSON API.
+"""
+
+import pytest
+from conftest import add_task, get_user, task_app
+
+
+@pytest.mark.parametrize(
+    "fields, error",
+    [
+        ({"priority": None}, "priority is required"),
+        ({"difficulty": "hard"}, "difficulty must be a whole number"),
+        ({"repeat_interval": 0}, "repeat_interval must be at least 1"),
+        ({"repeat_often": 6}, "repeat_often must be at most 5"),
+        ({"due_date": "tomorrow"}, "due_date must be in YYYY-MM-DD format"),
+        ({"name": ""}, "name is required"),
+    ],
+)
+def test_api_add_invalid_task(client, fields: dict, error: str) -> None:
+    """
+    A missing or invalid value returns 400 with an error message and adds no task.
+    """
+    task: dict = {
+        "name": "Task",
+        "due_date": "2024-01-01",
+        "priority": 1,
+        "difficulty": 1,
+        "repeat_interval": 1,
+        "repeat_often": 1,
+        **fields,
+    }  # task with one invalid value
+    response = client.post("/api/add", json=task)
+    assert response.status_code == 400
+    assert response.get_json() == {"error": error}
+    assert get_user().active_tasks == 0
+
+
+def test_add_invalid_task_form(client) -> None:
+    """
+    An invalid form shows the error on the task list instead of failing.
+    """
+    response = client.post(
+        "/add", data={"name": "Task", "due_date": "2024-01-01"}, follow_redirects=True
+    )
+    assert response.status_code == 200
+    assert b"priority is required" in response.data
+    assert get_user().active_tasks == 0
+
+
+def test_api_add_task(client) -> None:
+    """
+    A valid task is added with its values.
+    """
+    task_id: int = add_task(client, name=" Task ", priority="3", repeat_often=2)
+    with task_app.app.app_context():
+        task = task_app.db.session.get(task_app.Task, task_id)
+        assert (task.name, task.priority, task.repeat_often) == ("Task", 3, 2)
+    assert get_user().active_tasks == 1
@@ -0,0 +1,101 @@
+"""
+Tests for the agenda of task occurrences within a date range.
+"""
+
+from datetime import date, timedelta
+from conftest import add_task, get_user, task_app
+
+
+def count_occurrences() -> int:  # count precomputed task occurrences
+    """
+    Get the number of precomputed task occurrences in the database.
+    """
+    with task_app.app.app_context():
+        return task_app.TaskOccurrence.query.count()
+
+
+def get_agenda(
+    client, start_date: date, end_date: date
+) -> list[tuple[str, int, int]]:  # get agenda using the JSON API
+    """
+    Get the due date, times completed and task ID of each occurrence in the agenda.
+    """
+    response = client.get(
+        f"/api/agenda?from={start_date.isoformat()}&to={end_date.isoformat()}"
+    )
+    assert response.status_code == 200, response.get_json()
+    return [
+        (occurrence["due_date"], occurrence["times_completed"], occurrence["task_id"])
+        for occurrence in response.get_json()["occurrences"]
+    ]
+
+
+def expected_agenda(
+    tasks: dict[int, tuple[date, int, int]], start_date: date, end_date: date
+) -> list[tuple[str, int, int]]:  # expand each task on its own
+    """
+    Get the occurrences of the tasks in the date range one task at a time, sorted like the agenda.
+    """
+    return sorted(
+        (
+            (event_date.isoformat(), times_completed, task_id)
+            for task_id, (original_date, interval, often) in tasks.items()
+            for times_completed, event_date in task_app.iterate_recurring_events(
+                original_date, interval, often, start_date, end_date
+            )
+        ),
+        key=lambda occurrence: (occurrence[0], occurrence[2]),
+    )  # sorted by due date and task ID
+
+
+def test_far_future_agenda_is_not_precomputed(client) -> None:
+    """
+    An agenda far in the future is expanded without storing the occurrences up to it.
+    """
+    today: date = date.today()
+    tasks: dict[int, tuple[date, int, int]] = {}  # original date, interval and often
+    for interval, often in ((1, 1), (2, 2), (1, 3), (1, 4), (1, 5)):
+        tasks[add_task(client, repeat_interval=interval, repeat_often=often)] = (
+            today,
+            interval,
+            often,
+        )
+    start_date, end_date = date(2300, 1, 1), date(2300, 12, 31)
+    assert get_agenda(client, start_date, end_date) == expected_agenda(
+        tasks, start_date, end_date
+    )
+    horizon: date = today + timedelta(days=task_app.app.config["AGENDA_MAX_DAYS"])
+    assert count_occurrences() == 0  # nothing before the horizon was requested
+    start_date, end_date = horizon - timedelta(days=100), horizon + timedelta(days=100)
+    assert get_agenda(client, start_date, end_date) == expected_agenda(
+        tasks, start_date, end_date
+    )  # precomputed and expanded occurrences are merged in order
+    assert get_user().agenda_until == horizon
+    assert count_occurrences() == len(expected_agenda(tasks, today, horizon))
+    start_date, end_date = date(2300, 1, 1), date(2300, 12, 31)
+    assert get_agenda(client, start_date, end_date) == expected_agenda(
+        tasks, start_date, end_date
+    )
+    assert get_user().agenda_until == horizon
+
+
+def test_agenda_after_completing_task(client) -> None:
+    """
+    Completed occurrences are left out both before and after the horizon.
+    """
+    today: date = date.today()
+    task_id: int = add_task(client, repeat_often=2)  # weekly task
+    assert get_agenda(client, today, today + timedelta(days=13)) == [
+        (today.isoformat(), 0, task_id),
+        ((today + timedelta(days=7)).isoformat(), 1, task_id),
+    ]
+    for _ in range(3):  # complete three weeks
+        assert client.post(f"/api/complete_task/{task_id}").status_code == 200
+    assert get_agenda(client, today, today + timedelta(days=27)) == [
+        ((today + timedelta(days=21)).isoformat(), 3, task_id)
+    ]
+    start_date: date = today + timedelta(days=400)  # after the horizon
+    end_date: date = start_date + timedelta(days=30)
+    assert get_agenda(client, start_date, end_date) == expected_agenda(
+        {task_id: (today, 1, 2)}, start_date, end_date
+    )
@@ -0,0 +1,141 @@
+"""
+Tests for the completion queue, including completions that fail to be scored.
+"""
+
+import pytest
+from conftest import add_task, get_user, login, task_app
+
+
+@pytest.fixture
+def queue_mode(monkeypatch):  # completions are queued and scored by the test
+    """
+    Queue task completions without starting the completion worker thread.
+    """
+    monkeypatch.setitem(task_app.app.config, "COMPLETION_QUEUE", True)
+    monkeypatch.setitem(task_app.app.config, "COMPLETION_WORKER_THREAD", False)
+
+
+def add_unscorable_task(
+    username: str = "Player", repeat_often: int = 4
+) -> int:  # add task with interval 0
+    """
+    Add a task with a repeat interval of 0 directly to the database, as a task added before repeat intervals were validated.
+    username - the username of the user that owns the task.
+    repeat_often - the frequency at which the task repeats, yearly by default.
+    Return the new task ID.
+    """
+    with task_app.app.app_context():
+        task = task_app.Task(
+            name="Broken",
+            user_id=get_user(username).id,
+            due_date=task_app.date.today(),
+            priority=1,
+            difficulty=1,
+            repeat_interval=0,
+            repeat_often=repeat_often,
+        )
+        task_app.db.session.add(task)
+        task_app.db.session.commit()
+        return task.id
+
+
+def queue_completion(username: str, task_id: int) -> None:  # queue completion row
+    """
+    Add a completion of the task directly to the completion queue.
+    username - the username of the user that owns the task.
+    task_id - the ID of the completed task.
+    """
+    with task_app.app.app_context():
+        task_app.db.session.add(
+            task_app.QueuedCompletion(
+                user_id=get_user(username).id,
+                task_id=task_id,
+                completed_at=task_app.datetime.now(task_app.timezone.utc).replace(
+                    tzinfo=None
+                ),
+            )
+        )
+        task_app.db.session.commit()
+
+
+def process_queue() -> int:  # score queued completions
+    """
+    Score the queued completions like the completion worker.
+    Return the number of scored completions.
+    """
+    with task_app.app.app_context():
+        return task_app.process_completion_queue(100)
+
+
+def test_failing_completion_doesnt_block_queue(client, queue_mode) -> None:
+    """
+    A completion that fails to be scored is set aside, and the completions queued around it are still scored.
+    """
+    other_client = task_app.app.test_client()
+    login(other_client, "Other", action="sign_up")
+    task_id: int = add_task(client)
+    other_task_id: int = add_task(other_client)
+    broken_task_id: int = add_unscorable_task()
+    queue_completion("Player", task_id)
+    queue_completion("Player", broken_task_id)
+    queue_completion("Player", task_id)
+    queue_completion("Other", other_task_id)
+    assert process_queue() == 3
+    assert get_user("Player").tasks_completed == 2
+    assert get_user("Other").tasks_completed == 1
+    with task_app.app.app_context():
+        queued = task_app.QueuedCompletion.query.all()
+        assert [
+            (completion.task_id, completion.failed_at is not None)
+            for completion in queued
+        ] == [(broken_task_id, True)]
+        stats: dict = task_app.get_completion_queue_stats()
+    assert (stats["depth"], stats["failed"]) == (0, 1)
+    assert process_queue() == 0  # failed completion isn't retried
+
+
+@pytest.mark.parametrize("queued", [True, False])
+@pytest.mark.parametrize("repeat_often", [1, 2, 3, 4])
+def test_unscorable_task_is_rejected(
+    client, monkeypatch, queued: bool, repeat_often: int
+) -> None:
+    """
+    Completing a recurring task with a repeat interval below 1 is rejected the same way whether completions are queued or scored right away.
+    """
+    monkeypatch.setitem(task_app.app.config, "COMPLETION_QUEUE", queued)
+    monkeypatch.setitem(task_app.app.config, "COMPLETION_WORKER_THREAD", False)
+    broken_task_id: int = add_unscorable_task(repeat_often=repeat_often)
+    response = client.post(f"/api/complete_task/{broken_task_id}")
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "Task repeat interval must be at least 1"
+    client.get(f"/complete_task/{broken_task_id}")
+    assert b"Task repeat interval must be at least 1" in client.get("/").data
+    assert get_user().tasks_completed == 0
+    with task_app.app.app_context():
+        assert task_app.QueuedCompletion.query.count() == 0
+        assert task_app.CompletionEvent.query.count() == 0
+
+
+@pytest.mark.parametrize("queued", [True, False])
+def test_one_time_task_without_interval_is_scored(
+    client, monkeypatch, queued: bool
+) -> None:
+    """
+    A one-time task doesn't repeat, so it is scored with a repeat interval of 0 whether completions are queued or scored right away.
+    """
+    monkeypatch.setitem(task_app.app.config, "COMPLETION_QUEUE", queued)
+    monkeypatch.setitem(task_app.app.config, "COMPLETION_WORKER_THREAD", False)
+    task_id: int = add_unscorable_task(repeat_often=5)
+    assert client.post(f"/api/complete_task/{task_id}").status_code in (200, 202)
+    assert process_queue() == (1 if queued else 0)
+    assert get_user().tasks_completed == 1
+
+
+def test_missing_task_isnt_queued(client, queue_mode) -> None:
+    """
+    Completing a task that doesn't exist shows that the task isn't found.
+    """
+    assert client.post("/api/complete_task/999").status_code == 404
+    client.get("/complete_task/999")
+    page: bytes = client.get("/").data
+    assert b"Task not found" in page and b"Task completion queued." not in page
@@ -0,0 +1,60 @@
+"""
+Stress test for completing tasks of the same user from many threads at once.
+"""
+
+import threading
+from conftest import add_task, get_user, login, task_app
+
+threads: int = 8  # number of concurrent clients
+completions: int = 30  # number of completions by each client
+
+
+def test_concurrent_completions_lose_no_xp(client) -> None:
+    """
+    Completions from concurrent clients of the same user are all counted, and the total XP is the sum of the XP each completion gained.
+    """
+    task_ids: list[int] = [add_task(client) for _ in range(4)]  # daily tasks
+    start = threading.Barrier(threads)  # start all clients at once
+    xp_gained: list[list[float]] = [[] for _ in range(threads)]  # XP of each client
+    errors: list[BaseException] = []  # exceptions raised by the clients
+
+    def complete_tasks(index: int) -> None:  # complete tasks as one client
+        """
+        Log in and complete the tasks in turn, saving the XP gained by each completion.
+        """
+        try:
+            test_client = task_app.app.test_client()
+            login(test_client, "Player")
+            start.wait()
+            for number in range(completions):  # repeat for each completion
+                response = test_client.post(
+                    f"/api/complete_task/{task_ids[(index + number) % len(task_ids)]}"
+                )
+                assert response.status_code == 200, response.get_data(as_text=True)
+                xp_gained[index].append(response.get_json()["xp_gained"])
+        except BaseException as error:  # if the client failed
+            start.abort()
+            errors.append(error)
+
+    workers: list[threading.Thread] = [
+        threading.Thread(target=complete_tasks, args=(index,))
+        for index in range(threads)
+    ]  # concurrent clients
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert not errors, errors
+    user = get_user()
+    assert user.tasks_completed == threads * completions
+    assert user.total_xp == sum(sum(client_xp) for client_xp in xp_gained)
+    with task_app.app.app_context():
+        assert (
+            task_app.db.session.execute(
+                task_app.db.select(task_app.func.sum(task_app.Task.times_completed))
+            ).scalar()
+            == threads * completions
+        )
+        assert task_app.CompletionEvent.query.count() == threads * completions
+    result = task_app.app.test_cli_runner().invoke(args=["stats", "rebuild", "--check"])
+    assert result.exit_code == 0, result.output  # no stats were overwritten
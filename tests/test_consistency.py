@@ -0,0 +1,97 @@
+"""
+Tests that the stored counters and stats agree with the tasks and the completion log they are calculated from.
+"""
+
+from datetime import datetime, timedelta, timezone
+import random
+from conftest import add_task, get_user, task_app
+
+
+def run_command(*args: str):  # run Flask CLI command
+    """
+    Run the Flask CLI command and return the result.
+    """
+    return task_app.app.test_cli_runner().invoke(args=list(args))
+
+
+def complete_random_tasks(task_ids: list[int], completions: int, seed: int) -> None:
+    """
+    Complete random tasks of the user Player over the next few months, with gaps of inactivity so the rating decays.
+    """
+    rng = random.Random(seed)
+    completed_at: datetime = datetime.now(timezone.utc)  # completion time
+    with task_app.app.app_context():
+        for _ in range(completions):  # repeat for each completion
+            completed_at += timedelta(
+                minutes=rng.choice((1, 5, 90, 60 * 24, 60 * 24 * 9))
+            )  # complete the next task after a random time
+            user = task_app.User.query.filter_by(username="Player").one()
+            task_app.complete_task_by_id(rng.choice(task_ids), user, completed_at)
+
+
+def test_active_tasks_stay_in_sync(client) -> None:
+    """
+    Adding, completing and deleting tasks keep the number of active tasks equal to the recounted number.
+    """
+    task_ids: list[int] = [
+        add_task(client, repeat_often=index % 5 + 1) for index in range(10)
+    ]  # two tasks of each repeat often
+    for task_id in task_ids[:4]:  # complete daily, weekly, monthly and yearly tasks
+        assert client.post(f"/api/complete_task/{task_id}").status_code == 200
+    for _ in range(2):  # complete the one-time task twice
+        assert client.post(f"/api/complete_task/{task_ids[4]}").status_code == 200
+    assert client.post(f"/api/delete_task/{task_ids[5]}").status_code == 200
+    assert client.post(f"/api/delete_task/{task_ids[4]}").status_code == 200
+    result = run_command("tasks", "recount", "--check")
+    assert result.exit_code == 0, result.output
+    assert get_user().active_tasks == 8
+    with task_app.app.app_context():
+        task_app.User.query.update({task_app.User.active_tasks: 3})
+        task_app.db.session.commit()
+    result = run_command("tasks", "recount", "--check")
+    assert result.exit_code == 1
+    assert "Player: 3 active tasks, counted 8" in result.output
+    assert get_user().active_tasks == 3  # check doesn't fix the count
+    assert run_command("tasks", "recount").exit_code == 0
+    assert run_command("tasks", "recount", "--check").exit_code == 0
+
+
+def test_replayed_stats_equal_live_stats(client) -> None:
+    """
+    Replaying the completion log gives exactly the stats the completions saved, from the first and from the latest snapshot.
+    """
+    task_app.app.config["STATS_SNAPSHOT_INTERVAL"], interval = (
+        7,
+        task_app.app.config["STATS_SNAPSHOT_INTERVAL"],
+    )  # save a few snapshots
+    try:
+        task_ids: list[int] = [
+            add_task(
+                client,
+                priority=index % 3 + 1,
+                difficulty=index % 2 + 1,
+                repeat_often=index % 5 + 1,
+            )
+            for index in range(8)
+        ]
+        complete_random_tasks(task_ids, 60, seed=4)
+    finally:
+        task_app.app.config["STATS_SNAPSHOT_INTERVAL"] = interval
+    live: dict = {
+        column: getattr(get_user(), column) for column in task_app.user_stats_columns
+    }  # stats saved by the completions
+    result = run_command("stats", "rebuild", "--check")
+    assert result.exit_code == 0, result.output
+    assert "Stats of 1 users match 60 replayed completions" in result.output
+    result = run_command("stats", "rebuild", "--check", "--from-latest-snapshot")
+    assert result.exit_code == 0, result.output
+    with task_app.app.app_context():
+        task_app.User.query.update({task_app.User.total_xp: 1.5})
+        task_app.db.session.commit()
+    result = run_command("stats", "rebuild", "--check")
+    assert result.exit_code == 1
+    assert f"total_xp: 1.5, replayed {live['total_xp']!r}" in result.output
+    assert run_command("stats", "rebuild").exit_code == 0
+    assert {
+        column: getattr(get_user(), column) for column in task_app.user_stats_columns
+    } == live
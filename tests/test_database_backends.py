@@ -0,0 +1,118 @@
+"""
+Tests that the connection pool settings are read from the environment and that the schema and init_db statements compile for PostgreSQL, without a PostgreSQL server.
+"""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex, CreateTable
+from conftest import task_app
+
+
+def test_engine_options_from_environment(tmp_path) -> None:
+    """
+    The pool options set in the environment are converted and applied to the engine, and unset or empty options are left out.
+    """
+    environment: dict[str, str] = {
+        "DATABASE_POOL_SIZE": "3",
+        "DATABASE_MAX_OVERFLOW": "7",
+        "DATABASE_POOL_PRE_PING": "1",
+        "DATABASE_POOL_RECYCLE": "1800",
+    }  # pool settings of a multi-worker deployment
+    options: dict = task_app.get_engine_options(environment)
+    assert options == {
+        "pool_size": 3,
+        "max_overflow": 7,
+        "pool_pre_ping": True,
+        "pool_recycle": 1800,
+    }
+    engine = create_engine("sqlite:///" + str(tmp_path / "pool.db"), **options)
+    try:
+        assert engine.pool.size() == 3
+        assert engine.pool._max_overflow == 7
+        assert engine.pool._pre_ping is True
+        assert engine.pool._recycle == 1800
+    finally:
+        engine.dispose()
+    assert task_app.get_engine_options({}) == {}
+    assert task_app.get_engine_options(
+        {"DATABASE_POOL_SIZE": "", "DATABASE_POOL_PRE_PING": "0"}
+    ) == {"pool_pre_ping": False}
+    with pytest.raises(ValueError):  # pool size must be a number
+        task_app.get_engine_options({"DATABASE_POOL_SIZE": "many"})
+
+
+def test_schema_compiles_for_postgresql() -> None:
+    """
+    Each table and index compiles to PostgreSQL DDL, with the reserved table name user quoted.
+    """
+    dialect = postgresql.dialect()
+    statements: dict[str, str] = {
+        table.name: str(CreateTable(table).compile(dialect=dialect))
+        for table in task_app.db.metadata.sorted_tables
+    }  # CREATE TABLE statement of each table
+    assert {"user", "task", "queued_completion", "completion_event"} <= set(
+        statements
+    )
+    assert statements["user"].startswith('\nCREATE TABLE "user"')
+    assert 'REFERENCES "user" (id)' in statements["task"]
+    assert "completed BOOLEAN" in statements["task"]
+    for table in task_app.db.metadata.sorted_tables:  # repeat for each table
+        for index in table.indexes:  # repeat for each index
+            assert str(CreateIndex(index).compile(dialect=dialect)).startswith(
+                "CREATE INDEX"
+            )
+
+
+@pytest.mark.parametrize(
+    "table_name, column_definitions",
+    [
+        ("user", task_app.user_column_definitions),
+        ("task", task_app.task_column_definitions),
+        ("queued_completion", task_app.queued_completion_column_definitions),
+    ],
+)
+def test_init_db_alters_compile_for_postgresql(
+    table_name: str, column_definitions: dict[str, str]
+) -> None:
+    """
+    The columns init_db adds to older databases are added with quoted table names and column types PostgreSQL supports.
+    """
+    dialect = postgresql.dialect()
+    quoted_name: str = dialect.identifier_preparer.quote(table_name)
+    for column_name, column_definition in column_definitions.items():
+        sql: str = task_app.get_add_column_sql(
+            table_name, column_name, column_definition, dialect
+        )
+        assert sql == (
+            f"ALTER TABLE {quoted_name} ADD COLUMN {column_name} {column_definition}"
+        )
+        assert column_definition.split()[0] in (
+            "INT",
+            "FLOAT",
+            "DATE",
+            "TIMESTAMP",
+            "VARCHAR(256)",
+        )  # types with the same name in SQLite and PostgreSQL
+        for clause in column_definition.split(" DEFAULT ")[1:]:
+            assert clause.lstrip("-").isdigit() or clause in (
+                "CURRENT_DATE",
+                "CURRENT_TIMESTAMP",
+            )  # defaults both databases accept
+    assert quoted_name == (
+        '"user"' if table_name == "user" else table_name
+    )  # user is a reserved word in PostgreSQL
+
+
+def test_user_lock_compiles_for_postgresql() -> None:
+    """
+    Locking the user row uses SELECT ... FOR UPDATE on PostgreSQL instead of BEGIN IMMEDIATE.
+    """
+    statement = (
+        task_app.db.select(task_app.User)
+        .where(task_app.User.id == 1)
+        .with_for_update()
+    )  # the statement lock_user runs
+    assert str(statement.compile(dialect=postgresql.dialect())).endswith(
+        "FOR UPDATE"
+    )
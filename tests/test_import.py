@@ -0,0 +1,203 @@
+"""
+Tests for the bulk task import from CSV and JSON Lines files, using the JSON API and flask tasks import.
+"""
+
+import io
+import json
+import pytest
+from sqlalchemy import event
+from conftest import add_task, get_user, task_app
+
+rows: list[dict] = [
+    {"name": "Water plants", "due_date": "2024-05-01", "repeat_often": "2"},
+    {"name": "Pay rent", "priority": "3", "repeat_often": "3"},
+    {"name": "Renew passport", "difficulty": "2"},
+    {"name": "Stretch", "repeat_interval": "2", "repeat_often": "1"},
+    {"name": "Call home", "due_date": "2024-05-03", "priority": "2"},
+]  # task rows to import
+
+
+def to_csv(task_rows: list[dict]) -> str:  # get CSV file contents
+    """
+    Get the task rows as a CSV file with a header row.
+    task_rows - the task rows.
+    """
+    columns: list[str] = [
+        "name",
+        "due_date",
+        "priority",
+        "difficulty",
+        "repeat_interval",
+        "repeat_often",
+    ]  # columns of the file
+    return "\n".join(
+        [",".join(columns)]
+        + [",".join(row.get(column, "") for column in columns) for row in task_rows]
+    )
+
+
+def to_jsonl(task_rows: list[dict]) -> str:  # get JSON Lines file contents
+    """
+    Get the task rows as a JSON Lines file, with numbers as JSON numbers.
+    task_rows - the task rows.
+    """
+    return "\n".join(
+        json.dumps(
+            {
+                column: value if column in ("name", "due_date") else int(value)
+                for column, value in row.items()
+            }
+        )
+        for row in task_rows
+    )
+
+
+def upload(test_client, contents: str, filename: str, **form):  # import using API
+    """
+    Upload the file to the import API.
+    test_client - the logged in test client.
+    contents - the file contents.
+    filename - the file name, which sets the file format.
+    form - other form fields, such as the batch size.
+    Return the response.
+    """
+    return test_client.post(
+        "/api/import",
+        data={"file": (io.BytesIO(contents.encode()), filename), **form},
+        content_type="multipart/form-data",
+    )
+
+
+def get_task_names() -> list[str]:  # get the user's task names
+    """
+    Get the names of the user Player's tasks in the order they were added.
+    """
+    with task_app.app.app_context():
+        return list(
+            task_app.db.session.execute(
+                task_app.db.select(task_app.Task.name)
+                .where(task_app.Task.user_id == get_user().id)
+                .order_by(task_app.Task.id)
+            ).scalars()
+        )
+
+
+@pytest.mark.parametrize(
+    "filename, contents",
+    [("tasks.csv", to_csv(rows)), ("tasks.jsonl", to_jsonl(rows))],
+)
+def test_import_adds_tasks(client, filename: str, contents: str) -> None:
+    """
+    Importing a CSV or JSON Lines file adds each row as a task with its values or the defaults, and counts them as active tasks.
+    """
+    add_task(client, name="Existing")
+    response = upload(client, contents, filename)
+    assert response.status_code == 201, response.get_json()
+    assert response.get_json()["imported"] == len(rows)
+    assert response.get_json()["rows_per_second"] > 0
+    assert get_task_names() == ["Existing"] + [row["name"] for row in rows]
+    with task_app.app.app_context():
+        tasks: dict[str, task_app.Task] = {
+            task.name: task
+            for task in task_app.Task.query.filter(
+                task_app.Task.user_id == get_user().id
+            )
+        }
+        assert tasks["Water plants"].due_date == task_app.date(2024, 5, 1)
+        assert tasks["Water plants"].repeat_often == 2
+        assert tasks["Pay rent"].priority == 3
+        assert tasks["Pay rent"].due_date == task_app.date.today()
+        assert tasks["Renew passport"].repeat_often == 5  # one-time by default
+        assert tasks["Stretch"].repeat_interval == 2
+        assert task_app.get_active_task_mismatches() == []
+    assert get_user().active_tasks == len(rows) + 1
+
+
+def test_import_inserts_in_batches(client) -> None:
+    """
+    The tasks are inserted with one statement for each batch.
+    """
+    inserts: list[int] = []  # number of rows of each task insert
+
+    def record_insert(
+        conn, cursor, statement, parameters, context, executemany
+    ) -> None:  # record task inserts
+        """
+        Record the number of rows of each task insert.
+        """
+        if statement.startswith("INSERT INTO task "):  # if inserting tasks
+            inserts.append(len(parameters) if executemany else 1)
+
+    with task_app.app.app_context():
+        engine = task_app.db.engine  # engine used by requests
+    event.listen(engine, "before_cursor_execute", record_insert)
+    try:
+        response = upload(client, to_csv(rows), "tasks.csv", batch_size="2")
+    finally:
+        event.remove(engine, "before_cursor_execute", record_insert)
+    assert response.status_code == 201, response.get_json()
+    assert inserts == [2, 2, 1]
+    assert len(get_task_names()) == len(rows)
+
+
+@pytest.mark.parametrize(
+    "bad_row, error",
+    [
+        ({"name": ""}, "Row 4: name must be 1 to 80 characters"),
+        ({"name": "Bad", "due_date": "May 1"}, "Row 4: due_date must be in"),
+        ({"name": "Bad", "priority": "4"}, "Row 4: priority must be at most 3"),
+        ({"name": "Bad", "repeat_interval": "0"}, "Row 4: repeat_interval must be"),
+    ],
+)
+def test_bad_row_imports_nothing(client, bad_row: dict, error: str) -> None:
+    """
+    An invalid row after some batches were inserted rolls back the whole import, and leaves the active tasks unchanged.
+    """
+    add_task(client, name="Existing")
+    task_rows: list[dict] = rows[:3] + [bad_row] + rows[3:]  # 4th row is invalid
+    response = upload(client, to_csv(task_rows), "tasks.csv", batch_size="2")
+    assert response.status_code == 400
+    assert response.get_json()["error"].startswith(error)
+    assert get_task_names() == ["Existing"]
+    assert get_user().active_tasks == 1
+
+
+def test_import_rejects_unknown_format(client) -> None:
+    """
+    A file that isn't CSV or JSON Lines isn't imported.
+    """
+    response = upload(client, to_csv(rows), "tasks.txt")
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "Unsupported file format: txt"
+
+
+@pytest.mark.parametrize(
+    "filename, contents",
+    [("tasks.csv", to_csv(rows)), ("tasks.jsonl", to_jsonl(rows))],
+)
+def test_import_command(client, tmp_path, filename: str, contents: str) -> None:
+    """
+    flask tasks import imports a CSV or JSON Lines file in batches and reports the rows per second, and imports nothing if a row is invalid.
+    """
+    path = tmp_path / filename
+    path.write_text(contents)
+    runner = task_app.app.test_cli_runner()
+    result = runner.invoke(
+        args=["tasks", "import", "--user", "Player", "--batch-size", "2", str(path)]
+    )
+    assert result.exit_code == 0, result.output
+    assert f"Imported {len(rows)} tasks in " in result.output
+    assert "rows per second" in result.output
+    assert get_task_names() == [row["name"] for row in rows]
+    assert get_user().active_tasks == len(rows)
+    to_file = to_csv if filename.endswith(".csv") else to_jsonl  # file writer
+    bad_path = tmp_path / ("bad-" + filename)
+    bad_path.write_text(
+        to_file(rows + [{"name": "Bad", "priority": "9"}])
+    )  # valid rows followed by an invalid row
+    result = runner.invoke(args=["tasks", "import", "--user", "Player", str(bad_path)])
+    assert result.exit_code == 1
+    assert f"Row {len(rows) + 1}: priority must be at most 3" in result.output
+    assert len(get_task_names()) == len(rows)
+    result = runner.invoke(args=["tasks", "import", "--user", "Nobody", str(path)])
+    assert result.exit_code == 1 and "User not found: Nobody" in result.output
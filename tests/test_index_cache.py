@@ -0,0 +1,48 @@
+"""
+Tests for the conditional requests of the task list page.
+"""
+
+from conftest import add_task
+
+
+def test_index_not_modified_until_tasks_change(client) -> None:
+    """
+    The page is not modified while the ETag matches, and is sent again after a task is added.
+    """
+    response = client.get("/")
+    etag: str = response.headers["ETag"]
+    assert "Last-Modified" not in response.headers
+    assert client.get("/", headers={"If-None-Match": etag}).status_code == 304
+    add_task(client)
+    response = client.get("/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_index_ignores_if_modified_since(client) -> None:
+    """
+    A browser copy validated only by its date is sent again, since the page also changes with the current date.
+    """
+    add_task(client)  # set the last modified time
+    response = client.get(
+        "/", headers={"If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"}
+    )
+    assert response.status_code == 200
+
+
+def test_page_with_flashed_messages_is_not_cached(client) -> None:
+    """
+    A page that shows flashed messages has no ETag, so a later request doesn't get a 304 for a copy that still shows the old messages.
+    """
+    task_id: int = add_task(client)
+    etag: str = client.get("/").headers["ETag"]  # ETag of the page before
+    client.get(f"/complete_task/{task_id}")
+    response = client.get("/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert b"Task completed!" in response.data
+    assert "ETag" not in response.headers
+    assert response.cache_control.no_store
+    response = client.get("/")  # same page without the shown message
+    assert b"Task completed!" not in response.data
+    etag = response.headers["ETag"]
+    assert client.get("/", headers={"If-None-Match": etag}).status_code == 304
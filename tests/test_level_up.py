@@ -0,0 +1,81 @@
+"""
+Tests for level ups, compared with the original loop that gained one level at a time.
+"""
+
+import math
+import random
+import pytest
+from conftest import task_app
+
+
+def level_up_by_loop(level: int, xp: float, xp_required: float) -> tuple:  # original loop
+    """
+    Level up one level at a time the way check_level_up did before the level table.
+    Return the level, XP and XP required.
+    """
+    while xp >= xp_required:  # if user XP is greater than or equal to XP required
+        xp -= xp_required
+        xp_required = max(
+            1.0,
+            round(xp_required + max(1.0, xp_required * 1.0 / math.sqrt(level))),
+        )
+        level += 1
+    return level, xp, xp_required
+
+
+@pytest.fixture
+def new_level_table():  # level table of a newly started process
+    """
+    Reset the level table to its starting size, as after a restart, and restore it after the test.
+    """
+    xp_required, total_xp = (
+        task_app.level_xp_required[:],
+        task_app.level_total_xp[:],
+    )
+    del task_app.level_xp_required[2:], task_app.level_total_xp[2:]
+    yield
+    task_app.level_xp_required[:], task_app.level_total_xp[:] = xp_required, total_xp
+
+
+def check_level_up(level: int, xp: float, xp_required: float) -> tuple:  # level up
+    """
+    Level up a user with check_level_up.
+    Return the level, XP and XP required.
+    """
+    user = task_app.User(level=level, xp=xp, xp_required=xp_required)
+    user.check_level_up()
+    return user.level, user.xp, user.xp_required
+
+
+def test_level_up_matches_loop(new_level_table) -> None:
+    """
+    Any award gives the same level, XP and XP required as the loop.
+    """
+    rng = random.Random(0)
+    for _ in range(500):
+        level, xp, xp_required = level_up_by_loop(
+            1, rng.uniform(0, 10 ** rng.randint(0, 6)), 1
+        )  # get a user state reached by playing
+        xp += rng.choice((0, 0.5, 1, 37, 1e3, 1e5, 1e7)) * rng.random()  # award XP
+        assert check_level_up(level, xp, xp_required) == level_up_by_loop(
+            level, xp, xp_required
+        )
+
+
+def test_high_level_user_after_restart_uses_level_table(new_level_table) -> None:
+    """
+    A user above level 1 after a restart extends the level table instead of falling back to the loop.
+    """
+    level, xp, xp_required = level_up_by_loop(1, 500000, 1)
+    assert level > 50 and len(task_app.level_xp_required) == 2
+    assert check_level_up(level, xp + 1e6, xp_required) == level_up_by_loop(
+        level, xp + 1e6, xp_required
+    )
+    assert len(task_app.level_xp_required) > level  # table covers the user level
+
+
+def test_xp_required_not_in_level_table_uses_loop(new_level_table) -> None:
+    """
+    A user whose XP required doesn't match the level table still levels up like the loop.
+    """
+    assert check_level_up(10, 5000, 123) == level_up_by_loop(10, 5000, 123)
@@ -0,0 +1,79 @@
+"""
+Tests for signing up, logging in and setting the password of users created before passwords.
+"""
+
+from conftest import get_user, login, task_app
+
+
+def logged_in_username(test_client) -> str:  # get logged in username
+    """
+    Get the username of the user logged in to the test client, or an empty string.
+    """
+    with test_client.session_transaction() as session:
+        user_id = session.get("user_id")
+    if user_id is None:  # if not logged in
+        return ""
+    with task_app.app.app_context():
+        return task_app.db.session.get(task_app.User, user_id).username
+
+
+def test_unknown_username_does_not_create_user() -> None:
+    """
+    Logging in with an unknown username fails instead of creating the user.
+    """
+    test_client = task_app.app.test_client()
+    login(test_client, "Nobody")
+    assert b"Wrong username or password." in test_client.get("/login").data
+    assert logged_in_username(test_client) == ""
+    with task_app.app.app_context():
+        assert task_app.User.query.count() == 0
+
+
+def test_sign_up_and_log_in() -> None:
+    """
+    Signing up creates and logs in the user, who can log in again with the same password only.
+    """
+    test_client = task_app.app.test_client()
+    login(test_client, "Player", "secret", action="sign_up")
+    assert logged_in_username(test_client) == "Player"
+    other_client = task_app.app.test_client()
+    login(other_client, "Player", "secret", action="sign_up")
+    assert b"Username is taken" in other_client.get("/login").data
+    assert logged_in_username(other_client) == ""  # sign up doesn't log in
+    login(other_client, "Player", "wrong")
+    assert logged_in_username(other_client) == ""
+    login(other_client, "Player", "secret")
+    assert logged_in_username(other_client) == "Player"
+
+
+def test_user_without_password_is_not_claimed() -> None:
+    """
+    A user created before passwords can't be claimed by the first login, only after an administrator sets the password.
+    """
+    with task_app.app.app_context():
+        task_app.db.session.add(
+            task_app.User(
+                username="Legacy",
+                level=7,
+                last_completion_date=task_app.date.today(),
+                last_time_clicked=task_app.datetime.now(),
+            )
+        )  # user created before passwords
+        task_app.db.session.commit()
+    test_client = task_app.app.test_client()
+    login(test_client, "Legacy", "guess")
+    assert logged_in_username(test_client) == ""
+    assert get_user("Legacy").password_hash is None
+    runner = task_app.app.test_cli_runner()
+    result = runner.invoke(
+        args=["users", "set-password", "Legacy"], input="secret\nsecret\n"
+    )  # set password at the prompt
+    assert result.exit_code == 0, result.output
+    login(test_client, "Legacy", "guess")
+    assert logged_in_username(test_client) == ""
+    login(test_client, "Legacy", "secret")
+    assert logged_in_username(test_client) == "Legacy"
+    assert get_user("Legacy").level == 7  # the existing user is kept
+    result = runner.invoke(args=["users", "set-password", "Nobody", "--password", "x"])
+    assert result.exit_code == 1
+    assert "User not found: Nobody" in result.output
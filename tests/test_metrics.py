@@ -0,0 +1,162 @@
+"""
+Tests for the opt-in instrumentation: the Server-Timing header, the per-request SQL statement counts, the span timings and the Prometheus metrics.
+"""
+
+from datetime import date, timedelta
+import logging
+import re
+import pytest
+from sqlalchemy import event
+from conftest import add_task, task_app
+
+sample_line = re.compile(
+    r"^(?P<name>[a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(?P<labels>[^}]*)\})? (?P<value>\S+)$"
+)  # Prometheus sample line with optional labels
+label_pair = re.compile(r'(\w+)="([^"]*)"')  # Prometheus label name and value
+
+
+@pytest.fixture
+def instrumentation(monkeypatch):  # turn on instrumentation with empty metrics
+    """
+    Turn on instrumentation and record the metrics of the test only.
+    """
+    monkeypatch.setitem(task_app.app.config, "INSTRUMENTATION", True)
+    monkeypatch.setattr(task_app, "metrics", task_app.Metrics())
+
+
+def parse_metrics(body: str) -> dict[tuple[str, tuple], float]:  # parse metrics
+    """
+    Parse the Prometheus text format, checking that each sample belongs to a metric declared with HELP and TYPE.
+    body - the metrics in the Prometheus text format.
+    Return the value of each sample by name and sorted labels.
+    """
+    declared: dict[str, list[str]] = {}  # comments seen for each metric family
+    samples: dict[tuple[str, tuple], float] = {}  # value of each sample
+    for line in body.splitlines():  # repeat for each line
+        if line.startswith("# "):  # if line is a HELP or TYPE comment
+            kind, family = line.split()[1:3]
+            declared.setdefault(family, []).append(kind)
+            continue
+        match = sample_line.match(line)
+        assert match, f"invalid sample line: {line!r}"
+        name: str = match["name"]
+        family: str = re.sub(r"_(bucket|sum|count)$", "", name)
+        assert declared.get(name) == ["HELP", "TYPE"] or declared.get(family) == [
+            "HELP",
+            "TYPE",
+        ], f"{name} is not declared"
+        samples[(name, tuple(sorted(label_pair.findall(match["labels"] or ""))))] = (
+            float(match["value"])
+        )
+    return samples
+
+
+def count_request_statements(request) -> tuple[object, int]:  # count SQL statements
+    """
+    Make the request and count the SQL statements it runs.
+    request - the function that makes the request.
+    Return the response and the number of statements.
+    """
+    statements: list[int] = [0]  # number of statements
+
+    def count_statement(
+        conn, cursor, statement, parameters, context, executemany
+    ) -> None:  # count statement
+        """
+        Count the statement.
+        """
+        statements[0] += 1
+
+    with task_app.app.app_context():
+        engine = task_app.db.engine  # engine used by requests
+    event.listen(engine, "before_cursor_execute", count_statement)
+    try:
+        response = request()
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
+    return response, statements[0]
+
+
+def test_instrumentation_is_off_by_default(client) -> None:
+    """
+    Without instrumentation there is no Server-Timing header and /metrics isn't found.
+    """
+    assert "Server-Timing" not in client.get("/").headers
+    assert client.get("/metrics").status_code == 404
+
+
+def test_server_timing_and_metrics(client, instrumentation) -> None:
+    """
+    A task completion after a few inactive days reports its SQL statements and the lock, score, level up and decay spans in the Server-Timing header and in /metrics.
+    """
+    task_id: int = add_task(client)
+    with task_app.app.app_context():
+        task_app.User.query.update(
+            {task_app.User.last_completion_date: date.today() - timedelta(days=3)}
+        )  # the rating decays at the next completion
+        task_app.db.session.commit()
+    response, statements = count_request_statements(
+        lambda: client.post(f"/api/complete_task/{task_id}")
+    )
+    assert response.status_code == 200
+    timings: dict[str, str] = {
+        entry.split(";")[0].strip(): entry
+        for entry in response.headers["Server-Timing"].split(",")
+    }  # Server-Timing entry of each metric
+    assert re.fullmatch(r"app;dur=\d+\.\d", timings["app"])
+    assert re.fullmatch(
+        rf'sql;dur=\d+\.\d;desc="{statements} statements"', timings["sql"].strip()
+    )
+    assert {"lock", "score", "level_up", "decay"} <= set(timings)
+    body: str = client.get("/metrics").get_data(as_text=True)
+    assert body.endswith("\n")
+    samples: dict[tuple[str, tuple], float] = parse_metrics(body)
+    labels: tuple = (
+        ("endpoint", "api_complete_task"),
+        ("method", "POST"),
+        ("status", "200"),
+    )  # labels of the completion request
+    assert samples[("app_request_duration_seconds_count", labels)] == 1
+    inf_labels: tuple = tuple(sorted(labels + (("le", "+Inf"),)))  # last bucket
+    assert samples[("app_request_duration_seconds_bucket", inf_labels)] == 1
+    assert samples[("app_request_duration_seconds_sum", labels)] > 0
+    endpoint: tuple = (("endpoint", "api_complete_task"),)  # labels of SQL metrics
+    assert samples[("app_sql_statements_total", endpoint)] == statements
+    assert samples[("app_sql_duration_seconds_total", endpoint)] > 0
+    for name in ("lock", "score", "level_up", "decay"):  # repeat for each span
+        assert samples[("app_span_duration_seconds_count", (("span", name),))] >= 1
+    assert samples[("app_completion_queue_depth", ())] == 0
+    buckets: list[float] = [
+        value
+        for (name, sample_labels), value in samples.items()
+        if name == "app_request_duration_seconds_bucket"
+        and ("endpoint", "api_add_task") in sample_labels
+    ]  # buckets of the add task request in label order
+    assert len(buckets) == len(task_app.Metrics.request_buckets) + 1
+    assert buckets == sorted(buckets) and buckets[-1] == 1  # cumulative counts
+
+
+def test_statement_budget_warning(client, instrumentation, monkeypatch, caplog) -> None:
+    """
+    A request that runs more statements than the budget is logged with its statement count.
+    """
+    monkeypatch.setitem(task_app.app.config, "SQL_STATEMENT_BUDGET", 1)
+    with caplog.at_level(logging.WARNING, logger=task_app.app.logger.name):
+        response, statements = count_request_statements(lambda: client.get("/"))
+    assert response.status_code == 200 and statements > 1
+    assert f"GET / ran {statements} SQL statements, more than the budget of 1" in (
+        caplog.text
+    )
+
+
+def test_slow_sampled_request_is_profiled(
+    client, instrumentation, monkeypatch, tmp_path
+) -> None:
+    """
+    A sampled request slower than the threshold saves a cProfile dump named after its endpoint.
+    """
+    monkeypatch.setitem(task_app.app.config, "PROFILE_SAMPLE_RATE", 1.0)
+    monkeypatch.setitem(task_app.app.config, "PROFILE_SLOW_REQUEST_MS", 0.0)
+    monkeypatch.setitem(task_app.app.config, "PROFILE_DIR", str(tmp_path))
+    assert client.get("/").status_code == 200
+    assert [path.name.split("-")[3] for path in tmp_path.glob("*.prof")] == ["index"]
@@ -0,0 +1,157 @@
+"""
+Tests for the keyset pagination of the task list, by due date and task ID.
+"""
+
+from datetime import date, timedelta
+from typing import Union
+import pytest
+from conftest import add_task, get_user, task_app
+
+page_size: int = 3  # tasks on each page
+
+
+@pytest.fixture
+def small_pages(monkeypatch):  # show a few tasks on each page
+    """
+    Show 3 tasks on each page of the task list.
+    """
+    monkeypatch.setitem(task_app.app.config, "TASKS_PER_PAGE", page_size)
+
+
+def add_tasks(test_client) -> list[int]:  # add tasks sharing due dates
+    """
+    Add 7 tasks with 3 due dates, so pages break between tasks due on the same date.
+    test_client - the logged in test client.
+    Return the task IDs in task list order.
+    """
+    today: date = date.today()
+    due_dates: list[date] = [
+        today + timedelta(days=days) for days in (2, 0, 1, 0, 2, 0, 1)
+    ]  # due dates out of order
+    task_ids: list[tuple[date, int]] = [
+        (
+            due_date,
+            add_task(
+                test_client, name=f"Task {index}", due_date=due_date.isoformat()
+            ),
+        )
+        for index, due_date in enumerate(due_dates)
+    ]  # add each task
+    return [task_id for _, task_id in sorted(task_ids)]
+
+
+def get_page(
+    show_completed: bool = False,
+    after: Union[str, None] = None,
+    before: Union[str, None] = None,
+) -> tuple[list[int], Union[str, None], Union[str, None]]:  # get page of task IDs
+    """
+    Get a page of the user Player's tasks.
+    show_completed - whether to include completed tasks.
+    after - the cursor of the task before the page.
+    before - the cursor of the task after the page.
+    Return the task IDs, the previous page cursor and the next page cursor.
+    """
+    with task_app.app.app_context():
+        tasks, previous_cursor, next_cursor = task_app.get_task_page(
+            get_user().id,
+            page_size,
+            show_completed,
+            task_app.parse_task_cursor(after),
+            task_app.parse_task_cursor(before),
+        )
+    return [task.id for task in tasks], previous_cursor, next_cursor
+
+
+def test_next_and_previous_pages(client) -> None:
+    """
+    Following the next cursors shows each task once in due date and ID order, and following the previous cursors shows the same pages again.
+    """
+    task_ids: list[int] = add_tasks(client)
+    pages: list[list[int]] = []  # task IDs of each page
+    cursors: list[tuple] = []  # previous and next cursors of each page
+    next_cursor = None  # cursor of the last task of the page
+    while True:
+        page, previous_cursor, next_cursor = get_page(after=next_cursor)
+        pages.append(page)
+        cursors.append((previous_cursor, next_cursor))
+        if next_cursor is None:  # if this is the last page
+            break
+    assert pages == [task_ids[0:3], task_ids[3:6], task_ids[6:7]]
+    assert cursors[0][0] is None  # first page has no previous page
+    for index in (2, 1):  # repeat for each page after the first, going back
+        page, previous_cursor, next_cursor = get_page(before=cursors[index][0])
+        assert page == pages[index - 1]
+        assert (previous_cursor is None) == (index - 1 == 0)
+        assert next_cursor is not None
+
+
+def test_tasks_due_on_the_same_date_are_split_by_id(client) -> None:
+    """
+    A page that ends partway through a due date continues with the next task ID on that date.
+    """
+    task_ids: list[int] = add_tasks(client)
+    page, _, next_cursor = get_page()
+    assert page == task_ids[0:3]  # the 3 tasks due today
+    with task_app.app.app_context():
+        last_task = task_app.db.session.get(task_app.Task, task_ids[1])
+        cursor: str = task_app.format_task_cursor(last_task)
+    assert get_page(after=cursor)[0] == task_ids[2:5]  # continues after the ID
+    assert get_page(before=cursor)[0] == task_ids[0:1]  # stops before the ID
+
+
+def test_last_and_empty_pages(client) -> None:
+    """
+    The last page has no next cursor, and a user without tasks or a cursor after the last task gets an empty page without cursors.
+    """
+    assert get_page() == ([], None, None)
+    task_ids: list[int] = add_tasks(client)
+    with task_app.app.app_context():
+        last_task = task_app.db.session.get(task_app.Task, task_ids[-1])
+        cursor: str = task_app.format_task_cursor(last_task)
+    assert get_page(after=cursor) == ([], None, None)
+    page, previous_cursor, next_cursor = get_page(before=cursor)
+    assert page == task_ids[3:6] and previous_cursor and next_cursor
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    ["", "nonsense", "2024-13-01_1", "2024-01-01_x", "2024-01-01", "1_2_3"],
+)
+def test_invalid_cursor_shows_first_page(client, small_pages, cursor: str) -> None:
+    """
+    An invalid cursor is ignored and shows the first page instead of an error.
+    """
+    task_ids: list[int] = add_tasks(client)
+    assert task_app.parse_task_cursor(cursor) is None
+    for parameter in ("after", "before"):  # repeat for each cursor parameter
+        response = client.get("/", query_string={parameter: cursor})
+        assert response.status_code == 200
+        assert b"Task 1<" in response.data  # first task due today is shown
+        next_link: str = f"after={date.today():%Y-%m-%d}_{task_ids[2]}"
+        assert next_link.encode() in response.data  # link to the second page
+
+
+def test_completed_tasks_are_hidden_by_default(client, small_pages) -> None:
+    """
+    Completed one-time tasks are hidden unless completed tasks are shown, and pages stay full without them.
+    """
+    task_ids: list[int] = add_tasks(client)
+    once_task_id: int = add_task(
+        client, name="Errand", repeat_often=5, due_date=date.today().isoformat()
+    )  # one-time task due today, last of the tasks due today
+    assert client.post(f"/api/complete_task/{once_task_id}").status_code == 200
+    with task_app.app.app_context():
+        cursor: str = task_app.format_task_cursor(
+            task_app.db.session.get(task_app.Task, task_ids[2])
+        )  # cursor of the last task of the first page
+    assert get_page(after=cursor)[0] == task_ids[3:6]
+    assert get_page(show_completed=True, after=cursor)[0] == [
+        once_task_id,
+        *task_ids[3:5],
+    ]  # completed task is due today, after the other tasks due today
+    assert b"Errand<" not in client.get("/", query_string={"after": cursor}).data
+    assert (
+        b"Errand<"
+        in client.get("/", query_string={"show_completed": 1, "after": cursor}).data
+    )
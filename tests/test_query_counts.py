@@ -0,0 +1,133 @@
+"""
+Tests that each task list route runs at most a fixed number of SQL statements however many tasks the user has, to catch code that runs one query per task.
+"""
+
+from typing import Callable
+import pytest
+from sqlalchemy import event
+from conftest import add_task, get_user, task_app
+
+task_counts: tuple[int, ...] = (10, 1000, 10000)  # number of tasks of each check
+task_form: dict[str, str] = {
+    "name": "New task",
+    "due_date": task_app.date.today().isoformat(),
+    "priority": "2",
+    "difficulty": "2",
+    "repeat_interval": "1",
+    "repeat_often": "1",
+}  # form data of added tasks
+routes: dict[str, tuple[int, int, Callable]] = {
+    "index": (2, 200, lambda test_client, task_id: test_client.get("/")),
+    "add": (
+        6,
+        302,
+        lambda test_client, task_id: test_client.post("/add", data=task_form),
+    ),
+    "api_add": (
+        7,
+        201,
+        lambda test_client, task_id: test_client.post("/api/add", json=task_form),
+    ),
+    "complete_task": (
+        9,
+        302,
+        lambda test_client, task_id: test_client.get(f"/complete_task/{task_id}"),
+    ),
+    "api_complete_task": (
+        11,
+        200,
+        lambda test_client, task_id: test_client.post(
+            f"/api/complete_task/{task_id}"
+        ),
+    ),
+    "delete_task": (
+        8,
+        302,
+        lambda test_client, task_id: test_client.get(f"/delete_task/{task_id}"),
+    ),
+    "api_delete_task": (
+        8,
+        200,
+        lambda test_client, task_id: test_client.post(f"/api/delete_task/{task_id}"),
+    ),
+}  # maximum number of statements, expected status and request of each route
+
+
+def add_tasks(count: int) -> None:  # add tasks in bulk
+    """
+    Add tasks to the user Player until they have the given number of tasks.
+    count - the number of tasks the user should have.
+    """
+    user_id: int = get_user().id  # get user ID
+    with task_app.app.app_context():
+        existing: int = task_app.Task.query.filter(
+            task_app.Task.user_id == user_id
+        ).count()  # number of tasks the user has
+        if existing < count:  # if the user needs more tasks
+            task_app.db.session.execute(
+                task_app.db.insert(task_app.Task),
+                [
+                    {
+                        "name": f"Task {number}",
+                        "user_id": user_id,
+                        "due_date": task_app.date.today(),
+                        "priority": 1,
+                        "difficulty": 1,
+                        "repeat_interval": 1,
+                        "repeat_often": 1,
+                    }
+                    for number in range(existing, count)
+                ],
+            )  # add the missing tasks
+        task_app.db.session.commit()
+        task_app.recount_active_tasks()  # count the added tasks
+        task_app.db.session.commit()
+    for cache in (task_app.task_cache, task_app.page_cache):  # repeat for each cache
+        with cache.lock:
+            cache.items.clear()  # render every task again
+
+
+def count_statements(request: Callable) -> tuple[object, int]:  # count SQL
+    """
+    Count the SQL statements run while making the request.
+    request - the function that makes the request.
+    Return the response and the number of statements.
+    """
+    statements: list[str] = []  # SQL of each statement
+
+    def record_statement(
+        conn, cursor, statement, parameters, context, executemany
+    ) -> None:  # record statement
+        """
+        Record the SQL of the statement.
+        """
+        statements.append(statement)
+
+    with task_app.app.app_context():
+        engine = task_app.db.engine  # engine used by requests
+    event.listen(engine, "before_cursor_execute", record_statement)
+    try:
+        response = request()
+    finally:
+        event.remove(engine, "before_cursor_execute", record_statement)
+    return response, len(statements)
+
+
+@pytest.mark.parametrize("route", list(routes))
+def test_statements_dont_grow_with_tasks(client, route: str) -> None:
+    """
+    The route runs at most its maximum number of statements, and the same number, with 10, 1,000 and 10,000 tasks.
+    """
+    maximum, status, make_request = routes[route]
+    first_task_id: int = add_task(client)  # task completed before counting
+    client.post(f"/api/complete_task/{first_task_id}")  # first completion of the day
+    counts: dict[int, int] = {}  # statements run for each number of tasks
+    for count in task_counts:  # repeat for each number of tasks
+        task_id: int = add_task(client)  # task to complete or delete
+        add_tasks(count)
+        response, counts[count] = count_statements(
+            lambda: make_request(client, task_id)
+        )
+        assert response.status_code == status
+    assert max(counts.values()) <= maximum, counts
+    assert len(set(counts.values())) == 1, counts
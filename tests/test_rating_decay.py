@@ -0,0 +1,90 @@
+"""
+Tests for the inactivity rating decay, compared with the original loop that counted overdue tasks with one query per day.
+"""
+
+from datetime import date, timedelta
+import math
+import random
+from conftest import get_user, task_app
+
+
+def decay_rating_by_day(
+    rating: float, user_id: int, start_date: date, days: int
+) -> float:  # original rating decay loop
+    """
+    Decrease the rating for each day of inactivity the way complete_task did before, counting overdue tasks with one query per day.
+    """
+    for i in range(days):  # repeat for each day of inactivity
+        overdue_tasks: int = task_app.Task.query.filter(
+            task_app.Task.user_id == user_id,
+            task_app.Task.due_date < start_date + timedelta(days=i),
+        ).count()  # get number of overdue tasks
+        rating -= max(
+            (
+                math.sqrt(max(rating, 0))
+                * (1 + math.log(max(i + 1, 1)))
+                * (1 + math.log(max(overdue_tasks + 1, 1)))
+            ),
+            0,
+        )
+        rating = max(rating, 0)
+    return rating
+
+
+def add_random_tasks(user_id: int, count: int, seed: int) -> None:  # add tasks
+    """
+    Add tasks with random due dates around 2024, some completed, to the user.
+    """
+    rng = random.Random(seed)
+    with task_app.app.app_context():
+        task_app.db.session.execute(
+            task_app.insert(task_app.Task),
+            [
+                {
+                    "user_id": user_id,
+                    "name": f"Task {index}",
+                    "original_due_date": date(2024, 1, 1),
+                    "due_date": date(2024, 1, 1) + timedelta(days=rng.randint(-60, 800)),
+                    "repeat_often": rng.randint(1, 5),
+                    "completed": rng.random() < 0.2,
+                }
+                for index in range(count)
+            ],
+        )
+        task_app.db.session.commit()
+
+
+def test_overdue_task_counts_match_count_per_day(client) -> None:
+    """
+    The grouped query gives the same overdue task count for each day as one count query per day, and ignores other users' tasks.
+    """
+    user_id: int = get_user().id
+    add_random_tasks(user_id, 300, seed=1)
+    add_random_tasks(user_id + 1000, 100, seed=2)  # tasks of another user
+    start_date = date(2024, 1, 1)
+    with task_app.app.app_context():
+        counts: list[int] = task_app.get_overdue_task_counts(user_id, start_date, 730)
+        assert counts == [
+            task_app.Task.query.filter(
+                task_app.Task.user_id == user_id,
+                task_app.Task.due_date < start_date + timedelta(days=i),
+            ).count()
+            for i in range(730)
+        ]
+        assert task_app.get_overdue_task_counts(user_id, start_date, 0) == []
+
+
+def test_rating_decay_is_identical_to_daily_loop(client) -> None:
+    """
+    The rating after any number of inactive days is bit-for-bit the same as the original loop.
+    """
+    user_id: int = get_user().id
+    add_random_tasks(user_id, 200, seed=3)
+    start_date = date(2024, 1, 1)
+    with task_app.app.app_context():
+        for rating in (0.0, 0.5, 3.0, 17.25, 250.0, 12345.678):
+            for days in (1, 2, 7, 31, 365, 730):
+                assert task_app.calculate_inactivity_rating_decay(
+                    rating,
+                    task_app.get_overdue_task_counts(user_id, start_date, days),
+                ) == decay_rating_by_day(rating, user_id, start_date, days)
@@ -0,0 +1,131 @@
+"""
+Property tests for the recurring event expansion functions, compared with calculate_next_recurring_event for random tasks and date ranges.
+"""
+
+from datetime import date, timedelta
+import random
+import numpy as np
+from conftest import task_app
+
+
+def expand_by_next_event(
+    original_date: date,
+    repeat_interval: int,
+    repeat_often: int,
+    start_date: date,
+    end_date: date,
+    min_times_completed: int = 0,
+) -> list[tuple[int, date]]:  # expand recurring events one completion at a time
+    """
+    Get the number of times completed and date of each recurring event in the date range by calling calculate_next_recurring_event for each number of times completed.
+    """
+    if repeat_often == 5:  # if the event doesn't repeat
+        in_range: bool = start_date <= original_date <= end_date
+        return [(0, original_date)] if min_times_completed == 0 and in_range else []
+    events: list[tuple[int, date]] = []  # events in the date range
+    times_completed: int = min_times_completed
+    while True:  # repeat until past the end date, event dates always increase
+        event_date: date = task_app.calculate_next_recurring_event(
+            original_date, times_completed, repeat_interval, repeat_often
+        )
+        if event_date > end_date:  # if past the end date
+            return events
+        if event_date >= start_date:  # if event is within the date range
+            events.append((times_completed, event_date))
+        times_completed += 1
+
+
+def random_task(rng: random.Random) -> tuple[date, int, int, int]:  # random task
+    """
+    Get a random original date, repeat interval, repeat often and smallest number of times completed, favoring month ends and leap days.
+    """
+    original_date: date = date(2020, 1, 1) + timedelta(days=rng.randrange(2000))
+    if rng.random() < 0.3:  # if task starts at the end of a month
+        month_end: date = date(rng.randint(2020, 2025), rng.randint(1, 12), 28)
+        original_date = month_end + timedelta(
+            days=rng.randint(0, 3)
+        )  # 28th to 31st, or early next month
+    if rng.random() < 0.05:  # if task starts on a leap day
+        original_date = date(rng.choice((2020, 2024)), 2, 29)
+    repeat_often: int = rng.randint(1, 5)
+    return (
+        original_date,
+        rng.choice(
+            (1, 2, 3, 5) if repeat_often == 4 else (1, 1, 2, 3, 5, 7, 12, 30, 400)
+        ),  # yearly tasks stay before year 9999
+        repeat_often,
+        rng.choice((0, 0, 0, rng.randint(1, 40))),
+    )
+
+
+def random_date_range(rng: random.Random) -> tuple[date, date]:  # random date range
+    """
+    Get a random date range of up to about three years around the original dates.
+    """
+    start_date: date = date(2019, 1, 1) + timedelta(days=rng.randrange(2800))
+    return start_date, start_date + timedelta(days=rng.choice((0, 1, 6, 30, 90, 1100)))
+
+
+def test_iterate_recurring_events_matches_next_event() -> None:
+    """
+    Iterating events gives exactly the events calculate_next_recurring_event gives in the date range.
+    """
+    rng = random.Random(6)
+    for _ in range(3000):
+        original_date, interval, often, minimum = random_task(rng)
+        start_date, end_date = random_date_range(rng)
+        assert list(
+            task_app.iterate_recurring_events(
+                original_date, interval, often, start_date, end_date, minimum
+            )
+        ) == expand_by_next_event(
+            original_date, interval, often, start_date, end_date, minimum
+        ), (original_date, interval, often, start_date, end_date, minimum)
+
+
+def test_expand_recurring_events_batch_matches_next_event() -> None:
+    """
+    Expanding arrays of tasks at once gives the same events as expanding each task with calculate_next_recurring_event.
+    """
+    rng = random.Random(7)
+    for _ in range(50):
+        tasks: list[tuple[date, int, int, int]] = [random_task(rng) for _ in range(60)]
+        start_date, end_date = random_date_range(rng)
+        task_index, times_completed, dates = task_app.expand_recurring_events_batch(
+            [task[0] for task in tasks],
+            [task[1] for task in tasks],
+            [task[2] for task in tasks],
+            start_date,
+            end_date,
+            np.array([task[3] for task in tasks]),
+        )
+        assert list(
+            zip(task_index.tolist(), times_completed.tolist(), dates.astype(object))
+        ) == [
+            (index, count, event_date)
+            for index, task in enumerate(tasks)
+            for count, event_date in expand_by_next_event(
+                task[0], task[1], task[2], start_date, end_date, task[3]
+            )
+        ]
+
+
+def test_iterate_recurring_events_stops_at_last_date() -> None:
+    """
+    Iterating events up to the last representable date ends instead of overflowing.
+    """
+    for often in (1, 2, 3, 4):  # repeat for each recurring repeat often
+        events = list(
+            task_app.iterate_recurring_events(
+                date(9999, 11, 30), 1, often, date(9999, 1, 1), date.max
+            )
+        )
+        assert events == [
+            (
+                count,
+                task_app.calculate_next_recurring_event(
+                    date(9999, 11, 30), count, 1, often
+                ),
+            )
+            for count in range(len(events))
+        ]
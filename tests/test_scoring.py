@@ -0,0 +1,116 @@
+"""
+Tests that the NumPy batch scoring functions used by flask sim give the same results as the scalar functions used to score completions.
+"""
+
+from datetime import datetime, timedelta
+import random
+import numpy as np
+import pytest
+from conftest import task_app
+
+completions: int = 5000  # number of random completions to score
+
+
+@pytest.fixture
+def rng() -> random.Random:  # seeded random number generator
+    """
+    Get a random number generator with the same values in each run.
+    """
+    return random.Random(5)
+
+
+def test_due_multiplier_batch_matches_scalar(rng: random.Random) -> None:
+    """
+    The batch due multipliers match the scalar ones for tasks due before, on and after the completion day.
+    """
+    days_to_due: list[int] = [rng.randint(-400, 400) for _ in range(completions)]
+    days_to_due[::3] = [0] * len(days_to_due[::3])  # complete some tasks on the due day
+    now: list[datetime] = [
+        datetime(2024, 1, 1) + timedelta(seconds=rng.randrange(86400))
+        for _ in range(completions)
+    ]  # local completion times
+    day_fraction_left: list[float] = [
+        (datetime.combine(time.date() + timedelta(days=1), datetime.min.time()) - time)
+        / timedelta(days=1)
+        for time in now
+    ]  # fraction of the day left until midnight
+    assert task_app.calculate_due_multiplier_batch(
+        days_to_due, day_fraction_left
+    ).tolist() == pytest.approx(
+        [
+            task_app.calculate_due_multiplier(days, time)
+            for days, time in zip(days_to_due, now)
+        ],
+        rel=1e-12,
+    )
+
+
+def test_repeat_multiplier_batch_matches_scalar() -> None:
+    """
+    The batch repeat multipliers match the scalar ones at and around each interval boundary.
+    """
+    intervals: list[int] = [*range(1, 60), 364, 365, 366, 1000]  # repeat intervals
+    pairs: list[tuple[int, int]] = [
+        (interval, often) for interval in intervals for often in range(1, 6)
+    ]  # each repeat interval with each repeat often
+    assert task_app.calculate_repeat_multiplier_batch(
+        [interval for interval, _ in pairs], [often for _, often in pairs]
+    ).tolist() == pytest.approx(
+        [task_app.calculate_repeat_multiplier(*pair) for pair in pairs], rel=1e-12
+    )
+
+
+def test_completion_rating_and_xp_batch_match_scalar(rng: random.Random) -> None:
+    """
+    The batch rating scores and XP match the scalar ones for random task and user statistics.
+    """
+    scores: list[dict] = []  # scoring arguments of each completion
+    for _ in range(completions):  # repeat for each completion
+        repeat_often: int = rng.randint(1, 5)
+        scores.append(
+            {
+                "priority": rng.randint(1, 3),
+                "difficulty": rng.randint(1, 3),
+                "repeat_often": repeat_often,
+                "repeat_multiplier": task_app.calculate_repeat_multiplier(
+                    rng.randint(1, 30), repeat_often
+                ),
+                "times_completed": rng.randint(0, 500),
+                "task_streak": rng.randint(0, 100),
+                "due_multiplier": rng.choice((1.0, rng.uniform(0.01, 4))),
+                "tasks_completed": rng.randint(1, 10000),
+                "active_tasks": rng.randint(0, 500),
+                "daily_streak": rng.randint(0, 365),
+                "daily_tasks_completed": rng.randint(0, 20),
+                "days_completed": rng.randint(0, 1000),
+                "combo_multiplier": rng.randint(0, 10),
+                "time_multiplier": rng.randint(1, 5),
+                "time_difference_seconds": rng.expovariate(1 / 900),
+                "rating": rng.choice((0.0, rng.uniform(0, 10**6))),
+            }
+        )
+    columns: dict[str, np.ndarray] = {
+        name: np.array([score[name] for score in scores]) for name in scores[0]
+    }  # each scoring argument as an array
+    assert task_app.calculate_completion_xp_batch(
+        **columns
+    ).tolist() == pytest.approx(
+        [task_app.calculate_completion_xp(**score) for score in scores], rel=1e-12
+    )
+    rating_arguments: tuple[str, ...] = (
+        "rating",
+        "repeat_multiplier",
+        "due_multiplier",
+        "daily_tasks_completed",
+    )  # arguments of the rating score functions
+    assert task_app.calculate_completion_rating_batch(
+        *(columns[name] for name in rating_arguments)
+    ).tolist() == pytest.approx(
+        [
+            task_app.calculate_completion_rating(
+                *(score[name] for name in rating_arguments)
+            )
+            for score in scores
+        ],
+        rel=1e-12,
+    )